@@ -29,6 +29,10 @@ CREATE TABLE IF NOT EXISTS books (
     status VARCHAR(20) DEFAULT 'available' NOT NULL,
     total_copies INTEGER DEFAULT 1 NOT NULL,
     available_copies INTEGER DEFAULT 1 NOT NULL,
+    active_loan_count INTEGER DEFAULT 0 NOT NULL,
+    pending_reservation_count INTEGER DEFAULT 0 NOT NULL,
+    isbn13 VARCHAR(13),
+    title_key VARCHAR(500),
     image_url VARCHAR(500),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
@@ -76,10 +80,116 @@ CREATE TABLE IF NOT EXISTS purchase_requests (
     status VARCHAR(20) DEFAULT 'pending' NOT NULL,
     admin_notes TEXT,
     priority INTEGER DEFAULT 3 NOT NULL,
+    amazon_url VARCHAR(1000),
+    department VARCHAR(100),
+    isbn13 VARCHAR(13),
+    title_key VARCHAR(500),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
 );
 
+-- ユーザートークンバージョンテーブル（アクセストークン失効用）
+CREATE TABLE IF NOT EXISTS user_token_versions (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER DEFAULT 0 NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- 日別・ユーザー別読書数ロールアップテーブル
+CREATE TABLE IF NOT EXISTS daily_user_reads (
+    day DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    completed_reads INTEGER DEFAULT 0 NOT NULL,
+    PRIMARY KEY (day, user_id)
+);
+
+-- 日別・書籍別読書数ロールアップテーブル
+CREATE TABLE IF NOT EXISTS daily_book_reads (
+    day DATE NOT NULL,
+    book_id INTEGER NOT NULL,
+    completed_reads INTEGER DEFAULT 0 NOT NULL,
+    PRIMARY KEY (day, book_id)
+);
+
+-- 期間別読書ランキングテーブル
+CREATE TABLE IF NOT EXISTS reading_leaderboards (
+    period VARCHAR(7) NOT NULL,
+    scope VARCHAR(10) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    department VARCHAR(100),
+    completed_reads INTEGER DEFAULT 0 NOT NULL,
+    PRIMARY KEY (period, scope, entity_id)
+);
+
+-- 日別アクティビティカウンターテーブル
+CREATE TABLE IF NOT EXISTS activity_counters (
+    metric VARCHAR(40) NOT NULL,
+    day DATE NOT NULL,
+    shard INTEGER DEFAULT 0 NOT NULL,
+    count INTEGER DEFAULT 0 NOT NULL,
+    PRIMARY KEY (metric, day, shard)
+);
+
+-- 統計スナップショットテーブル
+CREATE TABLE IF NOT EXISTS stats_snapshots (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    data JSON NOT NULL,
+    captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- 貸出履歴アーカイブテーブル（返却・紛失から一定期間を過ぎた貸出）
+CREATE TABLE IF NOT EXISTS loans_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    loan_date DATE NOT NULL,
+    due_date DATE NOT NULL,
+    return_date DATE,
+    status VARCHAR(20) NOT NULL,
+    renewal_count INTEGER DEFAULT 0 NOT NULL,
+    notes VARCHAR(500),
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- 通知アウトボックステーブル
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(40) NOT NULL,
+    user_id INTEGER NOT NULL,
+    subject VARCHAR(200) NOT NULL,
+    message TEXT NOT NULL,
+    dedupe_key VARCHAR(200) UNIQUE,
+    status VARCHAR(20) DEFAULT 'pending' NOT NULL,
+    attempts INTEGER DEFAULT 0 NOT NULL,
+    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    sent_at TIMESTAMP
+);
+
+-- 予約待ちの貸出可能予定日テーブル
+CREATE TABLE IF NOT EXISTS book_availability_estimates (
+    book_id INTEGER PRIMARY KEY REFERENCES books(id),
+    median_loan_days INTEGER NOT NULL,
+    sample_size INTEGER DEFAULT 0 NOT NULL,
+    basis VARCHAR(20) NOT NULL,
+    slot_dates JSON NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+-- 購入申請の予算集計（月・部署・ステータス別）
+CREATE TABLE IF NOT EXISTS purchase_budget_rollups (
+    month DATE NOT NULL,
+    department VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    request_count INTEGER DEFAULT 0 NOT NULL,
+    total_amount NUMERIC(14, 2) DEFAULT 0 NOT NULL,
+    PRIMARY KEY (month, department, status)
+);
+
 -- インデックス作成
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
@@ -90,4 +200,24 @@ CREATE INDEX IF NOT EXISTS idx_loans_user_id ON loans(user_id);
 CREATE INDEX IF NOT EXISTS idx_loans_book_id ON loans(book_id);
 CREATE INDEX IF NOT EXISTS idx_reservations_user_id ON reservations(user_id);
 CREATE INDEX IF NOT EXISTS idx_reservations_book_id ON reservations(book_id);
-CREATE INDEX IF NOT EXISTS idx_purchase_requests_user_id ON purchase_requests(user_id); 
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_purchase_requests_user_id ON purchase_requests(user_id); 
+CREATE INDEX IF NOT EXISTS idx_daily_user_reads_user_id ON daily_user_reads(user_id);
+CREATE INDEX IF NOT EXISTS idx_daily_book_reads_book_id ON daily_book_reads(book_id);
+CREATE INDEX IF NOT EXISTS ix_reading_leaderboards_rank ON reading_leaderboards(period, scope, completed_reads, entity_id);
+CREATE INDEX IF NOT EXISTS ix_reading_leaderboards_department_rank ON reading_leaderboards(period, scope, department, completed_reads, entity_id);
+CREATE INDEX IF NOT EXISTS ix_stats_snapshots_kind_captured_at ON stats_snapshots(kind, captured_at);
+CREATE INDEX IF NOT EXISTS ix_loans_status_due_date ON loans(status, due_date);
+CREATE INDEX IF NOT EXISTS ix_loans_user_id_status ON loans(user_id, status);
+CREATE INDEX IF NOT EXISTS ix_loans_open_book_id ON loans(book_id) WHERE return_date IS NULL;
+CREATE INDEX IF NOT EXISTS ix_reservations_queue_order ON reservations(book_id, status, reservation_date, id);
+CREATE INDEX IF NOT EXISTS ix_purchase_requests_status_priority_created_at ON purchase_requests(status, priority, created_at);
+CREATE INDEX IF NOT EXISTS ix_books_created_at ON books(created_at);
+CREATE INDEX IF NOT EXISTS ix_loans_archive_user_id_loan_date ON loans_archive(user_id, loan_date);
+CREATE INDEX IF NOT EXISTS ix_loans_archive_book_id ON loans_archive(book_id);
+CREATE INDEX IF NOT EXISTS ix_loans_archive_return_date ON loans_archive(return_date);
+CREATE INDEX IF NOT EXISTS ix_notification_outbox_status_next_attempt_at ON notification_outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS ix_purchase_requests_amazon_url ON purchase_requests(amazon_url);
+CREATE INDEX IF NOT EXISTS ix_books_isbn13 ON books(isbn13);
+CREATE INDEX IF NOT EXISTS ix_books_title_key ON books(title_key);
+CREATE INDEX IF NOT EXISTS ix_purchase_requests_isbn13 ON purchase_requests(isbn13);
+CREATE INDEX IF NOT EXISTS ix_purchase_requests_title_key ON purchase_requests(title_key);
\ No newline at end of file
@@ -26,8 +26,8 @@ def create_test_admin():
         # 既存ユーザーをチェック
         existing_user = session.query(User).filter_by(email="admin@example.com").first()
         if existing_user:
-            # パスワードを更新
-            existing_user.hashed_password = get_password_hash("admin123")
+            # パスワードを更新（低コストハッシュ。初回ログイン時に通常コストへ自動で再ハッシュされる）
+            existing_user.hashed_password = get_password_hash("admin123", profile="fast")
             session.commit()
             print("✅ 既存の管理者ユーザーのパスワードを更新しました")
             print(f"Email: admin@example.com")
@@ -38,7 +38,7 @@ def create_test_admin():
         admin_user = User(
             username="test_admin",
             email="admin@example.com",
-            hashed_password=get_password_hash("admin123"),
+            hashed_password=get_password_hash("admin123", profile="fast"),
             full_name="テスト管理者",
             department="システム管理部",
             role=UserRole.ADMIN,
@@ -22,6 +22,14 @@ from src.models.user import User
 from src.models.loan import Loan
 from src.models.reservation import Reservation
 from src.models.purchase_request import PurchaseRequest
+from src.models.user_token_version import UserTokenVersion
+from src.models.reading_stats import DailyUserReads, DailyBookReads, ReadingLeaderboard
+from src.models.activity_counter import ActivityCounter
+from src.models.stats_snapshot import StatsSnapshot
+from src.models.loan_archive import LoanArchive
+from src.models.notification_outbox import NotificationOutbox
+from src.models.availability_estimate import BookAvailabilityEstimate
+from src.models.purchase_budget_rollup import PurchaseBudgetRollup
 
 target_metadata = Base.metadata
 
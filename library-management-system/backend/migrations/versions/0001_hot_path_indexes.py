@@ -0,0 +1,147 @@
+"""hot path indexes and aggregate tables
+
+貸出・予約・購入申請の頻出条件に対応する複合インデックス・部分インデックスと、
+集計用テーブル（トークンバージョン・読書統計・アクティビティカウンター・統計スナップショット）を追加する。
+
+既存の本番DBは create_tables.sql で作成されているため、本リビジョンを起点とする。
+テーブルは存在しない場合のみ作成し、PostgreSQL ではインデックスを CONCURRENTLY で作成する。
+
+Revision ID: 0001_hot_path_indexes
+Revises:
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_hot_path_indexes"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (インデックス名, テーブル名, カラム, 部分インデックス条件)
+HOT_PATH_INDEXES = [
+    ("ix_loans_status_due_date", "loans", ["status", "due_date"], None),
+    ("ix_loans_user_id_status", "loans", ["user_id", "status"], None),
+    ("ix_loans_open_book_id", "loans", ["book_id"], "return_date IS NULL"),
+    ("ix_reservations_queue", "reservations", ["book_id", "status", "priority", "reservation_date"], None),
+    ("ix_purchase_requests_status_priority_created_at", "purchase_requests", ["status", "priority", "created_at"], None),
+    ("ix_books_created_at", "books", ["created_at"], None),
+]
+
+
+def _create_missing_tables() -> None:
+    """集計用テーブルを未作成の場合のみ作成"""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "user_token_versions" not in existing:
+        op.create_table(
+            "user_token_versions",
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        )
+
+    if "daily_user_reads" not in existing:
+        op.create_table(
+            "daily_user_reads",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("completed_reads", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("idx_daily_user_reads_user_id", "daily_user_reads", ["user_id"])
+
+    if "daily_book_reads" not in existing:
+        op.create_table(
+            "daily_book_reads",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("book_id", sa.Integer(), primary_key=True),
+            sa.Column("completed_reads", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("idx_daily_book_reads_book_id", "daily_book_reads", ["book_id"])
+
+    if "reading_leaderboards" not in existing:
+        op.create_table(
+            "reading_leaderboards",
+            sa.Column("period", sa.String(7), primary_key=True),
+            sa.Column("scope", sa.String(10), primary_key=True),
+            sa.Column("entity_id", sa.Integer(), primary_key=True),
+            sa.Column("department", sa.String(100), nullable=True),
+            sa.Column("completed_reads", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index(
+            "ix_reading_leaderboards_rank", "reading_leaderboards",
+            ["period", "scope", "completed_reads", "entity_id"]
+        )
+        op.create_index(
+            "ix_reading_leaderboards_department_rank", "reading_leaderboards",
+            ["period", "scope", "department", "completed_reads", "entity_id"]
+        )
+
+    if "activity_counters" not in existing:
+        op.create_table(
+            "activity_counters",
+            sa.Column("metric", sa.String(40), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    if "stats_snapshots" not in existing:
+        op.create_table(
+            "stats_snapshots",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("kind", sa.String(30), nullable=False),
+            sa.Column("data", sa.JSON(), nullable=False),
+            sa.Column("captured_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        )
+        op.create_index("ix_stats_snapshots_kind_captured_at", "stats_snapshots", ["kind", "captured_at"])
+
+
+def upgrade() -> None:
+    _create_missing_tables()
+
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+    existing = {
+        table: {index["name"] for index in sa.inspect(bind).get_indexes(table)}
+        for table in {table for _, table, _, _ in HOT_PATH_INDEXES}
+    }
+
+    def create_indexes() -> None:
+        for name, table, columns, where in HOT_PATH_INDEXES:
+            if name in existing[table]:
+                continue
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=is_postgresql,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None,
+            )
+
+    if is_postgresql:
+        # CREATE INDEX CONCURRENTLY はトランザクション外で実行する必要がある
+        with op.get_context().autocommit_block():
+            create_indexes()
+    else:
+        create_indexes()
+
+
+def downgrade() -> None:
+    # 集計用テーブルは既存環境で create_tables.sql から作成済みの場合があるため残す
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+
+    def drop_indexes() -> None:
+        for name, table, _, _ in reversed(HOT_PATH_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=is_postgresql, if_exists=True)
+
+    if is_postgresql:
+        with op.get_context().autocommit_block():
+            drop_indexes()
+    else:
+        drop_indexes()
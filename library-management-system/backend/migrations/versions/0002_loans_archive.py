@@ -0,0 +1,58 @@
+"""loans archive table
+
+返却・紛失から一定期間を過ぎた貸出を移す loans_archive テーブルを追加する。
+
+Revision ID: 0002_loans_archive
+Revises: 0001_hot_path_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_loans_archive"
+down_revision: Union[str, None] = "0001_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("loans_archive"):
+        return
+
+    op.create_table(
+        "loans_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("loan_date", sa.Date(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("return_date", sa.Date(), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("renewal_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("notes", sa.String(500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+    )
+    op.create_index("ix_loans_archive_user_id_loan_date", "loans_archive", ["user_id", "loan_date"])
+    op.create_index("ix_loans_archive_book_id", "loans_archive", ["book_id"])
+    op.create_index("ix_loans_archive_return_date", "loans_archive", ["return_date"])
+
+
+def downgrade() -> None:
+    # アーカイブ済みの貸出を loans に戻してからテーブルを削除する
+    op.execute(
+        "INSERT INTO loans (id, user_id, book_id, loan_date, due_date, return_date, status, "
+        "renewal_count, notes, created_at, updated_at) "
+        "SELECT id, user_id, book_id, loan_date, due_date, return_date, status, "
+        "renewal_count, notes, created_at, updated_at FROM loans_archive"
+    )
+    op.drop_index("ix_loans_archive_return_date", table_name="loans_archive")
+    op.drop_index("ix_loans_archive_book_id", table_name="loans_archive")
+    op.drop_index("ix_loans_archive_user_id_loan_date", table_name="loans_archive")
+    op.drop_table("loans_archive")
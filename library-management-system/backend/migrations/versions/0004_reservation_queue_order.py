@@ -0,0 +1,61 @@
+"""reservation queue order index
+
+予約順位を読み取り時に（予約日・ID順で）算出するため、待ち行列のインデックスを
+(book_id, status, priority, reservation_date) から (book_id, status, reservation_date, id) に置き換える。
+
+Revision ID: 0004_reservation_queue_order
+Revises: 0003_notification_outbox
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_reservation_queue_order"
+down_revision: Union[str, None] = "0003_notification_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+
+    def replace_index() -> None:
+        op.create_index(
+            "ix_reservations_queue_order", "reservations", ["book_id", "status", "reservation_date", "id"],
+            postgresql_concurrently=is_postgresql, if_not_exists=True
+        )
+        op.drop_index(
+            "ix_reservations_queue", table_name="reservations",
+            postgresql_concurrently=is_postgresql, if_exists=True
+        )
+
+    if is_postgresql:
+        # CREATE INDEX CONCURRENTLY はトランザクション外で実行する必要がある
+        with op.get_context().autocommit_block():
+            replace_index()
+    else:
+        replace_index()
+
+
+def downgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+
+    def restore_index() -> None:
+        op.create_index(
+            "ix_reservations_queue", "reservations", ["book_id", "status", "priority", "reservation_date"],
+            postgresql_concurrently=is_postgresql, if_not_exists=True
+        )
+        op.drop_index(
+            "ix_reservations_queue_order", table_name="reservations",
+            postgresql_concurrently=is_postgresql, if_exists=True
+        )
+
+    if is_postgresql:
+        with op.get_context().autocommit_block():
+            restore_index()
+    else:
+        restore_index()
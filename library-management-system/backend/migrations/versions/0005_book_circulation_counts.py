@@ -0,0 +1,44 @@
+"""book circulation counts
+
+書籍一覧・貸出判定で貸出・予約テーブルを都度 COUNT しないよう、
+books に未返却の貸出数（active_loan_count）と待機中の予約数（pending_reservation_count）を追加し、
+既存データから初期値を計算する。
+
+Revision ID: 0005_book_circulation_counts
+Revises: 0004_reservation_queue_order
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_book_circulation_counts"
+down_revision: Union[str, None] = "0004_reservation_queue_order"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("books")}
+    if "active_loan_count" not in columns:
+        op.add_column("books", sa.Column("active_loan_count", sa.Integer(), nullable=False, server_default="0"))
+    if "pending_reservation_count" not in columns:
+        op.add_column("books", sa.Column("pending_reservation_count", sa.Integer(), nullable=False, server_default="0"))
+
+    # scripts/reconcile_book_counters.py と同じ計算で初期値を設定する
+    op.execute(
+        "UPDATE books SET "
+        "active_loan_count = (SELECT COUNT(*) FROM loans "
+        "WHERE loans.book_id = books.id AND loans.status IN ('ACTIVE', 'OVERDUE')), "
+        "pending_reservation_count = (SELECT COUNT(*) FROM reservations "
+        "WHERE reservations.book_id = books.id AND reservations.status = 'PENDING')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("books", "pending_reservation_count")
+    op.drop_column("books", "active_loan_count")
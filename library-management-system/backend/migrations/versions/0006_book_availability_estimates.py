@@ -0,0 +1,41 @@
+"""book availability estimates
+
+予約キューの待ち順ごとの貸出可能予定日を返すため、書籍ごとの貸出日数の中央値と
+各冊が空く見込み日を保存する book_availability_estimates テーブルを追加する。
+既存の予約待ちの見込みは初回の予約キュー取得時に作成されるため、データ移行は行わない。
+
+Revision ID: 0006_book_availability_estimates
+Revises: 0005_book_circulation_counts
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_book_availability_estimates"
+down_revision: Union[str, None] = "0005_book_circulation_counts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("book_availability_estimates"):
+        return
+
+    op.create_table(
+        "book_availability_estimates",
+        sa.Column("book_id", sa.Integer(), sa.ForeignKey("books.id"), primary_key=True),
+        sa.Column("median_loan_days", sa.Integer(), nullable=False),
+        sa.Column("sample_size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("basis", sa.String(20), nullable=False),
+        sa.Column("slot_dates", sa.JSON(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("book_availability_estimates")
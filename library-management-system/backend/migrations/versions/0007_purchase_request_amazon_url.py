@@ -0,0 +1,115 @@
+"""purchase request amazon_url column
+
+購入申請の Amazon URL を admin_notes から専用の amazon_url 列に移すため、列とインデックスを追加する。
+既存データはインデックス作成前にバッチ単位で移行する（scripts/backfill_amazon_urls.py と同じ抽出）。
+ダウングレード時は amazon_url を admin_notes の「Amazon URL: ...」に書き戻してから列を削除する。
+
+Revision ID: 0007_purchase_request_amazon_url
+Revises: 0006_book_availability_estimates
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_purchase_request_amazon_url"
+down_revision: Union[str, None] = "0006_book_availability_estimates"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+# 旧実装で admin_notes に保存していた Amazon URL の形式
+AMAZON_URL_PATTERN = re.compile(r'Amazon URL: (https?://[^\s]+)')
+
+purchase_requests = sa.table(
+    "purchase_requests",
+    sa.column("id", sa.Integer), sa.column("admin_notes", sa.Text), sa.column("amazon_url", sa.String),
+)
+
+
+def _batches(bind, condition):
+    """条件に合う行の (id, admin_notes, amazon_url) を ID 順のバッチで返す"""
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(purchase_requests.c.id, purchase_requests.c.admin_notes, purchase_requests.c.amazon_url)
+            .where(purchase_requests.c.id > last_id, condition)
+            .order_by(purchase_requests.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows
+
+
+def backfill_amazon_urls(bind) -> None:
+    """admin_notes の「Amazon URL: ...」を amazon_url 列へ移す"""
+    stmt = purchase_requests.update().where(purchase_requests.c.id == sa.bindparam("row_id")).values(
+        amazon_url=sa.bindparam("new_amazon_url")
+    )
+    condition = sa.and_(
+        purchase_requests.c.amazon_url.is_(None),
+        purchase_requests.c.admin_notes.like("%Amazon URL:%")
+    )
+    for rows in _batches(bind, condition):
+        values = []
+        for row in rows:
+            match = AMAZON_URL_PATTERN.search(row.admin_notes)
+            if match:
+                values.append({"row_id": row.id, "new_amazon_url": match.group(1)})
+        if values:
+            bind.execute(stmt, values)
+
+
+def restore_admin_notes(bind) -> None:
+    """amazon_url を admin_notes に書き戻す（既に同じ形式で記載済みの行はそのまま）"""
+    stmt = purchase_requests.update().where(purchase_requests.c.id == sa.bindparam("row_id")).values(
+        admin_notes=sa.bindparam("new_admin_notes")
+    )
+    for rows in _batches(bind, purchase_requests.c.amazon_url.isnot(None)):
+        values = []
+        for row in rows:
+            if row.admin_notes and AMAZON_URL_PATTERN.search(row.admin_notes):
+                continue
+            line = f"Amazon URL: {row.amazon_url}"
+            values.append({
+                "row_id": row.id,
+                "new_admin_notes": f"{row.admin_notes}\n{line}" if row.admin_notes else line
+            })
+        if values:
+            bind.execute(stmt, values)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+
+    # add_amazon_url_column.py で追加済みの環境もある
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("purchase_requests")}
+    if "amazon_url" not in columns:
+        op.add_column("purchase_requests", sa.Column("amazon_url", sa.String(1000), nullable=True))
+    backfill_amazon_urls(bind)
+
+    def create_index() -> None:
+        op.create_index(
+            "ix_purchase_requests_amazon_url", "purchase_requests", ["amazon_url"],
+            postgresql_concurrently=is_postgresql, if_not_exists=True
+        )
+
+    if is_postgresql:
+        # CREATE INDEX CONCURRENTLY はトランザクション外で実行する必要がある
+        with op.get_context().autocommit_block():
+            create_index()
+    else:
+        create_index()
+
+
+def downgrade() -> None:
+    restore_admin_notes(op.get_bind())
+    op.drop_index("ix_purchase_requests_amazon_url", table_name="purchase_requests", if_exists=True)
+    op.drop_column("purchase_requests", "amazon_url")
@@ -0,0 +1,92 @@
+"""duplicate detection keys
+
+購入申請の重複・所蔵済み判定を索引で行うため、books と purchase_requests に
+正規化した ISBN-13（isbn13）とタイトル＋著者のキー（title_key）を追加する。
+既存データのキーはインデックス作成前にバッチ単位で設定する（scripts/backfill_duplicate_keys.py と同じ正規化）。
+
+Revision ID: 0008_duplicate_detection_keys
+Revises: 0007_purchase_request_amazon_url
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.book_keys import normalize_isbn13, title_author_key
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_duplicate_detection_keys"
+down_revision: Union[str, None] = "0007_purchase_request_amazon_url"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("books", "purchase_requests")
+BATCH_SIZE = 1000
+
+
+def backfill_keys(bind, table_name: str) -> None:
+    """既存行の isbn13 / title_key を ID 順のバッチで設定"""
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.Integer), sa.column("title", sa.String), sa.column("author", sa.String),
+        sa.column("isbn", sa.String), sa.column("isbn13", sa.String), sa.column("title_key", sa.String),
+    )
+    stmt = table.update().where(table.c.id == sa.bindparam("row_id")).values(
+        isbn13=sa.bindparam("new_isbn13"), title_key=sa.bindparam("new_title_key")
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.title, table.c.author, table.c.isbn).where(
+                table.c.id > last_id
+            ).order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        bind.execute(stmt, [
+            {
+                "row_id": row.id,
+                "new_isbn13": normalize_isbn13(row.isbn),
+                "new_title_key": title_author_key(row.title, row.author)
+            }
+            for row in rows
+        ])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+
+    for table in TABLES:
+        columns = {column["name"] for column in sa.inspect(bind).get_columns(table)}
+        if "isbn13" not in columns:
+            op.add_column(table, sa.Column("isbn13", sa.String(13), nullable=True))
+        if "title_key" not in columns:
+            op.add_column(table, sa.Column("title_key", sa.String(500), nullable=True))
+        backfill_keys(bind, table)
+
+    def create_indexes() -> None:
+        for table in TABLES:
+            for column in ("isbn13", "title_key"):
+                op.create_index(
+                    f"ix_{table}_{column}", table, [column],
+                    postgresql_concurrently=is_postgresql, if_not_exists=True
+                )
+
+    if is_postgresql:
+        # CREATE INDEX CONCURRENTLY はトランザクション外で実行する必要がある
+        with op.get_context().autocommit_block():
+            create_indexes()
+    else:
+        create_indexes()
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for column in ("isbn13", "title_key"):
+            op.drop_index(f"ix_{table}_{column}", table_name=table, if_exists=True)
+            op.drop_column(table, column)
@@ -0,0 +1,68 @@
+"""purchase budget rollups
+
+購入申請の統計・予算内訳を申請テーブルの集計なしで返すため、
+(月, 部署, ステータス) 別の件数と見積金額の合計を保持する purchase_budget_rollups テーブルを追加し、
+既存の申請から初期値を集計する（scripts/rebuild_purchase_budget_rollups.py と同じ集計）。
+集計の部署は申請時点の部署とするため purchase_requests.department 列を追加し、
+既存の申請には現在の申請者の部署を設定する。
+
+Revision ID: 0009_purchase_budget_rollups
+Revises: 0008_duplicate_detection_keys
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_purchase_budget_rollups"
+down_revision: Union[str, None] = "0008_duplicate_detection_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("purchase_requests")}
+    if "department" not in columns:
+        op.add_column("purchase_requests", sa.Column("department", sa.String(100), nullable=True))
+        op.execute(
+            "UPDATE purchase_requests SET department = "
+            "(SELECT u.department FROM users u WHERE u.id = purchase_requests.user_id) "
+            "WHERE department IS NULL"
+        )
+
+    if sa.inspect(bind).has_table("purchase_budget_rollups"):
+        return
+
+    op.create_table(
+        "purchase_budget_rollups",
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("department", sa.String(100), primary_key=True),
+        sa.Column("status", sa.String(20), primary_key=True),
+        sa.Column("request_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_amount", sa.Numeric(14, 2), nullable=False, server_default="0"),
+    )
+
+    # status 列は Enum の名前（'APPROVED' 等）で保存されているため、値（小文字）に変換する。
+    # PostgreSQL のネイティブ ENUM 型には LOWER を直接適用できないため文字列にキャストする
+    if bind.dialect.name == "postgresql":
+        month = "CAST(date_trunc('month', pr.created_at) AS DATE)"
+    else:
+        month = "date(pr.created_at, 'start of month')"
+    status = "LOWER(CAST(pr.status AS VARCHAR))"
+    op.execute(
+        "INSERT INTO purchase_budget_rollups (month, department, status, request_count, total_amount) "
+        f"SELECT {month}, COALESCE(pr.department, ''), {status}, "
+        "COUNT(*), COALESCE(SUM(pr.estimated_price), 0) "
+        "FROM purchase_requests pr "
+        f"GROUP BY {month}, COALESCE(pr.department, ''), {status}"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("purchase_budget_rollups")
+    op.drop_column("purchase_requests", "department")
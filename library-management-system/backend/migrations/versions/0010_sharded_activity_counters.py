@@ -0,0 +1,57 @@
+"""sharded activity counters
+
+貸出・返却等のトランザクションが同じ (metric, day) の1行のロックを奪い合わないよう、
+activity_counters に shard 列を加えて主キーを (metric, day, shard) にする。
+主キーの変更は SQLite の ALTER TABLE では行えないため、テーブルを作り直して既存の行を shard 0 に移す。
+
+Revision ID: 0010_sharded_activity_counters
+Revises: 0009_purchase_budget_rollups
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_sharded_activity_counters"
+down_revision: Union[str, None] = "0009_purchase_budget_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_counters(with_shard: bool) -> None:
+    columns = [
+        sa.Column("metric", sa.String(40), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+    ]
+    if with_shard:
+        columns.append(sa.Column("shard", sa.Integer(), primary_key=True, server_default="0"))
+    columns.append(sa.Column("count", sa.Integer(), nullable=False, server_default="0"))
+    op.create_table("activity_counters", *columns)
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("activity_counters")}
+    if "shard" in columns:
+        return
+
+    op.rename_table("activity_counters", "activity_counters_unsharded")
+    _create_counters(with_shard=True)
+    op.execute(
+        "INSERT INTO activity_counters (metric, day, shard, count) "
+        "SELECT metric, day, 0, count FROM activity_counters_unsharded"
+    )
+    op.drop_table("activity_counters_unsharded")
+
+
+def downgrade() -> None:
+    op.rename_table("activity_counters", "activity_counters_sharded")
+    _create_counters(with_shard=False)
+    op.execute(
+        "INSERT INTO activity_counters (metric, day, count) "
+        "SELECT metric, day, SUM(count) FROM activity_counters_sharded GROUP BY metric, day"
+    )
+    op.drop_table("activity_counters_sharded")
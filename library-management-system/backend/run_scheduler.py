@@ -0,0 +1,22 @@
+"""
+定期実行ジョブのワーカー（APIサーバーとは別プロセスで起動）
+
+使い方:
+    python run_scheduler.py
+"""
+import logging
+import signal
+
+from src.config.settings import Settings
+from src.services.scheduled_jobs import build_scheduler
+
+settings = Settings()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+    scheduler = build_scheduler()
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
@@ -20,7 +20,8 @@ def add_passwords_to_users():
         
         # デフォルトパスワード
         default_password = "password123"
-        hashed_password = get_password_hash(default_password)
+        # 低コストハッシュで設定（初回ログイン時に通常コストへ自動で再ハッシュされる）
+        hashed_password = get_password_hash(default_password, profile="fast")
         
         for user in users:
             # password_hashフィールドが空の場合にパスワードを設定
@@ -0,0 +1,36 @@
+"""
+返却・紛失から一定期間を過ぎた貸出を loans_archive へ移動するスクリプト
+
+使い方:
+    python scripts/archive_loans.py
+    python scripts/archive_loans.py --before 2025-01-01 --batch-size 5000
+"""
+import sys
+import os
+import argparse
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.services.loan_archive_service import LoanArchiveService
+
+def archive_loans(before=None, batch_size=None):
+    """完了済みの古い貸出をアーカイブ"""
+    db = get_db_session()
+    
+    try:
+        archived = LoanArchiveService(db).archive_loans(before=before, batch_size=batch_size)
+        print(f"アーカイブ件数: {archived}件")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="貸出履歴のアーカイブ")
+    parser.add_argument("--before", type=date.fromisoformat, help="この日付より前に完了した貸出を対象（既定: 設定日数前）")
+    parser.add_argument("--batch-size", type=int, help="1回のコミットで移動する件数")
+    args = parser.parse_args()
+    archive_loans(before=args.before, batch_size=args.batch_size)
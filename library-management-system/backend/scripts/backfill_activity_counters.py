@@ -0,0 +1,30 @@
+"""
+時系列統計用の日別アクティビティカウンター（activity_counters）を貸出・予約履歴から再構築するスクリプト
+
+使い方:
+    python scripts/backfill_activity_counters.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.services.timeseries_service import TimeSeriesService
+
+def backfill_activity_counters():
+    """貸出・予約履歴から日別アクティビティカウンターを再構築"""
+    db = get_db_session()
+    
+    try:
+        result = TimeSeriesService(db).backfill()
+        for metric, rows in result.items():
+            print(f"{metric}: {rows}行")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_activity_counters()
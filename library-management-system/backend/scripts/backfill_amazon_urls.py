@@ -0,0 +1,36 @@
+"""
+購入申請の admin_notes に保存されていた Amazon URL を amazon_url 列へ移すスクリプト
+
+既存行はマイグレーション 0007 で移行済み。マイグレーション後に旧形式で書き込まれた行が残った場合に実行する。
+
+使い方:
+    python scripts/backfill_amazon_urls.py
+    python scripts/backfill_amazon_urls.py --batch-size 500
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.services.purchase_request_service import PurchaseRequestService
+
+def backfill_amazon_urls(batch_size=1000):
+    """Amazon URL を amazon_url 列へ移行"""
+    db = get_db_session()
+    
+    try:
+        migrated = PurchaseRequestService(db).backfill_amazon_urls(batch_size=batch_size)
+        print(f"移行件数: {migrated}件")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="購入申請の Amazon URL 移行")
+    parser.add_argument("--batch-size", type=int, default=1000, help="1回のコミットで移行する件数")
+    args = parser.parse_args()
+    backfill_amazon_urls(batch_size=args.batch_size)
@@ -0,0 +1,37 @@
+"""
+書籍・購入申請の重複検出用キー（isbn13 / title_key）を既存データに設定するスクリプト
+
+使い方:
+    python scripts/backfill_duplicate_keys.py
+    python scripts/backfill_duplicate_keys.py --batch-size 500
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.models.book import Book
+from src.models.purchase_request import PurchaseRequest
+from src.utils.book_keys import backfill_duplicate_keys
+
+def backfill(batch_size=1000):
+    """重複検出用キーを設定"""
+    db = get_db_session()
+    
+    try:
+        for label, model in (("書籍", Book), ("購入申請", PurchaseRequest)):
+            updated = backfill_duplicate_keys(db, model, batch_size=batch_size)
+            print(f"{label}: {updated}件")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重複検出用キーの作成")
+    parser.add_argument("--batch-size", type=int, default=1000, help="1回のコミットで更新する件数")
+    args = parser.parse_args()
+    backfill(batch_size=args.batch_size)
@@ -0,0 +1,38 @@
+"""
+読書統計ロールアップ（daily_user_reads / daily_book_reads / reading_leaderboards）を貸出履歴から再構築するスクリプト
+
+使い方:
+    python scripts/backfill_reading_stats.py               # 全期間を再構築
+    python scripts/backfill_reading_stats.py --since 2025-01-01
+"""
+import argparse
+import sys
+import os
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.services.reading_stats_service import ReadingStatsService
+
+def backfill_reading_stats():
+    """貸出履歴から読書統計ロールアップを再構築"""
+    parser = argparse.ArgumentParser(description="読書統計ロールアップの再構築")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="再構築開始日（YYYY-MM-DD）")
+    args = parser.parse_args()
+    
+    db = get_db_session()
+    
+    try:
+        result = ReadingStatsService(db).backfill(start_date=args.since)
+        print(f"ユーザー別ロールアップ: {result['user_rows']}行")
+        print(f"書籍別ロールアップ: {result['book_rows']}行")
+        print(f"期間別ランキング: {result['leaderboard_rows']}行")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_reading_stats()
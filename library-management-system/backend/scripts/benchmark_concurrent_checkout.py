@@ -0,0 +1,143 @@
+"""
+同時貸出ベンチマークスクリプト
+
+人気書籍への貸出集中を再現し、スループットと貸し越しが起きないことを確認する。
+貸出・統計カウンター等を実際に書き込むため、--database-url で指定したベンチマーク専用のDBでのみ実行する
+（設定中の DATABASE_URL と同じDBは拒否する）。テーブルがなければ作成し、作成したデータは削除しない。
+
+使い方:
+    python scripts/benchmark_concurrent_checkout.py --database-url postgresql://.../library_bench \
+        --copies 20 --attempts 200 --workers 16
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import src.models  # noqa: F401  全モデルをメタデータに登録
+from src.config.settings import Settings
+from src.models.base import Base
+from src.models.book import Book, BookStatus
+from src.models.loan import Loan
+from src.models.user import User
+from src.schemas.loan import LoanCreate
+from src.services.loan_service import LoanService
+from src.utils.auth import get_password_hash
+
+# main() でベンチマーク専用DBのセッションファクトリーを設定する
+SessionLocal = None
+
+
+def connect(database_url: str, workers: int) -> None:
+    """ベンチマーク専用DBに接続し、テーブルがなければ作成"""
+    global SessionLocal
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
+    engine = create_engine(database_url, pool_size=workers, pool_pre_ping=True)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def setup(copies: int, attempts: int) -> tuple:
+    """ベンチマーク用の書籍と利用者を作成"""
+    db = SessionLocal()
+    try:
+        run_id = uuid.uuid4().hex[:8]
+        book = Book(
+            title=f"benchmark-checkout-{run_id}",
+            author="benchmark",
+            status=BookStatus.AVAILABLE,
+            total_copies=copies,
+            available_copies=copies,
+        )
+        db.add(book)
+        hashed_password = get_password_hash("benchmark-password", profile="fast")
+        users = [
+            User(
+                username=f"bench_{run_id}_{i}",
+                email=f"bench_{run_id}_{i}@example.com",
+                hashed_password=hashed_password,
+                full_name=f"Benchmark {i}",
+            )
+            for i in range(attempts)
+        ]
+        db.add_all(users)
+        db.commit()
+        return book.id, [user.id for user in users]
+    finally:
+        db.close()
+
+
+def checkout(book_id: int, user_id: int) -> str:
+    """1件の貸出を実行して結果を返す"""
+    db = SessionLocal()
+    try:
+        LoanService(db).create_loan(LoanCreate(user_id=user_id, book_id=book_id))
+        return "success"
+    except ValueError:
+        return "rejected"
+    except Exception:
+        db.rollback()
+        return "error"
+    finally:
+        db.close()
+
+
+def verify(book_id: int) -> dict:
+    """貸出件数と在庫数を検証"""
+    db = SessionLocal()
+    try:
+        book = db.query(Book).filter(Book.id == book_id).one()
+        loans = db.query(Loan).filter(Loan.book_id == book_id).count()
+        return {
+            "loans": loans,
+            "available_copies": book.available_copies,
+            "oversold": loans > book.total_copies or book.available_copies < 0,
+            "consistent": loans + book.available_copies == book.total_copies,
+        }
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同時貸出のベンチマーク")
+    parser.add_argument("--database-url", required=True, help="ベンチマーク専用DBの接続URL（必須）")
+    parser.add_argument("--copies", type=int, default=20, help="書籍の所蔵数")
+    parser.add_argument("--attempts", type=int, default=200, help="貸出リクエスト数（利用者数）")
+    parser.add_argument("--workers", type=int, default=16, help="同時実行スレッド数")
+    args = parser.parse_args()
+
+    if args.database_url in (Settings().database_url, os.environ.get("DATABASE_URL")):
+        parser.error("--database-url には設定中の DATABASE_URL とは別のベンチマーク専用DBを指定してください")
+    connect(args.database_url, args.workers)
+
+    book_id, user_ids = setup(args.copies, args.attempts)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        outcomes = list(executor.map(lambda user_id: checkout(book_id, user_id), user_ids))
+    elapsed = time.perf_counter() - start
+
+    result = verify(book_id)
+
+    print(f"リクエスト数: {args.attempts} (同時実行 {args.workers})")
+    print(f"所要時間: {elapsed:.2f}秒 ({args.attempts / elapsed:.1f} req/s)")
+    print(f"成功: {outcomes.count('success')}, 在庫なし: {outcomes.count('rejected')}, エラー: {outcomes.count('error')}")
+    print(f"貸出件数: {result['loans']}, 残り在庫: {result['available_copies']}")
+    if result["oversold"] or not result["consistent"]:
+        print("NG: 貸出件数と在庫数が一致しません")
+        sys.exit(1)
+    if outcomes.count("error"):
+        print("注意: エラーになったリクエストがあります（DBのロック待ちタイムアウト等）")
+    print("OK: 貸し越しは発生していません")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+パスワードハッシュのコスト別ベンチマークスクリプト
+
+ログインサーバーのサイジング用に、設定ごとの hashes/s を計測する。
+
+使い方:
+    python scripts/benchmark_password_hashing.py --rounds 4 10 12 13 --iterations 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.auth import build_crypt_context
+
+
+def benchmark(scheme: str, rounds: int, iterations: int) -> dict:
+    """指定設定でハッシュ化・検証を繰り返して速度を計測"""
+    context = build_crypt_context(scheme=scheme, rounds=rounds)
+    password = "benchmark-password"
+
+    start = time.perf_counter()
+    hashed = None
+    for _ in range(iterations):
+        hashed = context.hash(password)
+    hash_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        context.verify(password, hashed)
+    verify_elapsed = time.perf_counter() - start
+
+    return {
+        "scheme": scheme,
+        "rounds": rounds,
+        "hashes_per_sec": iterations / hash_elapsed,
+        "verifies_per_sec": iterations / verify_elapsed,
+        "ms_per_hash": hash_elapsed / iterations * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パスワードハッシュのベンチマーク")
+    parser.add_argument("--scheme", default="bcrypt", help="ハッシュ方式（既定: bcrypt）")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[4, 10, 12, 13, 14], help="計測するコスト")
+    parser.add_argument("--iterations", type=int, default=10, help="各設定での試行回数")
+    args = parser.parse_args()
+
+    print(f"{'scheme':<10}{'rounds':>8}{'hashes/s':>12}{'verifies/s':>12}{'ms/hash':>10}")
+    for rounds in args.rounds:
+        result = benchmark(args.scheme, rounds, args.iterations)
+        print(
+            f"{result['scheme']:<10}{result['rounds']:>8}"
+            f"{result['hashes_per_sec']:>12.1f}{result['verifies_per_sec']:>12.1f}"
+            f"{result['ms_per_hash']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+クエリ実行計画チェックスクリプト
+
+src/utils/query_plans.py のサービスメソッドが発行する SQL について、設定中のDB（PostgreSQL 等）で
+EXPLAIN を取得し、想定したインデックスが使われていることを確認する。サービスメソッドのコミットは
+セーブポイントに留め、最後にロールバックするためデータは変更しない。SQLite での確認は
+tests/unit/test_query_plans.py が行う。マイグレーション適用後の確認に使う。
+
+使い方:
+    python scripts/check_query_plans.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.database.connection import engine
+from src.utils.query_plans import QUERY_PLAN_CASES, statement_plans
+
+
+def main():
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        if connection.dialect.name == "postgresql":
+            # 件数の少ない検証環境でもインデックスが選ばれる前提で計画を確認する
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+        failures = 0
+        for label, index_name, run in QUERY_PLAN_CASES:
+            plans = statement_plans(db, run)
+            if any(index_name in plan for _, plan in plans):
+                print(f"OK: {label} -> {index_name}")
+            else:
+                failures += 1
+                print(f"NG: {label} -> {index_name} が使われていません")
+                for statement, plan in plans:
+                    print("    " + statement.replace("\n", "\n    "))
+                    print("    " + plan.replace("\n", "\n    "))
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+購入予算集計（purchase_budget_rollups）を購入申請から再構築するスクリプト
+
+集計行を直接修正した場合や、加算の不具合で集計行と申請がずれた場合に実行する。
+
+使い方:
+    python scripts/rebuild_purchase_budget_rollups.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.services.purchase_budget_service import PurchaseBudgetService
+
+def rebuild_purchase_budget_rollups():
+    """購入予算集計を再構築"""
+    db = get_db_session()
+    
+    try:
+        rows = PurchaseBudgetService(db).rebuild()
+        print(f"集計行: {rows}行")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_purchase_budget_rollups()
@@ -0,0 +1,29 @@
+"""
+書籍の貸出数・予約待ち数カウンターを貸出・予約テーブルから再計算するスクリプト
+
+使い方:
+    python scripts/reconcile_book_counters.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import get_db_session
+from src.services.book_service import BookService
+
+def reconcile_book_counters():
+    """書籍カウンターを補正"""
+    db = get_db_session()
+    
+    try:
+        reconciled = BookService(db).reconcile_circulation_counts()
+        print(f"補正した書籍: {reconciled}件")
+        
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    reconcile_book_counters()
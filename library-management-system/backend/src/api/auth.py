@@ -12,12 +12,15 @@ from src.database.connection import get_db
 from src.models.user import User, UserRole
 from src.utils.auth import (
     verify_password, 
+    verify_and_update_password,
     get_password_hash, 
     create_access_token, 
     create_refresh_token,
     verify_refresh_token
 )
 from src.utils.dependencies import get_current_user
+from src.utils.principal_cache import invalidate_principal
+from src.utils.token_version import get_token_version
 from src.config.settings import Settings
 
 router = APIRouter()
@@ -82,24 +85,33 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     # パスワード検証
-    if not verify_password(user_credentials.password, user.hashed_password):
+    verified, upgraded_hash = verify_and_update_password(user_credentials.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="メールアドレスまたはパスワードが正しくありません",
         )
     
+    # 古いハッシュポリシーの場合は透過的に再ハッシュ
+    if upgraded_hash:
+        user.hashed_password = upgraded_hash
+        db.commit()
+        invalidate_principal(user.id)
+    
     # トークン生成
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     # roleの値を安全に取得
     role_value = user.role.value if hasattr(user.role, 'value') else str(user.role)
     
+    # ロールとトークンバージョンをクレームに含める（権限チェックをDB参照なしで行うため）
+    token_version = get_token_version(db, user.id)
     access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "role": role_value},
+        data={"sub": str(user.id), "email": user.email, "role": role_value, "tv": token_version},
         expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token(
-        data={"sub": str(user.id), "email": user.email}
+        data={"sub": str(user.id), "email": user.email, "tv": token_version}
     )
     
     # ユーザー情報を含めてレスポンス
@@ -136,21 +148,29 @@ async def login_oauth(
         )
     
     # パスワード検証
-    if not verify_password(form_data.password, user.hashed_password):
+    verified, upgraded_hash = verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="メールアドレスまたはパスワードが正しくありません",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # 古いハッシュポリシーの場合は透過的に再ハッシュ
+    if upgraded_hash:
+        user.hashed_password = upgraded_hash
+        db.commit()
+        invalidate_principal(user.id)
+    
     # トークン生成
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    token_version = get_token_version(db, user.id)
     access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "role": user.role.value},
+        data={"sub": str(user.id), "email": user.email, "role": user.role.value, "tv": token_version},
         expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token(
-        data={"sub": str(user.id), "email": user.email}
+        data={"sub": str(user.id), "email": user.email, "tv": token_version}
     )
     
     # ユーザー情報を含めてレスポンス
@@ -190,14 +210,28 @@ async def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db))
             detail="ユーザーが見つかりません",
         )
     
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="このアカウントは無効になっています。管理者にお問い合わせください",
+        )
+    
+    # ロール変更・無効化後のリフレッシュトークンは失効扱い
+    token_version = get_token_version(db, user.id)
+    if payload.get("tv") is not None and payload.get("tv") != token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なリフレッシュトークンです",
+        )
+    
     # 新しいトークンを生成
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "role": user.role.value},
+        data={"sub": str(user.id), "email": user.email, "role": user.role.value, "tv": token_version},
         expires_delta=access_token_expires
     )
     new_refresh_token = create_refresh_token(
-        data={"sub": str(user.id), "email": user.email}
+        data={"sub": str(user.id), "email": user.email, "tv": token_version}
     )
     
     return {
@@ -261,6 +295,7 @@ async def change_password(
     # パスワードを更新
     current_user.hashed_password = new_hashed_password
     db.commit()
+    invalidate_principal(current_user.id)
     
     return {"message": "パスワードを変更しました"}
 
@@ -290,6 +325,7 @@ async def reset_password(
     new_hashed_password = get_password_hash("password123")
     target_user.hashed_password = new_hashed_password
     db.commit()
+    invalidate_principal(target_user.id)
     
     return {
         "message": f"ユーザー「{target_user.full_name}」のパスワードを「password123」にリセットしました"
@@ -17,8 +17,8 @@ from src.schemas.book import (
 from src.utils.dependencies import get_current_user, require_admin, get_optional_current_user
 from src.models.database import User
 from src.services.loan_service import LoanService
+from src.services.stats_snapshot_service import StatsSnapshotService
 from src.schemas.loan import LoanCreate, LoanResponse, BorrowBookRequest
-from src.models.reservation import Reservation
 from src.config.categories import MAJOR_CATEGORIES, CATEGORY_STRUCTURE, get_minor_categories
 
 logger = logging.getLogger(__name__)
@@ -98,6 +98,8 @@ def get_books(
                 "is_available": book.is_available,
                 "total_copies": book.total_copies,
                 "available_copies": book.available_copies,
+                "active_loan_count": book.active_loan_count,
+                "pending_reservation_count": book.pending_reservation_count,
                 "image_url": book.image_url,
                 "created_at": book.created_at.isoformat() if book.created_at else None,
                 "updated_at": book.updated_at.isoformat() if book.updated_at else None
@@ -556,7 +558,7 @@ def get_book_reservation_count(
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_current_user)
 ):
-    """指定書籍の予約数を取得"""
+    """指定書籍の予約待ち数を取得（書籍一覧・詳細の pending_reservation_count と同じ値）"""
     try:
         # 書籍の存在確認
         book_service = BookService(db)
@@ -567,13 +569,7 @@ def get_book_reservation_count(
                 detail="書籍が見つかりません"
             )
         
-        # 実際の予約数を取得
-        reservation_count = db.query(Reservation).filter(
-            Reservation.book_id == book_id,
-            Reservation.status.in_(["active", "ready"])
-        ).count()
-        
-        return {"count": reservation_count}
+        return {"count": book.pending_reservation_count}
         
     except HTTPException:
         raise
@@ -653,64 +649,43 @@ def get_admin_books_detailed(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
-    """管理者向け：延滞情報を含む詳細な書籍一覧を取得"""
+    """管理者向け：延滞情報を含む詳細な書籍一覧を取得（延滞ステータスの更新は定期ジョブで行う）"""
     try:
-        # まず延滞中のローンを更新
         loan_service = LoanService(db)
-        updated_count = loan_service.update_overdue_loans()
-        if updated_count > 0:
-            logger.info(f"Updated {updated_count} loans to overdue status")
         
         skip = (page - 1) * per_page
         
-        # 延滞情報を含む書籍データを取得
+        # 延滞情報を含む書籍データを取得（絞り込み・ページングはSQL側で実施）
         books_with_status = loan_service.get_books_with_loan_status(
-            skip=skip, 
-            limit=per_page, 
-            include_overdue_info=True
+            skip=skip,
+            limit=per_page,
+            include_overdue_info=True,
+            status_filter=status_filter,
+            title=title,
+            author=author
         )
+        counts = loan_service.get_books_loan_status_counts(title=title, author=author)
+        total = {
+            "available": counts["available_count"],
+            "borrowed": counts["borrowed_count"],
+            "overdue": counts["overdue_count"]
+        }.get(status_filter, counts["total_books"])
         
-        # 検索フィルターを適用
-        filtered_books = []
-        for book in books_with_status:
-            # タイトル・著者検索
-            if title and title.lower() not in book["title"].lower():
-                continue
-            if author and author.lower() not in book["author"].lower():
-                continue
-            
-            # ステータスフィルター
-            if status_filter:
-                if status_filter == "available" and book["detailed_status"]["is_borrowed"]:
-                    continue
-                elif status_filter == "borrowed":
-                    # 貸出中: 通常の貸出中 + 延滞中（両方含む）
-                    if not book["detailed_status"]["is_borrowed"]:
-                        continue
-                elif status_filter == "overdue" and not book["detailed_status"]["is_overdue"]:
-                    continue
-            
-            filtered_books.append(book)
-        
-        # 統計情報も取得
-        stats = loan_service.get_loan_statistics()
+        # 統計情報は定期保存のスナップショットから取得
+        stats = StatsSnapshotService(db).get_latest("loans")
         
         return {
-            "books": filtered_books,
+            "books": books_with_status,
             "pagination": {
                 "page": page,
                 "per_page": per_page,
-                "total": len(filtered_books),  # 簡易実装
-                "pages": (len(filtered_books) + per_page - 1) // per_page
+                "total": total,
+                "pages": (total + per_page - 1) // per_page
             },
             "statistics": {
-                "total_books": len(books_with_status),
-                "overdue_count": len([b for b in filtered_books if b["detailed_status"]["is_overdue"]]),
-                "borrowed_count": len([b for b in filtered_books if b["detailed_status"]["is_borrowed"]]),
-                "available_count": len([b for b in filtered_books if not b["detailed_status"]["is_borrowed"]]),
+                **counts,
                 "loan_statistics": stats
-            },
-            "updated_overdue_loans": updated_count
+            }
         }
         
     except Exception as e:
@@ -729,9 +704,6 @@ def get_overdue_loans(
     try:
         loan_service = LoanService(db)
         
-        # 延滞中のローンを更新
-        updated_count = loan_service.update_overdue_loans()
-        
         skip = (page - 1) * per_page
         overdue_loans = loan_service.get_overdue_loans(skip=skip, limit=per_page)
         
@@ -742,8 +714,7 @@ def get_overdue_loans(
                 "per_page": per_page,
                 "total": len(overdue_loans),  # 簡易実装
                 "pages": (len(overdue_loans) + per_page - 1) // per_page
-            },
-            "updated_count": updated_count
+            }
         }
         
     except Exception as e:
@@ -760,44 +731,28 @@ def test_filters(
     try:
         from src.services.loan_service import LoanService
         
-        # 延滞中のローンを更新
         loan_service = LoanService(db)
-        loan_service.update_overdue_loans()
         
         # 延滞情報を含む書籍データを取得
         books_with_status = loan_service.get_books_with_loan_status(
-            skip=0, 
-            limit=100, 
-            include_overdue_info=True
+            skip=0,
+            limit=10,
+            include_overdue_info=True,
+            status_filter=status_filter
         )
         
         # フィルター適用前の統計
-        all_stats = {
-            "total_books": len(books_with_status),
-            "available_count": len([b for b in books_with_status if not b["detailed_status"]["is_borrowed"]]),
-            "borrowed_count": len([b for b in books_with_status if b["detailed_status"]["is_borrowed"]]),
-            "overdue_count": len([b for b in books_with_status if b["detailed_status"]["is_overdue"]])
-        }
-        
-        # ステータスフィルターを適用
-        filtered_books = []
-        for book in books_with_status:
-            if status_filter:
-                if status_filter == "available" and book["detailed_status"]["is_borrowed"]:
-                    continue
-                elif status_filter == "borrowed":
-                    # 貸出中: 通常の貸出中 + 延滞中（両方含む）
-                    if not book["detailed_status"]["is_borrowed"]:
-                        continue
-                elif status_filter == "overdue" and not book["detailed_status"]["is_overdue"]:
-                    continue
-            
-            filtered_books.append(book)
+        all_stats = loan_service.get_books_loan_status_counts()
+        filtered_count = {
+            "available": all_stats["available_count"],
+            "borrowed": all_stats["borrowed_count"],
+            "overdue": all_stats["overdue_count"]
+        }.get(status_filter, all_stats["total_books"])
         
         return {
             "status_filter": status_filter,
             "all_statistics": all_stats,
-            "filtered_count": len(filtered_books),
+            "filtered_count": filtered_count,
             "filtered_books": [
                 {
                     "title": book["title"][:30],
@@ -805,7 +760,7 @@ def test_filters(
                     "is_overdue": book["detailed_status"]["is_overdue"],
                     "days_overdue": book["detailed_status"].get("days_overdue", 0)
                 }
-                for book in filtered_books[:10]  # 最初の10冊だけ
+                for book in books_with_status
             ]
         }
         
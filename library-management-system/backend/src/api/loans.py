@@ -8,10 +8,13 @@ import math
 
 from src.models.base import get_db
 from src.services.loan_service import LoanService
+from src.services.stats_snapshot_service import StatsSnapshotService
 from src.schemas.loan import (
     LoanCreate, LoanUpdate, LoanReturn, LoanExtension, LoanMarkLost,
     LoanResponse, LoanListResponse, LoanStatistics,
-    LoanCreateResponse, LoanReturnResponse, LoanExtensionResponse
+    LoanCreateResponse, LoanReturnResponse, LoanExtensionResponse,
+    LoanEligibilityRequest, LoanEligibilityResponse,
+    LoanBulkCreate, LoanBulkReturn, LoanBulkResponse
 )
 from src.models.loan import LoanStatus
 from src.utils.dependencies import get_current_user, require_admin
@@ -152,6 +155,75 @@ def create_loan(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/loans/bulk", summary="一括貸出", response_model=LoanBulkResponse)
+def bulk_create_loans(
+    request: LoanBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """複数の書籍（IDまたはISBN）をまとめて貸出（図書館員・管理者のみ）"""
+    try:
+        loan_service = LoanService(db)
+        results = loan_service.bulk_checkout(
+            request.user_id, request.book_ids, request.isbns, request.loan_period
+        )
+        
+        return _bulk_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/loans/bulk-return", summary="一括返却", response_model=LoanBulkResponse)
+def bulk_return_loans(
+    request: LoanBulkReturn,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """複数の書籍（IDまたはISBN）をまとめて返却（図書館員・管理者のみ）"""
+    try:
+        loan_service = LoanService(db)
+        results = loan_service.bulk_return(request.book_ids, request.isbns, request.user_id)
+        
+        return _bulk_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _bulk_response(results: list) -> LoanBulkResponse:
+    """一括処理の結果を集計してレスポンスを作成"""
+    succeeded = sum(1 for result in results if result["success"])
+    return LoanBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
+@router.post("/loans/eligibility", summary="貸出可否の一括判定", response_model=LoanEligibilityResponse)
+def check_loan_eligibility(
+    request: LoanEligibilityRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """複数の (ユーザー, 書籍) の組について貸出可否を1回で判定
+
+    一般ユーザーは自分のユーザーIDのみ判定できる。
+    """
+    if (any(item.user_id != current_user.id for item in request.items) and
+        current_user.role.value not in ["admin", "librarian"]):
+        raise HTTPException(status_code=403, detail="他のユーザーの貸出可否は確認できません")
+    
+    try:
+        loan_service = LoanService(db)
+        results = loan_service.check_eligibility(
+            [(item.user_id, item.book_id) for item in request.items]
+        )
+        
+        return LoanEligibilityResponse(results=results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/loans/{loan_id}/return", summary="書籍返却", response_model=LoanReturnResponse)
 def return_book(
     loan_id: int,
@@ -260,13 +332,16 @@ def get_overdue_loans(
 
 @router.get("/loans/statistics", summary="貸出統計取得", response_model=LoanStatistics)
 def get_loan_statistics(
+    fresh: bool = Query(False, description="スナップショットを使わずに再集計する"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
-    """貸出統計情報を取得（図書館員・管理者のみ）"""
+    """貸出統計情報を取得（図書館員・管理者のみ）
+
+    定期保存された最新スナップショットとその経過秒数を返す。
+    """
     try:
-        loan_service = LoanService(db)
-        stats = loan_service.get_loan_statistics()
+        stats = StatsSnapshotService(db).get_latest("loans", fresh=fresh)
         
         return LoanStatistics(**stats)
     except Exception as e:
@@ -0,0 +1,24 @@
+"""
+メトリクス関連API
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+from src.models.user import User
+from src.utils.cache import get_all_cache_stats
+from src.utils.dependencies import require_admin
+
+router = APIRouter()
+
+
+@router.get("/metrics", summary="Prometheusメトリクス")
+def get_metrics():
+    """Prometheus形式のメトリクスを返す"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/metrics/cache", summary="キャッシュ統計取得")
+def get_cache_metrics(current_user: User = Depends(require_admin)):
+    """インプロセスキャッシュのヒット率などを取得（管理者のみ）"""
+    return {"caches": get_all_cache_stats()}
@@ -4,20 +4,24 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, Body
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import date
 import math
 
 from src.models.base import get_db
 from src.services.purchase_request_service import PurchaseRequestService
+from src.services.purchase_budget_service import PurchaseBudgetService
+from src.services.stats_snapshot_service import StatsSnapshotService
 from src.schemas.purchase_request import (
     PurchaseRequestCreate, PurchaseRequestUpdate, PurchaseRequestApproval,
     PurchaseRequestRejection, PurchaseRequestStatusUpdate, AmazonBookInfoRequest,
     PurchaseRequestResponse, PurchaseRequestListResponse, PurchaseRequestStatistics,
     AmazonBookInfoResponse, PurchaseRequestCreateResponse, PurchaseRequestUpdateResponse,
-    PurchaseRequestApprovalResponse, PurchaseRequestRejectionResponse, PurchaseRequestStatusResponse
+    PurchaseRequestApprovalResponse, PurchaseRequestRejectionResponse, PurchaseRequestStatusResponse,
+    PurchaseRequestDuplicateCheck, PurchaseRequestDuplicateCheckResponse, PurchaseBudgetRollupResponse
 )
 from src.models.purchase_request import PurchaseRequestStatus
 from src.utils.dependencies import get_current_user, require_admin, require_approver_or_admin
-from src.models.user import User
+from src.models.user import User, UserRole
 
 router = APIRouter()
 
@@ -56,19 +60,47 @@ def get_pending_purchase_requests(
 
 @router.get("/statistics", summary="購入申請統計取得", response_model=PurchaseRequestStatistics)
 def get_purchase_request_statistics(
+    fresh: bool = Query(False, description="スナップショットを使わずに再集計する（管理者のみ）"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_approver_or_admin)
 ):
-    """購入申請統計情報を取得（図書館員・管理者のみ）"""
+    """購入申請統計情報を取得（図書館員・管理者のみ）
+
+    定期保存された最新スナップショットとその経過秒数を返す。
+    """
+    if fresh and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="統計の再集計には管理者権限が必要です")
+    
     try:
-        service = PurchaseRequestService(db)
-        stats = service.get_purchase_request_statistics()
+        stats = StatsSnapshotService(db).get_latest("purchase_requests", fresh=fresh)
         
         return PurchaseRequestStatistics(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/budget", summary="購入予算集計取得", response_model=PurchaseBudgetRollupResponse)
+def get_purchase_budget(
+    from_month: Optional[date] = Query(None, description="開始月（月内の任意の日付）"),
+    to_month: Optional[date] = Query(None, description="終了月（月内の任意の日付）"),
+    department: Optional[str] = Query(None, description="部署"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_approver_or_admin)
+):
+    """月・部署・ステータス別の購入予算集計を取得（図書館員・管理者のみ）
+
+    申請のステータス遷移時に更新される集計行を返すため、申請テーブルは集計しない。
+    """
+    try:
+        result = PurchaseBudgetService(db).get_rollup(from_month, to_month, department)
+        
+        return PurchaseBudgetRollupResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/user/{user_id}", summary="ユーザーの購入申請一覧取得")
 def get_user_purchase_requests(
     user_id: int,
@@ -119,8 +151,12 @@ def get_purchase_requests(
             pending_only=pending_only
         )
         
-        # 総件数を取得（簡易実装）
-        total = len(service.get_purchase_requests(skip=0, limit=1000))
+        total = service.count_purchase_requests(
+            status=status,
+            user_id=user_id,
+            priority=priority,
+            pending_only=pending_only
+        )
         pages = math.ceil(total / per_page)
         
         return PurchaseRequestListResponse(
@@ -191,6 +227,22 @@ def create_purchase_request(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/check-duplicates", summary="購入申請の重複チェック", response_model=PurchaseRequestDuplicateCheckResponse)
+def check_purchase_request_duplicates(
+    check_data: PurchaseRequestDuplicateCheck,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """複数の書籍について、所蔵済みの書籍・進行中の購入申請との重複をまとめて判定"""
+    try:
+        service = PurchaseRequestService(db)
+        results = service.find_duplicates(check_data.items)
+        
+        return PurchaseRequestDuplicateCheckResponse(results=results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.put("/{request_id}", summary="購入申請更新", response_model=PurchaseRequestUpdateResponse)
 def update_purchase_request(
     request_id: int,
@@ -8,6 +8,7 @@ import math
 
 from src.models.base import get_db
 from src.services.reservation_service import ReservationService
+from src.services.stats_snapshot_service import StatsSnapshotService
 from src.schemas.reservation import (
     ReservationCreate, ReservationUpdate, ReservationCancel,
     ReservationResponse, ReservationListResponse, ReservationQueueResponse,
@@ -156,9 +157,8 @@ def create_reservation(
         reservation_service = ReservationService(db)
         reservation = reservation_service.create_reservation(reservation_data)
         
-        # 予約順位を取得
-        queue = reservation_service.get_book_reservation_queue(reservation_data.book_id)
-        queue_position = next((i + 1 for i, r in enumerate(queue) if r.id == reservation.id), None)
+        # 予約順位（待機中のみ）
+        queue_position = reservation.priority if reservation.status == ReservationStatus.PENDING else None
         
         return ReservationCreateResponse(
             message="予約が正常に作成されました",
@@ -235,14 +235,17 @@ def process_expired_reservations(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
-    """期限切れ予約を処理（図書館員・管理者のみ）"""
+    """期限切れ予約を処理（図書館員・管理者のみ）
+
+    通常は定期ジョブで処理されるため、即時に処理したい場合の手動実行用。
+    """
     try:
         reservation_service = ReservationService(db)
-        expired_reservations = reservation_service.expire_reservations()
+        result = reservation_service.expire_reservations()
         
         return ReservationProcessResponse(
-            message=f"{len(expired_reservations)}件の期限切れ予約を処理しました",
-            processed_reservations=expired_reservations
+            message=f"{len(result['expired'])}件の期限切れ予約を処理しました",
+            processed_reservations=reservation_service.get_reservations_by_ids(result["expired"])
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -250,13 +253,16 @@ def process_expired_reservations(
 
 @router.get("/reservations/statistics", summary="予約統計取得", response_model=ReservationStatistics)
 def get_reservation_statistics(
+    fresh: bool = Query(False, description="スナップショットを使わずに再集計する"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
-    """予約統計情報を取得（図書館員・管理者のみ）"""
+    """予約統計情報を取得（図書館員・管理者のみ）
+
+    定期保存された最新スナップショットとその経過秒数を返す。
+    """
     try:
-        reservation_service = ReservationService(db)
-        stats = reservation_service.get_reservation_statistics()
+        stats = StatsSnapshotService(db).get_latest("reservations", fresh=fresh)
         
         return ReservationStatistics(**stats)
     except Exception as e:
@@ -2,60 +2,39 @@
 統計関連API
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, extract, case
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import pytz
 
 from ..database import get_db
 from ..models.book import Book
-from ..models.loan import Loan, LoanStatus
-from ..models.purchase_request import PurchaseRequest, PurchaseRequestStatus
-from ..models.reservation import Reservation, ReservationStatus
+from ..models.loan import Loan, OPEN_LOAN_STATUSES
 from ..models.user import User
-from ..utils.dependencies import get_current_user
+from ..models.activity_counter import ActivityMetric
+from ..utils.dependencies import get_current_user, require_admin
+from ..services.stats_service import StatsService
+from ..services.reading_stats_service import ReadingStatsService, month_period, year_period
+from ..services.timeseries_service import TimeSeriesService
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 
+class UserStatsBatchRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=500, description="ユーザーIDのリスト")
+
+
 @router.get("/dashboard", summary="ダッシュボード統計取得")
 async def get_dashboard_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(require_admin)
 ):
-    """ダッシュボード用の統計情報を取得"""
-    
-    # 管理者権限チェック
-    role_value = current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
-    if role_value != "admin":
-        raise HTTPException(status_code=403, detail="管理者権限が必要です")
-    
-    # 基本統計
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    total_loans = db.query(func.count(Loan.id)).scalar() or 0
-    active_loans = db.query(func.count(Loan.id)).filter(Loan.status == "ACTIVE").scalar() or 0
-    total_reservations = db.query(func.count(Reservation.id)).scalar() or 0
-    pending_requests = db.query(func.count(PurchaseRequest.id)).filter(
-        PurchaseRequest.status == "PENDING"
-    ).scalar() or 0
+    """ダッシュボード用の統計情報を取得（管理者のみ）"""
     
-    return {
-        "users": {
-            "total": total_users,
-            "active": total_users  # 一時的に全ユーザーをアクティブとして扱う
-        },
-        "loans": {
-            "total": total_loans,
-            "active": active_loans
-        },
-        "reservations": {
-            "total": total_reservations
-        },
-        "purchase_requests": {
-            "pending": pending_requests
-        }
-    }
+    # 基本統計（1往復の集計クエリ、短時間キャッシュ）
+    return StatsService(db).get_dashboard_stats()
 
 
 @router.get("/user/{user_id}", summary="ユーザー固有統計取得")
@@ -71,59 +50,26 @@ async def get_user_stats(
     if role_value != "admin":
         raise HTTPException(status_code=403, detail="管理者権限が必要です")
     
-    # ユーザー存在確認
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # ユーザー存在確認と統計取得（テーブルごとに1クエリ）
+    stats = StatsService(db).get_users_stats([user_id])
+    if user_id not in stats:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
     
-    # 貸出統計
-    total_loans = db.query(func.count(Loan.id)).filter(Loan.user_id == user_id).scalar() or 0
-    active_loans = db.query(func.count(Loan.id)).filter(
-        and_(Loan.user_id == user_id, Loan.status == "ACTIVE")
-    ).scalar() or 0
-    overdue_loans = db.query(func.count(Loan.id)).filter(
-        and_(
-            Loan.user_id == user_id, 
-            Loan.status == "ACTIVE",
-            Loan.due_date < datetime.now().date()
-        )
-    ).scalar() or 0
-    
-    # 予約統計
-    total_reservations = db.query(func.count(Reservation.id)).filter(
-        Reservation.user_id == user_id
-    ).scalar() or 0
-    active_reservations = db.query(func.count(Reservation.id)).filter(
-        and_(Reservation.user_id == user_id, Reservation.status == "PENDING")
-    ).scalar() or 0
-    
-    # 購入申請統計
-    total_requests = db.query(func.count(PurchaseRequest.id)).filter(
-        PurchaseRequest.user_id == user_id
-    ).scalar() or 0
-    pending_requests = db.query(func.count(PurchaseRequest.id)).filter(
-        and_(PurchaseRequest.user_id == user_id, PurchaseRequest.status == "PENDING")
-    ).scalar() or 0
-    approved_requests = db.query(func.count(PurchaseRequest.id)).filter(
-        and_(PurchaseRequest.user_id == user_id, PurchaseRequest.status == "APPROVED")
-    ).scalar() or 0
+    return stats[user_id]
+
+
+@router.post("/users", summary="複数ユーザーの統計一括取得")
+async def get_users_stats(
+    request: UserStatsBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """指定した複数ユーザーの貸出・予約・購入申請統計をまとめて取得（管理者のみ）"""
+    stats = StatsService(db).get_users_stats(request.user_ids)
     
     return {
-        "user_id": user_id,
-        "loans": {
-            "total": total_loans,
-            "active": active_loans,
-            "overdue": overdue_loans
-        },
-        "reservations": {
-            "total": total_reservations,
-            "active": active_reservations
-        },
-        "purchase_requests": {
-            "total": total_requests,
-            "pending": pending_requests,
-            "approved": approved_requests
-        }
+        "users": [stats[user_id] for user_id in dict.fromkeys(request.user_ids) if user_id in stats],
+        "not_found": [user_id for user_id in dict.fromkeys(request.user_ids) if user_id not in stats]
     }
 
 
@@ -131,10 +77,18 @@ async def get_user_stats(
 async def get_reading_stats(
     period_type: str = Query(..., description="期間タイプ ('month' または 'year')"),
     period_value: str = Query(..., description="期間値 (例: '2025-07' または '2025')"),
+    limit: int = Query(50, ge=1, le=500, description="ランキングの取得件数（上位K件）"),
+    user_cursor: Optional[str] = Query(None, description="ユーザー別ランキングの続きを取得するカーソル"),
+    book_cursor: Optional[str] = Query(None, description="書籍別ランキングの続きを取得するカーソル"),
+    department: Optional[str] = Query(None, description="ユーザー別ランキングを部署で絞り込み"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """期間別読書統計（ユーザー別・書籍別ランキング）を取得"""
+    """期間別読書統計（ユーザー別・書籍別ランキング）を取得
+
+    ランキングは期間別の集計テーブルから上位 limit 件だけを読み、
+    続きは user_next_cursor / book_next_cursor を渡して取得する。
+    """
     
     # 管理者権限チェック
     role_value = current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
@@ -146,87 +100,25 @@ async def get_reading_stats(
         if period_type == "month":
             # 月別統計 (例: "2025-07")
             year, month = map(int, period_value.split('-'))
-            start_date = datetime(year, month, 1).date()
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1).date()
-            else:
-                end_date = datetime(year, month + 1, 1).date()
+            period = month_period(datetime(year, month, 1).date())
         elif period_type == "year":
             # 年別統計 (例: "2025")
             year = int(period_value)
-            start_date = datetime(year, 1, 1).date()
-            end_date = datetime(year + 1, 1, 1).date()
+            period = year_period(datetime(year, 1, 1).date())
         else:
             raise HTTPException(status_code=400, detail="無効な期間タイプです")
         
-        # ユーザー別読書統計（返却完了分のみ）
-        user_stats_query = db.query(
-            User.id.label('user_id'),
-            User.username.label('user_name'),
-            User.full_name.label('full_name'),
-            User.department.label('department'),
-            func.count(Loan.id).label('completed_reads')
-        ).join(
-            Loan, User.id == Loan.user_id
-        ).filter(
-            and_(
-                Loan.return_date.isnot(None),  # 返却済みのみ
-                Loan.return_date >= start_date,
-                Loan.return_date < end_date
+        # ユーザー別・書籍別読書統計（返却完了分のみ、期間別ランキングから上位K件）
+        reading_stats_service = ReadingStatsService(db)
+        try:
+            user_stats, user_next_cursor = reading_stats_service.get_user_leaderboard(
+                period, limit, cursor=user_cursor, department=department
             )
-        ).group_by(
-            User.id, User.username, User.full_name, User.department
-        ).order_by(
-            func.count(Loan.id).desc()
-        )
-        
-        user_stats = user_stats_query.all()
-        
-        # 各ユーザーの現在の貸出中の本数を取得
-        active_loans_per_user = {}
-        active_loans_query = db.query(
-            Loan.user_id,
-            func.count(Loan.id).label('active_count')
-        ).filter(
-            Loan.status == LoanStatus.ACTIVE
-        ).group_by(Loan.user_id)
-        
-        for result in active_loans_query.all():
-            active_loans_per_user[result.user_id] = result.active_count
-        
-        # 書籍別読書統計（返却完了分のみ）
-        book_stats_query = db.query(
-            Book.id.label('book_id'),
-            Book.title.label('title'),
-            Book.author.label('author'),
-            func.count(Loan.id).label('completed_reads')
-        ).join(
-            Loan, Book.id == Loan.book_id
-        ).filter(
-            and_(
-                Loan.return_date.isnot(None),  # 返却済みのみ
-                Loan.return_date >= start_date,
-                Loan.return_date < end_date
+            book_stats, book_next_cursor = reading_stats_service.get_book_leaderboard(
+                period, limit, cursor=book_cursor
             )
-        ).group_by(
-            Book.id, Book.title, Book.author
-        ).order_by(
-            func.count(Loan.id).desc()
-        )
-        
-        book_stats = book_stats_query.all()
-        
-        # 各書籍の現在の貸出中の数を取得
-        current_loans_per_book = {}
-        current_loans_query = db.query(
-            Loan.book_id,
-            func.count(Loan.id).label('current_count')
-        ).filter(
-            Loan.status == LoanStatus.ACTIVE
-        ).group_by(Loan.book_id)
-        
-        for result in current_loans_query.all():
-            current_loans_per_book[result.book_id] = result.current_count
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # 延滞中の貸出データ
         overdue_loans_query = db.query(
@@ -246,7 +138,7 @@ async def get_reading_stats(
             Book, Loan.book_id == Book.id
         ).filter(
             and_(
-                Loan.status == LoanStatus.ACTIVE,
+                Loan.status.in_(OPEN_LOAN_STATUSES),
                 Loan.due_date < datetime.now().date()
             )
         )
@@ -254,27 +146,10 @@ async def get_reading_stats(
         overdue_loans = overdue_loans_query.all()
         
         return {
-            "user_stats": [
-                {
-                    "user_id": stat.user_id,
-                    "user_name": stat.user_name,
-                    "full_name": stat.full_name,
-                    "department": stat.department or "不明",
-                    "completed_reads": int(stat.completed_reads),
-                    "active_loans": active_loans_per_user.get(stat.user_id, 0)
-                }
-                for stat in user_stats
-            ],
-            "book_stats": [
-                {
-                    "book_id": stat.book_id,
-                    "title": stat.title,
-                    "author": stat.author,
-                    "completed_reads": int(stat.completed_reads),
-                    "current_loans": current_loans_per_book.get(stat.book_id, 0)
-                }
-                for stat in book_stats
-            ],
+            "user_stats": user_stats,
+            "book_stats": book_stats,
+            "user_next_cursor": user_next_cursor,
+            "book_next_cursor": book_next_cursor,
             "overdue_loans": [
                 {
                     "id": loan.id,
@@ -292,12 +167,44 @@ async def get_reading_stats(
             ]
         }
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"無効な期間値です: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"統計取得エラー: {str(e)}")
 
 
+@router.get("/timeseries", summary="アクティビティ時系列取得")
+async def get_timeseries(
+    metric: ActivityMetric = Query(..., description="イベント種別 (例: 'loans_created')"),
+    bucket: str = Query("day", pattern="^(day|week|month)$", description="集計単位 ('day' / 'week' / 'month')"),
+    from_date: Optional[date] = Query(None, alias="from", description="開始日 (YYYY-MM-DD、省略時は終了日の29日前)"),
+    to_date: Optional[date] = Query(None, alias="to", description="終了日 (YYYY-MM-DD、省略時は今日)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """貸出・予約イベント件数の時系列を取得（管理者のみ）
+
+    日別カウンターを (metric, day) の範囲で1回読み取り、週・月単位に集計する。
+    """
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=29)
+    
+    try:
+        series = TimeSeriesService(db).get_series(metric, bucket, from_date, to_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "metric": metric.value,
+        "bucket": bucket,
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "series": series
+    }
+
+
 @router.get("/debug/book-status", summary="書籍ステータスデバッグ")
 def get_debug_book_status(db: Session = Depends(get_db)):
     """書籍ステータスのデバッグ情報を取得"""
@@ -5,17 +5,16 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
 
 from ..database import get_db
 from ..models.user import User, UserRole
 from ..utils.dependencies import get_current_user
+from ..utils.auth import get_password_hash
+from ..utils.principal_cache import invalidate_principal
+from ..utils.token_version import bump_token_version, invalidate_token_version
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-# パスワードハッシュ化用
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class UserResponse(BaseModel):
     id: int
     username: str
@@ -87,7 +86,7 @@ async def create_user(
         )
     
     # パスワードをハッシュ化
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = get_password_hash(user_data.password)
     
     # ロールをEnumに変換
     try:
@@ -182,6 +181,8 @@ async def update_user(
     
     # 更新データを適用
     update_data = user_update.model_dump(exclude_unset=True)
+    previous_role = user.role
+    previous_is_active = user.is_active
     
     for field, value in update_data.items():
         if field == "role" and value:
@@ -200,7 +201,13 @@ async def update_user(
         else:
             setattr(user, field, value)
     
+    # ロール変更・無効化時は発行済みトークンを失効させる
+    if user.role != previous_role or user.is_active != previous_is_active:
+        bump_token_version(db, user_id)
+    
     db.commit()
+    invalidate_principal(user_id)
+    invalidate_token_version(user_id)
     db.refresh(user)
     
     return user
@@ -227,10 +234,10 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
     
     # 関連データの確認（貸出中の書籍がある場合は削除不可）
-    from ..models.loan import Loan
+    from ..models.loan import Loan, OPEN_LOAN_STATUSES
     active_loans = db.query(Loan).filter(
         Loan.user_id == user_id,
-        Loan.status == "ACTIVE"
+        Loan.status.in_(OPEN_LOAN_STATUSES)
     ).count()
     
     if active_loans > 0:
@@ -241,6 +248,9 @@ async def delete_user(
     
     # ユーザー削除
     db.delete(user)
+    bump_token_version(db, user_id)
     db.commit()
+    invalidate_principal(user_id)
+    invalidate_token_version(user_id)
     
     return {"message": f"ユーザー '{user.full_name}' を削除しました"} 
\ No newline at end of file
@@ -31,6 +31,55 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
     
+    # 認証ユーザーキャッシュ設定
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 10
+    
+    # パスワードハッシュ設定
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_PROFILE: str = "default"  # default / fast（テスト・一括投入用）
+    PASSWORD_HASH_FAST_ROUNDS: int = 4
+    
+    # 統計設定
+    STATS_CACHE_TTL_SECONDS: int = 30
+    TIMESERIES_MAX_DAYS: int = 1100
+    ACTIVITY_COUNTER_SHARDS: int = 16  # 日別カウンターの加算を分散する行数
+    STATS_SNAPSHOT_INTERVAL_SECONDS: int = 300
+    STATS_SNAPSHOT_RETENTION_DAYS: int = 7
+    
+    # 定期ジョブ設定
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 600
+    RESERVATION_EXPIRY_INTERVAL_SECONDS: int = 3600
+    LOAN_ARCHIVE_INTERVAL_SECONDS: int = 86400
+    LOAN_ARCHIVE_AFTER_DAYS: int = 365  # 返却・紛失からアーカイブまでの日数
+    LOAN_ARCHIVE_BATCH_SIZE: int = 1000
+    NOTIFICATION_DISPATCH_INTERVAL_SECONDS: int = 30
+    DUE_SOON_REMINDER_INTERVAL_SECONDS: int = 86400
+    AUTO_RENEW_ENABLED: bool = False  # 返却期限前の自動延長（有効時のみジョブを登録）
+    AUTO_RENEW_INTERVAL_SECONDS: int = 86400
+    AUTO_RENEW_DUE_WITHIN_DAYS: int = 2  # 返却期限の何日前から自動延長するか（延長日数より短くする）
+    AUTO_RENEW_EXTENSION_DAYS: int = 7
+    
+    # 通知設定
+    NOTIFICATION_SINK: str = "log"  # log / smtp / webhook
+    NOTIFICATION_WEBHOOK_URL: Optional[str] = None
+    NOTIFICATION_SENDER: str = "library@example.com"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    NOTIFICATION_BATCH_SIZE: int = 100
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_RETRY_BASE_SECONDS: int = 60  # 再試行間隔（試行ごとに倍増）
+    DUE_SOON_REMINDER_DAYS: int = 3  # 返却期限の何日前から通知するか
+    NOTIFICATION_RETENTION_DAYS: int = 30
+    
+    # 貸出可能予定日（予約待ち）設定
+    AVAILABILITY_ETA_MIN_SAMPLES: int = 5  # 書籍単位の中央値に必要な返却件数（未満はカテゴリで算出）
+    AVAILABILITY_ETA_SAMPLE_SIZE: int = 200  # 中央値の算出に使う直近の返却件数
+    AVAILABILITY_ETA_DEFAULT_DAYS: int = 14  # 返却履歴が足りない場合の貸出日数
+    AVAILABILITY_REFRESH_INTERVAL_SECONDS: int = 86400  # 前日以前の見込みを再計算する間隔
+    
     # CORS設定
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
@@ -5,6 +5,14 @@ from .book import Book
 from .loan import Loan
 from .reservation import Reservation
 from .purchase_request import PurchaseRequest
+from .user_token_version import UserTokenVersion
+from .reading_stats import DailyUserReads, DailyBookReads, ReadingLeaderboard
+from .activity_counter import ActivityCounter, ActivityMetric
+from .stats_snapshot import StatsSnapshot
+from .loan_archive import LoanArchive
+from .notification_outbox import NotificationOutbox
+from .availability_estimate import BookAvailabilityEstimate
+from .purchase_budget_rollup import PurchaseBudgetRollup
 
 __all__ = [
     "BaseModel",
@@ -13,5 +21,16 @@ __all__ = [
     "Book",
     "Loan",
     "Reservation",
-    "PurchaseRequest"
+    "PurchaseRequest",
+    "UserTokenVersion",
+    "DailyUserReads",
+    "DailyBookReads",
+    "ReadingLeaderboard",
+    "ActivityCounter",
+    "ActivityMetric",
+    "StatsSnapshot",
+    "LoanArchive",
+    "NotificationOutbox",
+    "BookAvailabilityEstimate",
+    "PurchaseBudgetRollup"
 ] 
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+日別アクティビティカウンターモデル
+"""
+from sqlalchemy import Column, Integer, Date, String
+import enum
+from .base import Base
+
+
+class ActivityMetric(str, enum.Enum):
+    """時系列で集計するイベント種別"""
+    LOANS_CREATED = "loans_created"
+    LOANS_RETURNED = "loans_returned"
+    LOANS_OVERDUE = "loans_overdue"
+    LOANS_LOST = "loans_lost"
+    LOANS_RENEWED = "loans_renewed"
+    RESERVATIONS_CREATED = "reservations_created"
+    RESERVATIONS_READY = "reservations_ready"
+    RESERVATIONS_CANCELLED = "reservations_cancelled"
+    RESERVATIONS_COMPLETED = "reservations_completed"
+    RESERVATIONS_EXPIRED = "reservations_expired"
+
+
+class ActivityCounter(Base):
+    """イベント種別・日別の発生件数
+
+    同じ (metric, day) の加算が貸出・返却等のトランザクション間で1行のロックを奪い合わないよう、
+    ACTIVITY_COUNTER_SHARDS 個の shard 行に分散して加算し、読み取り時に合計する。
+    主キー (metric, day, shard) の順で索引されるため、期間指定の時系列は1回の範囲読み取りで取得できる。
+    """
+    __tablename__ = "activity_counters"
+
+    metric = Column(String(40), primary_key=True)
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<ActivityCounter(metric={self.metric}, day={self.day}, shard={self.shard}, count={self.count})>"
@@ -0,0 +1,40 @@
+"""
+予約待ちの貸出可能予定日（事前計算）モデル
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from .base import Base
+
+
+class EstimateBasis:
+    """貸出日数の中央値の算出元"""
+    BOOK = "book"  # 書籍自身の返却履歴
+    CATEGORY = "category"  # 同じ大項目カテゴリの返却履歴
+    DEFAULT = "default"  # 履歴が足りない場合の既定値
+
+
+class BookAvailabilityEstimate(Base):
+    """予約待ちのある書籍の貸出可能予定日の材料
+
+    slot_dates は各冊が次に空く見込み日（昇順）。待ち順 k の予定日は、
+    k 番目に空く冊を前の予約者が中央値の日数だけ借りる前提で eta_for_position が求める。
+    返却時に書籍単位で再計算し、予約の増減では再計算しない（順位から算出するため）。
+    """
+    __tablename__ = "book_availability_estimates"
+
+    book_id = Column(Integer, ForeignKey("books.id"), primary_key=True)
+    median_loan_days = Column(Integer, nullable=False)
+    sample_size = Column(Integer, default=0, nullable=False)  # 中央値の算出に使った返却件数
+    basis = Column(String(20), nullable=False)  # book / category / default
+    slot_dates = Column(JSON, nullable=False)  # ISO形式の日付のリスト（冊数分）
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def eta_for_position(self, position: int) -> date:
+        """待ち順（1から）の貸出可能予定日（過去日は今日に切り上げ）"""
+        slots = [date.fromisoformat(value) for value in self.slot_dates] or [date.today()]
+        rounds, index = divmod(position - 1, len(slots))
+        eta = slots[index] + timedelta(days=self.median_loan_days * rounds)
+        return max(eta, date.today())
+
+    def __repr__(self):
+        return f"<BookAvailabilityEstimate(book_id={self.book_id}, median_loan_days={self.median_loan_days}, basis={self.basis})>"
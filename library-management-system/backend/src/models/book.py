@@ -1,12 +1,13 @@
 """
 書籍モデル
 """
-from sqlalchemy import Column, String, Text, Integer, Boolean, Enum, Date, Numeric, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Integer, Boolean, Enum, Date, Numeric, JSON, Index
+from sqlalchemy.orm import relationship, validates
 import enum
 import json
 from typing import List, Optional
 from .base import BaseModel
+from src.utils.book_keys import normalize_isbn13, title_author_key
 
 
 class BookStatus(enum.Enum):
@@ -39,11 +40,31 @@ class Book(BaseModel):
     available_copies = Column(Integer, default=1, nullable=False)
     image_url = Column(String(500))
     price = Column(Numeric(10, 2))  # 価格（10桁、小数点以下2桁）
+    # 貸出・予約の件数（貸出・予約の状態変更と同一トランザクションで増減）
+    active_loan_count = Column(Integer, default=0, nullable=False)  # 未返却の貸出数
+    pending_reservation_count = Column(Integer, default=0, nullable=False)  # 待機中の予約数
+    # 重複検出用の正規化キー（title / author / isbn の設定時に更新）
+    isbn13 = Column(String(13))
+    title_key = Column(String(500))
     
     # リレーション
     loans = relationship("Loan", back_populates="book")
     reservations = relationship("Reservation", back_populates="book")
     
+    __table_args__ = (
+        Index("ix_books_created_at", "created_at"),
+        Index("ix_books_isbn13", "isbn13"),
+        Index("ix_books_title_key", "title_key"),
+    )
+    
+    @validates("title", "author", "isbn")
+    def _update_duplicate_keys(self, key, value):
+        """タイトル・著者・ISBN の変更に合わせて重複検出用キーを更新"""
+        values = {"title": self.title, "author": self.author, "isbn": self.isbn, key: value}
+        self.isbn13 = normalize_isbn13(values["isbn"])
+        self.title_key = title_author_key(values["title"], values["author"])
+        return value
+    
     def __repr__(self):
         return f"<Book(id={self.id}, title='{self.title}', author='{self.author}')>"
     
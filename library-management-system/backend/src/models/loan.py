@@ -1,7 +1,7 @@
 """
 貸出モデル
 """
-from sqlalchemy import Column, Integer, ForeignKey, Date, Boolean, Enum, String
+from sqlalchemy import Column, Integer, ForeignKey, Date, Boolean, Enum, String, Index, text
 from sqlalchemy.orm import relationship
 import enum
 from .base import BaseModel
@@ -15,6 +15,10 @@ class LoanStatus(enum.Enum):
     LOST = "lost"
 
 
+# 未返却（貸出中）として扱うステータス。延滞スイープ後は OVERDUE になる
+OPEN_LOAN_STATUSES = (LoanStatus.ACTIVE, LoanStatus.OVERDUE)
+
+
 class Loan(BaseModel):
     """貸出モデル"""
     __tablename__ = "loans"
@@ -32,6 +36,19 @@ class Loan(BaseModel):
     user = relationship("User", back_populates="loans")
     book = relationship("Book", back_populates="loans")
     
+    __table_args__ = (
+        Index("ix_loans_status_due_date", "status", "due_date"),
+        Index("ix_loans_user_id_status", "user_id", "status"),
+        # 未返却の貸出のみを対象とした部分インデックス（現在の貸出の検索用）
+        Index(
+            "ix_loans_open_book_id", "book_id",
+            postgresql_where=text("return_date IS NULL"),
+            sqlite_where=text("return_date IS NULL")
+        ),
+        # アーカイブ済みの貸出IDを再利用しない（SQLite は AUTOINCREMENT なしだと最大ID+1 を再利用する）
+        {"sqlite_autoincrement": True},
+    )
+    
     def __repr__(self):
         return f"<Loan(user_id={self.user_id}, book_id={self.book_id}, status='{self.status}')>"
     
@@ -39,7 +56,7 @@ class Loan(BaseModel):
     def is_overdue(self) -> bool:
         """返却期限切れかどうか"""
         from datetime import date
-        return self.status == LoanStatus.ACTIVE and self.due_date < date.today()
+        return self.status in OPEN_LOAN_STATUSES and self.due_date < date.today()
     
     @property
     def days_overdue(self) -> int:
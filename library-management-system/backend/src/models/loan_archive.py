@@ -0,0 +1,60 @@
+"""
+貸出履歴アーカイブモデル
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, Date, DateTime, Enum, String, Index, select, union_all
+from sqlalchemy.orm import relationship
+from .base import Base
+from .loan import Loan, LoanStatus
+
+# アーカイブ対象となる完了済みの貸出ステータス
+ARCHIVABLE_LOAN_STATUSES = (LoanStatus.RETURNED, LoanStatus.LOST)
+
+# loans と loans_archive で共通のカラム
+LOAN_HISTORY_COLUMNS = (
+    "id", "user_id", "book_id", "loan_date", "due_date", "return_date",
+    "status", "renewal_count", "notes", "created_at", "updated_at"
+)
+
+
+class LoanArchive(Base):
+    """返却・紛失から一定期間を過ぎた貸出の履歴
+
+    loans を未返却中心の小さなテーブルに保つため、定期ジョブが完了済みの貸出を移す。
+    ID は元の貸出IDをそのまま使う。ユーザー・書籍削除後も履歴を残すため外部キーは張らない。
+    """
+    __tablename__ = "loans_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    book_id = Column(Integer, nullable=False)
+    loan_date = Column(Date, nullable=False)
+    due_date = Column(Date, nullable=False)
+    return_date = Column(Date)
+    status = Column(Enum(LoanStatus), nullable=False)
+    renewal_count = Column(Integer, default=0, nullable=False)
+    notes = Column(String(500))
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # リレーション（参照のみ）
+    user = relationship("User", primaryjoin="foreign(LoanArchive.user_id) == User.id", viewonly=True)
+    book = relationship("Book", primaryjoin="foreign(LoanArchive.book_id) == Book.id", viewonly=True)
+
+    __table_args__ = (
+        Index("ix_loans_archive_user_id_loan_date", "user_id", "loan_date"),
+        Index("ix_loans_archive_book_id", "book_id"),
+        Index("ix_loans_archive_return_date", "return_date"),
+    )
+
+    def __repr__(self):
+        return f"<LoanArchive(id={self.id}, user_id={self.user_id}, book_id={self.book_id}, status='{self.status}')>"
+
+
+def loan_history():
+    """loans と loans_archive を合わせた貸出履歴のサブクエリ（UNION ALL）"""
+    return union_all(
+        select(*[getattr(Loan, name) for name in LOAN_HISTORY_COLUMNS]),
+        select(*[getattr(LoanArchive, name) for name in LOAN_HISTORY_COLUMNS])
+    ).subquery("loan_history")
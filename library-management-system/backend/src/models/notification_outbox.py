@@ -0,0 +1,43 @@
+"""
+通知アウトボックスモデル
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from .base import Base
+
+
+class NotificationStatus:
+    """通知の配信状態"""
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"  # 再試行上限に達したもの
+
+
+class NotificationOutbox(Base):
+    """配信待ちの通知
+
+    状態変更（予約の準備完了など）と同じトランザクションで書き込み、
+    配信はスケジューラーのディスパッチャーがバッチで行う。
+    dedupe_key が同じ通知は1件しか作られない。
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(40), nullable=False)  # reservation_ready / loan_due_soon / loan_auto_renewed
+    user_id = Column(Integer, nullable=False)
+    subject = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    dedupe_key = Column(String(200), unique=True, nullable=True)
+    status = Column(String(20), default=NotificationStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<NotificationOutbox(id={self.id}, kind={self.kind}, user_id={self.user_id}, status={self.status})>"
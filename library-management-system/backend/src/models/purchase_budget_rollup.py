@@ -0,0 +1,27 @@
+"""
+購入申請の予算集計（月・部署・ステータス別）モデル
+"""
+from sqlalchemy import Column, Integer, Date, String, Numeric
+from .base import Base
+
+
+class PurchaseBudgetRollup(Base):
+    """月・部署・ステータス別の購入申請件数と見積金額の合計
+
+    月は申請の作成月（月初日）、部署は申請時点で申請に記録した部署（purchase_requests.department、
+    未設定は空文字）、ステータスは値（"approved" 等）。申請の作成・ステータス遷移・見積金額の変更時に加算する。
+    申請者の部署が後から変わっても申請の部署は変わらないため、加算と再構築の結果は一致する。
+    """
+    __tablename__ = "purchase_budget_rollups"
+
+    month = Column(Date, primary_key=True)
+    department = Column(String(100), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    request_count = Column(Integer, default=0, nullable=False)
+    total_amount = Column(Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<PurchaseBudgetRollup(month={self.month}, department='{self.department}', "
+            f"status='{self.status}', request_count={self.request_count})>"
+        )
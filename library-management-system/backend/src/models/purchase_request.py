@@ -1,10 +1,11 @@
 """
 購入申請モデル
 """
-from sqlalchemy import Column, Integer, ForeignKey, String, Text, Enum, Numeric
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, ForeignKey, String, Text, Enum, Numeric, Index
+from sqlalchemy.orm import relationship, validates
 import enum
 from .base import BaseModel
+from src.utils.book_keys import normalize_isbn13, title_author_key
 
 
 class PurchaseRequestStatus(enum.Enum):
@@ -18,6 +19,14 @@ class PurchaseRequestStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+# 進行中（重複申請・申請上限の対象）の購入申請ステータス
+ACTIVE_PURCHASE_REQUEST_STATUSES = (
+    PurchaseRequestStatus.PENDING,
+    PurchaseRequestStatus.APPROVED,
+    PurchaseRequestStatus.ORDERED,
+)
+
+
 class PurchaseRequest(BaseModel):
     """購入申請モデル"""
     __tablename__ = "purchase_requests"
@@ -33,9 +42,29 @@ class PurchaseRequest(BaseModel):
     admin_notes = Column(Text)
     priority = Column(Integer, default=3, nullable=False)  # 1:高, 2:中, 3:低
     image_url = Column(String(500))  # 書籍の画像URL
+    amazon_url = Column(String(1000))  # Amazon商品ページURL
+    department = Column(String(100))  # 申請時点の申請者の部署（予算集計のキー）
+    # 重複検出用の正規化キー（title / author / isbn の設定時に更新）
+    isbn13 = Column(String(13))
+    title_key = Column(String(500))
     
     # リレーション
     user = relationship("User", back_populates="purchase_requests")
     
+    __table_args__ = (
+        Index("ix_purchase_requests_status_priority_created_at", "status", "priority", "created_at"),
+        Index("ix_purchase_requests_amazon_url", "amazon_url"),
+        Index("ix_purchase_requests_isbn13", "isbn13"),
+        Index("ix_purchase_requests_title_key", "title_key"),
+    )
+    
+    @validates("title", "author", "isbn")
+    def _update_duplicate_keys(self, key, value):
+        """タイトル・著者・ISBN の変更に合わせて重複検出用キーを更新"""
+        values = {"title": self.title, "author": self.author, "isbn": self.isbn, key: value}
+        self.isbn13 = normalize_isbn13(values["isbn"])
+        self.title_key = title_author_key(values["title"], values["author"])
+        return value
+    
     def __repr__(self):
         return f"<PurchaseRequest(title='{self.title}', status='{self.status}')>" 
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+読書統計ロールアップモデル
+"""
+from sqlalchemy import Column, Integer, Date, String, Index
+from .base import Base
+
+
+class DailyUserReads(Base):
+    """日別・ユーザー別の返却完了数"""
+    __tablename__ = "daily_user_reads"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True, index=True)
+    completed_reads = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DailyUserReads(day={self.day}, user_id={self.user_id}, completed_reads={self.completed_reads})>"
+
+
+class DailyBookReads(Base):
+    """日別・書籍別の返却完了数"""
+    __tablename__ = "daily_book_reads"
+
+    day = Column(Date, primary_key=True)
+    book_id = Column(Integer, primary_key=True, index=True)
+    completed_reads = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DailyBookReads(day={self.day}, book_id={self.book_id}, completed_reads={self.completed_reads})>"
+
+
+class ReadingLeaderboard(Base):
+    """期間別（月 'YYYY-MM' / 年 'YYYY'）の返却完了数ランキング
+
+    返却のたびに該当する月・年の行を加算し、上位K件を
+    (period, scope[, department], completed_reads) の索引順にK行だけ読む。
+    """
+    __tablename__ = "reading_leaderboards"
+
+    period = Column(String(7), primary_key=True)
+    scope = Column(String(10), primary_key=True)  # 'user' / 'book'
+    entity_id = Column(Integer, primary_key=True)
+    department = Column(String(100), nullable=True)  # scope='user' のみ（最新の部署）
+    completed_reads = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_reading_leaderboards_rank", "period", "scope", "completed_reads", "entity_id"),
+        Index("ix_reading_leaderboards_department_rank", "period", "scope", "department", "completed_reads", "entity_id"),
+    )
+
+    def __repr__(self):
+        return f"<ReadingLeaderboard(period={self.period}, scope={self.scope}, entity_id={self.entity_id}, completed_reads={self.completed_reads})>"
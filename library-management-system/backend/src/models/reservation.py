@@ -1,7 +1,7 @@
 """
 予約モデル
 """
-from sqlalchemy import Column, Integer, ForeignKey, Date, Enum, String
+from sqlalchemy import Column, Integer, ForeignKey, Date, Enum, String, Index
 from sqlalchemy.orm import relationship
 import enum
 from .base import BaseModel
@@ -25,13 +25,18 @@ class Reservation(BaseModel):
     reservation_date = Column(Date, nullable=False)
     expiry_date = Column(Date, nullable=False)
     status = Column(Enum(ReservationStatus), default=ReservationStatus.PENDING, nullable=False)
-    priority = Column(Integer, default=1, nullable=False)  # 予約順位
+    priority = Column(Integer, default=1, nullable=False)  # 旧予約順位（順位は読み取り時に算出するため未使用）
     notes = Column(String(500))
     
     # リレーション
     user = relationship("User", back_populates="reservations")
     book = relationship("Book", back_populates="reservations")
     
+    __table_args__ = (
+        # 書籍ごとの予約待ち行列（状態・予約日・ID順）
+        Index("ix_reservations_queue_order", "book_id", "status", "reservation_date", "id"),
+    )
+    
     def __repr__(self):
         return f"<Reservation(user_id={self.user_id}, book_id={self.book_id}, status='{self.status}')>"
     
@@ -45,4 +50,8 @@ class Reservation(BaseModel):
     def days_until_expiry(self) -> int:
         """予約期限までの日数"""
         from datetime import date
-        return (self.expiry_date - date.today()).days 
\ No newline at end of file
+        return (self.expiry_date - date.today()).days
+
+
+# 予約待ち行列の並び順（予約日・ID順。作成後に変わらないため順位の振り直しは不要）
+RESERVATION_QUEUE_ORDER = (Reservation.reservation_date, Reservation.id)
@@ -0,0 +1,27 @@
+"""
+統計スナップショットモデル
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from .base import Base
+
+
+class StatsSnapshot(Base):
+    """サービス単位の統計スナップショット
+
+    スケジューラーが一定間隔で kind ごとの集計結果を保存し、
+    統計エンドポイントは最新の1行だけを読む。
+    """
+    __tablename__ = "stats_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)  # loans / reservations / purchase_requests
+    data = Column(JSON, nullable=False)
+    captured_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stats_snapshots_kind_captured_at", "kind", "captured_at"),
+    )
+
+    def __repr__(self):
+        return f"<StatsSnapshot(kind={self.kind}, captured_at={self.captured_at})>"
@@ -0,0 +1,23 @@
+"""
+ユーザートークンバージョンモデル
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime
+from .base import Base
+
+
+class UserTokenVersion(Base):
+    """ユーザーごとのトークンバージョン
+
+    ロール変更・無効化・削除時にバージョンを上げることで、
+    それ以前に発行されたアクセストークンを失効させる。
+    ユーザー削除後も失効状態を保持するため外部キーは張らない。
+    """
+    __tablename__ = "user_token_versions"
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UserTokenVersion(user_id={self.user_id}, version={self.version})>"
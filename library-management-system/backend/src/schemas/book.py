@@ -113,6 +113,8 @@ class BookResponse(BookBase):
     created_at: datetime = Field(..., description="登録日時")
     updated_at: Optional[datetime] = Field(None, description="更新日時")
     is_available: bool = Field(..., description="貸出可能かどうか")
+    active_loan_count: int = Field(0, description="未返却の貸出数")
+    pending_reservation_count: int = Field(0, description="待機中の予約数")
     current_borrower_id: Optional[int] = Field(None, description="現在の借用者ID")
     current_borrower_name: Optional[str] = Field(None, description="現在の借用者名")
 
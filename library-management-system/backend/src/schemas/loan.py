@@ -6,7 +6,7 @@ from typing import Optional, List
 from datetime import date, datetime
 from enum import Enum
 
-from src.models.loan import LoanStatus
+from src.models.loan import LoanStatus, OPEN_LOAN_STATUSES
 
 
 class LoanBase(BaseModel):
@@ -90,7 +90,7 @@ class LoanResponse(LoanBase):
     @property
     def is_overdue(self) -> bool:
         """返却期限切れかどうか"""
-        return self.status == LoanStatus.ACTIVE and self.due_date < date.today()
+        return self.status in OPEN_LOAN_STATUSES and self.due_date < date.today()
     
     @property
     def days_overdue(self) -> int:
@@ -117,6 +117,64 @@ class LoanStatistics(BaseModel):
     returned_loans: int = Field(..., description="返却済み貸出数")
     lost_loans: int = Field(..., description="紛失貸出数")
     return_rate: float = Field(..., description="返却率（%）")
+    snapshot_at: Optional[datetime] = Field(None, description="スナップショット取得日時（UTC）")
+    snapshot_age_seconds: Optional[float] = Field(None, description="スナップショットの経過秒数")
+
+
+class LoanEligibilityItem(BaseModel):
+    """貸出可否判定の対象"""
+    user_id: int = Field(..., description="ユーザーID")
+    book_id: int = Field(..., description="書籍ID")
+
+
+class LoanEligibilityRequest(BaseModel):
+    """貸出可否一括判定リクエストスキーマ"""
+    items: List[LoanEligibilityItem] = Field(..., min_length=1, max_length=200, description="判定対象のリスト")
+
+
+class LoanEligibilityResult(BaseModel):
+    """貸出可否判定結果"""
+    user_id: int
+    book_id: int
+    eligible: bool = Field(..., description="貸出可能かどうか")
+    reason: Optional[str] = Field(None, description="貸出できない理由")
+
+
+class LoanEligibilityResponse(BaseModel):
+    """貸出可否一括判定レスポンススキーマ"""
+    results: List[LoanEligibilityResult]
+
+
+class LoanBulkCreate(BaseModel):
+    """一括貸出リクエストスキーマ"""
+    user_id: int = Field(..., description="ユーザーID")
+    book_ids: List[int] = Field(default_factory=list, max_length=100, description="書籍IDのリスト")
+    isbns: List[str] = Field(default_factory=list, max_length=100, description="ISBNのリスト")
+    loan_period: Optional[int] = Field(14, ge=1, le=30, description="貸出期間（日数）")
+
+
+class LoanBulkReturn(BaseModel):
+    """一括返却リクエストスキーマ"""
+    book_ids: List[int] = Field(default_factory=list, max_length=100, description="書籍IDのリスト")
+    isbns: List[str] = Field(default_factory=list, max_length=100, description="ISBNのリスト")
+    user_id: Optional[int] = Field(None, description="返却者のユーザーID（同一書籍の貸出が複数ある場合の絞り込み）")
+
+
+class LoanBulkItemResult(BaseModel):
+    """一括処理の書籍ごとの結果"""
+    book_id: Optional[int] = Field(None, description="解決した書籍ID（見つからない場合は None）")
+    requested_book_id: Optional[int] = Field(None, description="指定された書籍ID（ISBN指定の場合は None）")
+    isbn: Optional[str] = None
+    success: bool
+    loan_id: Optional[int] = None
+    message: str
+
+
+class LoanBulkResponse(BaseModel):
+    """一括処理レスポンススキーマ"""
+    succeeded: int
+    failed: int
+    results: List[LoanBulkItemResult]
 
 
 # API レスポンス用
@@ -3,7 +3,7 @@
 """
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
 
@@ -57,6 +57,18 @@ class PurchaseRequestStatusUpdate(BaseModel):
     admin_notes: Optional[str] = Field(None, description="更新時のメモ")
 
 
+class DuplicateCheckItem(BaseModel):
+    """重複チェック対象の書籍"""
+    title: str = Field(..., max_length=255, description="書籍タイトル")
+    author: str = Field("", max_length=255, description="著者")
+    isbn: Optional[str] = Field(None, max_length=20, description="ISBN")
+
+
+class PurchaseRequestDuplicateCheck(BaseModel):
+    """購入申請の重複チェックリクエスト"""
+    items: List[DuplicateCheckItem] = Field(..., min_length=1, max_length=100, description="チェックする書籍一覧")
+
+
 class AmazonBookInfoRequest(BaseModel):
     """Amazon書籍情報取得リクエスト"""
     amazon_url: str = Field(..., description="AmazonのURL")
@@ -108,6 +120,24 @@ class PurchaseRequestStatistics(BaseModel):
     cancelled_requests: int = Field(..., description="キャンセル申請数")
     approval_rate: float = Field(..., description="承認率（%）")
     total_budget: float = Field(..., description="総予算")
+    snapshot_at: Optional[datetime] = Field(None, description="スナップショット取得日時（UTC）")
+    snapshot_age_seconds: Optional[float] = Field(None, description="スナップショットの経過秒数")
+
+
+class PurchaseBudgetRollupRow(BaseModel):
+    """購入予算集計行スキーマ"""
+    month: date = Field(..., description="申請の作成月（月初日）")
+    department: Optional[str] = Field(None, description="申請者の部署（未設定は null）")
+    status: PurchaseRequestStatus = Field(..., description="ステータス")
+    request_count: int = Field(..., description="申請数")
+    total_amount: float = Field(..., description="見積金額の合計")
+
+
+class PurchaseBudgetRollupResponse(BaseModel):
+    """購入予算集計レスポンススキーマ"""
+    rows: List[PurchaseBudgetRollupRow]
+    total_requests: int = Field(..., description="期間内の申請数")
+    total_budget: float = Field(..., description="期間内の予算（承認済み以降の見積金額の合計）")
 
 
 class AmazonBookInfo(BaseModel):
@@ -161,6 +191,31 @@ class PurchaseRequestStatusResponse(BaseModel):
     request: PurchaseRequestResponse
 
 
+class DuplicateMatch(BaseModel):
+    """重複候補（所蔵書籍または進行中の購入申請）"""
+    id: int
+    title: str
+    author: str
+    matched_by: str = Field(..., description="一致したキー（isbn / title_author）")
+    status: Optional[str] = Field(None, description="購入申請のステータス（購入申請のみ）")
+    user_id: Optional[int] = Field(None, description="申請者ID（購入申請のみ）")
+
+
+class DuplicateCheckResult(BaseModel):
+    """書籍1件の重複チェック結果"""
+    title: str
+    author: str
+    isbn: Optional[str] = None
+    is_duplicate: bool
+    books: List[DuplicateMatch] = Field(default_factory=list, description="所蔵済みの書籍")
+    requests: List[DuplicateMatch] = Field(default_factory=list, description="進行中の購入申請")
+
+
+class PurchaseRequestDuplicateCheckResponse(BaseModel):
+    """購入申請の重複チェックレスポンス"""
+    results: List[DuplicateCheckResult]
+
+
 class PurchaseRequestErrorResponse(BaseModel):
     """購入申請エラーレスポンス"""
     error: str
@@ -61,7 +61,8 @@ class ReservationResponse(ReservationBase):
     reservation_date: date
     expiry_date: date
     status: ReservationStatus
-    priority: int
+    priority: int = Field(..., description="予約順位（待機中は書籍ごとの待ち順、準備完了は1）")
+    estimated_available_date: Optional[date] = Field(None, description="貸出可能予定日（予約キュー取得時のみ）")
     created_at: datetime
     updated_at: datetime
     
@@ -108,6 +109,8 @@ class ReservationStatistics(BaseModel):
     cancelled_reservations: int = Field(..., description="キャンセル予約数")
     expired_reservations: int = Field(..., description="期限切れ予約数")
     completion_rate: float = Field(..., description="完了率（%）")
+    snapshot_at: Optional[datetime] = Field(None, description="スナップショット取得日時（UTC）")
+    snapshot_age_seconds: Optional[float] = Field(None, description="スナップショットの経過秒数")
 
 
 # API レスポンス用
@@ -0,0 +1,235 @@
+"""
+貸出可能予定日サービス - ビジネスロジック層
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from typing import List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
+from collections import Counter, defaultdict
+from statistics import median
+import logging
+
+from src.config.settings import Settings
+from src.models.availability_estimate import BookAvailabilityEstimate, EstimateBasis
+from src.models.book import Book
+from src.models.loan import Loan, LoanStatus, OPEN_LOAN_STATUSES
+from src.models.loan_archive import loan_history
+from src.models.reservation import Reservation, ReservationStatus
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+class AvailabilityEstimateService:
+    """貸出可能予定日サービスクラス
+
+    予約待ちのある書籍について、返却履歴から求めた貸出日数の中央値と
+    各冊が空く見込み日を book_availability_estimates に保存しておき、
+    予約キューの取得時は保存済みの値から待ち順ごとの予定日を返す。
+    保存は返却・予約作成時と定期ジョブ（refresh_stale）で行い、取得時は書き込まない。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_estimate(self, book_id: int) -> Optional[BookAvailabilityEstimate]:
+        """書籍の保存済みの見込みを取得"""
+        return self.db.query(BookAvailabilityEstimate).filter(
+            BookAvailabilityEstimate.book_id == book_id
+        ).first()
+
+    def ensure(self, book_id: int) -> bool:
+        """見込みが未作成、または前日以前に作成されたものなら再計算（再計算したら True）
+
+        予約待ちが発生した時点や、予約キュー取得時に見込みがない場合に呼ぶ。
+        コミットは呼び出し側で行う。
+        """
+        refreshed_at = self.db.query(BookAvailabilityEstimate.refreshed_at).filter(
+            BookAvailabilityEstimate.book_id == book_id
+        ).scalar()
+        if refreshed_at is not None and refreshed_at.date() >= datetime.utcnow().date():
+            return False
+        self.refresh([book_id])
+        return True
+
+    def current_estimate(self, book_id: int) -> Optional[BookAvailabilityEstimate]:
+        """本日作成済みの見込みを返す（未作成・古い場合は保存せずにその場で計算する）"""
+        estimate = self.get_estimate(book_id)
+        if estimate is not None and estimate.refreshed_at.date() >= datetime.utcnow().date():
+            return estimate
+        built = self._build([book_id])
+        return built[0] if built else None
+
+    def refresh_stale(self) -> int:
+        """前日以前に作成された見込みを再計算してコミットし、再計算した書籍数を返す（定期ジョブ用）"""
+        stale_ids = [
+            row.book_id for row in self.db.query(BookAvailabilityEstimate.book_id).filter(
+                BookAvailabilityEstimate.refreshed_at < datetime.combine(datetime.utcnow().date(), datetime.min.time())
+            ).all()
+        ]
+        refreshed = self.refresh(stale_ids)
+        self.db.commit()
+        if stale_ids:
+            logger.info(f"貸出可能予定日の再計算: {refreshed}冊")
+        return refreshed
+
+    def refresh(self, book_ids: List[int]) -> int:
+        """指定書籍の見込みを再計算（コミットは呼び出し側で行う）
+
+        予約待ちのなくなった書籍の見込みは削除する。再計算した書籍数を返す。
+        """
+        if not book_ids:
+            return 0
+        # 未フラッシュの貸出・予約の状態変更を反映してから計算する
+        self.db.flush()
+
+        self.db.execute(
+            BookAvailabilityEstimate.__table__.delete().where(
+                BookAvailabilityEstimate.book_id.in_(book_ids)
+            )
+        )
+        estimates = self._build(book_ids)
+        if not estimates:
+            return 0
+        self.db.execute(
+            BookAvailabilityEstimate.__table__.insert(),
+            [
+                {
+                    "book_id": estimate.book_id,
+                    "median_loan_days": estimate.median_loan_days,
+                    "sample_size": estimate.sample_size,
+                    "basis": estimate.basis,
+                    "slot_dates": estimate.slot_dates,
+                    "refreshed_at": estimate.refreshed_at
+                }
+                for estimate in estimates
+            ]
+        )
+        return len(estimates)
+
+    def _build(self, book_ids: List[int]) -> List[BookAvailabilityEstimate]:
+        """予約待ちのある書籍の見込みを計算（セッションには追加しない）"""
+        books = self.db.query(
+            Book.id, Book.total_copies, Book.category_structure
+        ).filter(
+            Book.id.in_(book_ids),
+            Book.pending_reservation_count > 0
+        ).all()
+        if not books:
+            return []
+
+        medians = self._median_loan_days(books)
+        slots = self._slot_dates(books, medians)
+        now = datetime.utcnow()
+        return [
+            BookAvailabilityEstimate(
+                book_id=book.id,
+                median_loan_days=medians[book.id][0],
+                sample_size=medians[book.id][1],
+                basis=medians[book.id][2],
+                slot_dates=[slot.isoformat() for slot in slots[book.id]],
+                refreshed_at=now
+            )
+            for book in books
+        ]
+
+    def _median_loan_days(self, books: list) -> Dict[int, Tuple[int, int, str]]:
+        """書籍ID -> (貸出日数の中央値, 件数, 算出元)
+
+        書籍自身の直近の返却が AVAILABILITY_ETA_MIN_SAMPLES 件未満なら同じ大項目カテゴリ、
+        それも足りなければ既定の日数を使う。
+        """
+        history = loan_history()
+        book_durations = self._recent_durations(
+            history.c.book_id,
+            select(history.c.book_id.label("key"), history.c.loan_date, history.c.return_date).where(
+                history.c.book_id.in_([book.id for book in books])
+            ),
+            history
+        )
+
+        categories = {
+            book.id: (book.category_structure or {}).get("major_category")
+            for book in books
+            if len(book_durations.get(book.id, [])) < settings.AVAILABILITY_ETA_MIN_SAMPLES
+        }
+        category_durations = {}
+        wanted = {category for category in categories.values() if category}
+        if wanted:
+            major_category = Book.category_structure["major_category"].as_string()
+            category_durations = self._recent_durations(
+                major_category,
+                select(major_category.label("key"), history.c.loan_date, history.c.return_date).join_from(
+                    history, Book, Book.id == history.c.book_id
+                ).where(major_category.in_(wanted)),
+                history
+            )
+
+        result = {}
+        for book in books:
+            durations = book_durations.get(book.id, [])
+            if len(durations) >= settings.AVAILABILITY_ETA_MIN_SAMPLES:
+                result[book.id] = (round(median(durations)), len(durations), EstimateBasis.BOOK)
+                continue
+            durations = category_durations.get(categories.get(book.id), [])
+            if len(durations) >= settings.AVAILABILITY_ETA_MIN_SAMPLES:
+                result[book.id] = (round(median(durations)), len(durations), EstimateBasis.CATEGORY)
+                continue
+            result[book.id] = (settings.AVAILABILITY_ETA_DEFAULT_DAYS, 0, EstimateBasis.DEFAULT)
+        return result
+
+    def _recent_durations(self, key_column, source, history) -> Dict[object, List[int]]:
+        """キーごとに直近 AVAILABILITY_ETA_SAMPLE_SIZE 件の返却の貸出日数（最低1日）"""
+        recent = source.add_columns(
+            func.row_number().over(
+                partition_by=key_column,
+                order_by=(history.c.return_date.desc(), history.c.id.desc())
+            ).label("recency")
+        ).where(
+            history.c.status == LoanStatus.RETURNED,
+            history.c.return_date.isnot(None)
+        ).subquery()
+        rows = self.db.execute(
+            select(recent.c.key, recent.c.loan_date, recent.c.return_date).where(
+                recent.c.recency <= settings.AVAILABILITY_ETA_SAMPLE_SIZE
+            )
+        ).all()
+
+        durations = defaultdict(list)
+        for row in rows:
+            durations[row.key].append(max((row.return_date - row.loan_date).days, 1))
+        return durations
+
+    def _slot_dates(self, books: list, medians: Dict[int, Tuple[int, int, str]]) -> Dict[int, List[date]]:
+        """書籍ID -> 各冊が次に空く見込み日（昇順）
+
+        貸出中の冊は返却期限と「貸出日 + 中央値」の早い方、予約者用に確保中の冊は
+        今日から中央値の日数だけ借りられる前提、それ以外の冊は今日とする。
+        """
+        today = date.today()
+        book_ids = [book.id for book in books]
+        open_loans = defaultdict(list)
+        for loan in self.db.query(Loan.book_id, Loan.loan_date, Loan.due_date).filter(
+            Loan.book_id.in_(book_ids),
+            Loan.status.in_(OPEN_LOAN_STATUSES)
+        ).all():
+            open_loans[loan.book_id].append(loan)
+        ready_holds = Counter(
+            row.book_id for row in self.db.query(Reservation.book_id).filter(
+                Reservation.book_id.in_(book_ids),
+                Reservation.status == ReservationStatus.READY
+            ).all()
+        )
+
+        result = {}
+        for book in books:
+            median_days = medians[book.id][0]
+            slots = [
+                max(today, min(loan.due_date, loan.loan_date + timedelta(days=median_days)))
+                for loan in open_loans[book.id]
+            ]
+            slots += [today + timedelta(days=median_days)] * ready_holds[book.id]
+            copies = max(book.total_copies or 1, 1)
+            slots += [today] * max(copies - len(slots), 0)
+            result[book.id] = sorted(slots)[:copies]
+        return result
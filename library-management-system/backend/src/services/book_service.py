@@ -3,7 +3,7 @@
 """
 from typing import List, Optional, Dict, Any, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func, case, String
+from sqlalchemy import and_, or_, desc, asc, func, case, select, update, String
 import logging
 from datetime import datetime
 
@@ -382,13 +382,18 @@ class BookService:
         try:
             # すべての関連データを削除（完全削除）
             from src.models.loan import Loan
+            from src.models.loan_archive import LoanArchive
             from src.models.reservation import Reservation
+            from src.models.availability_estimate import BookAvailabilityEstimate
             
             # 1. この書籍のすべての貸出記録を削除
             all_loans = self.db.query(Loan).filter(Loan.book_id == book_id).all()
             for loan in all_loans:
                 logger.info(f"貸出記録削除: ID={loan.id}, ユーザー={loan.user_id}")
                 self.db.delete(loan)
+            archived_loans = self.db.query(LoanArchive).filter(
+                LoanArchive.book_id == book_id
+            ).delete(synchronize_session=False)
             
             # 2. この書籍のすべての予約記録を削除
             all_reservations = self.db.query(Reservation).filter(Reservation.book_id == book_id).all()
@@ -396,9 +401,13 @@ class BookService:
                 logger.info(f"予約記録削除: ID={reservation.id}, ユーザー={reservation.user_id}")
                 self.db.delete(reservation)
             
+            self.db.query(BookAvailabilityEstimate).filter(
+                BookAvailabilityEstimate.book_id == book_id
+            ).delete(synchronize_session=False)
+            
             # 3. 関連データの削除をコミット
             self.db.commit()
-            logger.info(f"関連データ削除完了: 貸出{len(all_loans)}件, 予約{len(all_reservations)}件")
+            logger.info(f"関連データ削除完了: 貸出{len(all_loans) + archived_loans}件, 予約{len(all_reservations)}件")
             
             # 4. 書籍本体を削除
             self.db.delete(book)
@@ -827,4 +836,38 @@ class BookService:
                     filtered_books.append(book)
             books = filtered_books
         
-        return len(books) 
\ No newline at end of file
+        return len(books)
+    
+    def reconcile_circulation_counts(self) -> int:
+        """書籍の貸出数・予約待ち数を貸出・予約テーブルから再計算（ずれていた書籍数を返す）
+
+        カウンターは状態変更と同一トランザクションで増減しているが、
+        直接のデータ修正などでずれた場合にこの1文の UPDATE で補正する。
+        """
+        from src.models.loan import Loan, OPEN_LOAN_STATUSES
+        from src.models.reservation import Reservation, ReservationStatus
+        
+        active_loans = select(func.count(Loan.id)).where(
+            Loan.book_id == Book.id,
+            Loan.status.in_(OPEN_LOAN_STATUSES)
+        ).scalar_subquery()
+        pending_reservations = select(func.count(Reservation.id)).where(
+            Reservation.book_id == Book.id,
+            Reservation.status == ReservationStatus.PENDING
+        ).scalar_subquery()
+        
+        reconciled = self.db.execute(
+            update(Book).where(
+                or_(
+                    Book.active_loan_count != active_loans,
+                    Book.pending_reservation_count != pending_reservations
+                )
+            ).values(
+                active_loan_count=active_loans,
+                pending_reservation_count=pending_reservations
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        
+        logger.info(f"書籍カウンター補正: {reconciled}件")
+        return reconciled
\ No newline at end of file
@@ -2,17 +2,30 @@
 貸出サービス - ビジネスロジック層
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_, func, case, select, update, literal, union_all
+from typing import List, Optional, Dict, Any, Tuple, Set
 from datetime import date, datetime, timedelta
+from collections import Counter, defaultdict, deque
 import logging
 
-from src.models.loan import Loan, LoanStatus
+from src.config.settings import Settings
+from src.models.loan import Loan, LoanStatus, OPEN_LOAN_STATUSES
+from src.models.loan_archive import LoanArchive, loan_history
 from src.models.book import Book, BookStatus
 from src.models.user import User
+from src.models.activity_counter import ActivityMetric
 from src.schemas.loan import LoanCreate, LoanUpdate, LoanResponse
+from src.services.availability_service import AvailabilityEstimateService
+from src.services.notification_service import NotificationService
+from src.services.reading_stats_service import ReadingStatsService
+from src.services.timeseries_service import TimeSeriesService
+from src.utils.locks import try_advisory_xact_lock
 
 logger = logging.getLogger(__name__)
+settings = Settings()
+
+MAX_ACTIVE_LOANS = 5  # 最大貸出冊数
+MAX_RENEWALS = 2  # 延長上限回数
 
 
 class LoanService:
@@ -30,33 +43,46 @@ class LoanService:
         book_id: Optional[int] = None,
         overdue_only: bool = False
     ) -> List[LoanResponse]:
-        """貸出一覧を取得"""
-        query = self.db.query(Loan)
+        """貸出一覧を取得（アーカイブ済みの貸出履歴も含む）"""
+        history = loan_history()
+        query = self.db.query(history.c.id)
         
         # フィルタリング
         if status:
-            query = query.filter(Loan.status == status)
+            query = query.filter(history.c.status == status)
         
         if user_id:
-            query = query.filter(Loan.user_id == user_id)
+            query = query.filter(history.c.user_id == user_id)
         
         if book_id:
-            query = query.filter(Loan.book_id == book_id)
+            query = query.filter(history.c.book_id == book_id)
         
         if overdue_only:
             query = query.filter(
                 and_(
-                    Loan.status == LoanStatus.ACTIVE,
-                    Loan.due_date < date.today()
+                    history.c.status.in_(OPEN_LOAN_STATUSES),
+                    history.c.due_date < date.today()
                 )
             )
         
-        loans = query.offset(skip).limit(limit).all()
-        return [LoanResponse.model_validate(loan) for loan in loans]
+        loan_ids = [row.id for row in query.order_by(history.c.id).offset(skip).limit(limit).all()]
+        if not loan_ids:
+            return []
+        
+        loans = {loan.id: loan for loan in self.db.query(Loan).filter(Loan.id.in_(loan_ids)).all()}
+        archived_ids = [loan_id for loan_id in loan_ids if loan_id not in loans]
+        if archived_ids:
+            loans.update({
+                loan.id: loan
+                for loan in self.db.query(LoanArchive).filter(LoanArchive.id.in_(archived_ids)).all()
+            })
+        return [LoanResponse.model_validate(loans[loan_id]) for loan_id in loan_ids if loan_id in loans]
     
     def get_loan_by_id(self, loan_id: int) -> Optional[LoanResponse]:
-        """IDで貸出を取得"""
+        """IDで貸出を取得（見つからなければアーカイブを参照）"""
         loan = self.db.query(Loan).filter(Loan.id == loan_id).first()
+        if not loan:
+            loan = self.db.query(LoanArchive).filter(LoanArchive.id == loan_id).first()
         if loan:
             return LoanResponse.model_validate(loan)
         return None
@@ -69,7 +95,7 @@ class LoanService:
         loans = self.db.query(Loan).join(Book).join(User).filter(
             and_(
                 Loan.user_id == user_id,
-                Loan.status == LoanStatus.ACTIVE
+                Loan.status.in_(OPEN_LOAN_STATUSES)
             )
         ).all()
         
@@ -111,73 +137,26 @@ class LoanService:
         loans = self.db.query(Loan).filter(
             and_(
                 Loan.user_id == user_id,
-                Loan.status == LoanStatus.ACTIVE,
+                Loan.status.in_(OPEN_LOAN_STATUSES),
                 Loan.due_date < date.today()
             )
         ).all()
         return [LoanResponse.model_validate(loan) for loan in loans]
     
     def create_loan(self, loan_data: LoanCreate) -> LoanResponse:
-        """新しい貸出を作成"""
-        # 書籍の利用可能性をチェック
-        book = self.db.query(Book).filter(Book.id == loan_data.book_id).first()
-        if not book:
-            raise ValueError("指定された書籍が見つかりません")
-        
-        # ユーザーの存在確認
-        user = self.db.query(User).filter(User.id == loan_data.user_id).first()
-        if not user:
-            raise ValueError("指定されたユーザーが見つかりません")
-        
-        # 書籍のステータスチェック
-        book_status = book.status.upper() if isinstance(book.status, str) else book.status.value.upper()
-        
-        if book_status == "AVAILABLE":
-            # 通常の貸出処理
-            pass
-        elif book_status == "RESERVED":
-            # 予約準備完了の書籍の場合、該当ユーザーの予約があるかチェック
-            from src.models.reservation import Reservation, ReservationStatus
-            user_reservation = self.db.query(Reservation).filter(
-                and_(
-                    Reservation.book_id == loan_data.book_id,
-                    Reservation.user_id == loan_data.user_id,
-                    Reservation.status == ReservationStatus.READY
-                )
-            ).first()
-            
-            if not user_reservation:
-                # 現在の予約者数を取得
-                pending_reservations_count = self.db.query(Reservation).filter(
-                    and_(
-                        Reservation.book_id == loan_data.book_id,
-                        Reservation.status.in_([ReservationStatus.PENDING, ReservationStatus.READY])
-                    )
-                ).count()
-                
-                if pending_reservations_count > 0:
-                    raise ValueError(f"この書籍は他の利用者が予約しており、現在予約者専用となっています。（予約待ち: {pending_reservations_count}人）予約をしてお待ちください。")
-                else:
-                    raise ValueError("この書籍は現在貸出できません。")
-        else:
-            raise ValueError("この書籍は現在貸出できません")
-        
-        # ユーザーの貸出制限チェック
-        active_loans_count = self.db.query(Loan).filter(
-            and_(
-                Loan.user_id == loan_data.user_id,
-                Loan.status == LoanStatus.ACTIVE
-            )
-        ).count()
-        
-        max_loans = 5  # 最大貸出冊数
-        if active_loans_count >= max_loans:
-            raise ValueError(f"貸出上限（{max_loans}冊）に達しています")
-        
-        # 期限切れ貸出がある場合は新規貸出を拒否
-        overdue_loans = self.get_user_overdue_loans(loan_data.user_id)
-        if overdue_loans:
-            raise ValueError("返却期限切れの書籍があるため、新規貸出はできません")
+        """新しい貸出を作成
+
+        貸出可否は1クエリで判定し、在庫の確保は条件付き UPDATE の1文で行う。
+        """
+        facts = self.db.execute(self._eligibility_query(loan_data.user_id, loan_data.book_id)).one()
+        reason = self._ineligibility_reason(facts)
+        if reason:
+            raise ValueError(reason)
+        
+        # 在庫を1冊確保（書籍のステータス・予約者チェックを含む）
+        if not self._claim_copy(loan_data.book_id, loan_data.user_id):
+            self.db.rollback()
+            raise ValueError(self._claim_failure_reason(loan_data.book_id))
         
         # 貸出期間の計算（デフォルト14日）
         loan_period = loan_data.loan_period or 14
@@ -193,24 +172,279 @@ class LoanService:
             notes=loan_data.notes
         )
         
-        # 書籍のステータスを更新（データベースの形式に合わせて文字列で保存）
-        book.status = "BORROWED"
-        book.available_copies = max(0, book.available_copies - 1)
-        
         self.db.add(loan)
+        TimeSeriesService(self.db).record(ActivityMetric.LOANS_CREATED, loan.loan_date)
         self.db.commit()
         self.db.refresh(loan)
         
         logger.info(f"新規貸出作成: ユーザー{loan_data.user_id}, 書籍{loan_data.book_id}")
         return LoanResponse.model_validate(loan)
     
+    def bulk_checkout(
+        self,
+        user_id: int,
+        book_ids: List[int],
+        isbns: List[str],
+        loan_period: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """複数冊をまとめて貸出（1トランザクション、書籍ごとの結果を返す）
+
+        判定材料の取得・在庫確保・貸出レコード作成をそれぞれ一括で行う。
+        """
+        entries = self._resolve_book_refs(book_ids, isbns)
+        if not entries:
+            raise ValueError("書籍IDまたはISBNを1件以上指定してください")
+        
+        candidate_ids = list(dict.fromkeys(entry["book_id"] for entry in entries if entry["book_id"]))
+        facts = {
+            row.book_id: row
+            for row in (self._fetch_eligibility_facts([(user_id, book_id) for book_id in candidate_ids]) if candidate_ids else [])
+        }
+        
+        # 先頭から順に判定（同一リクエスト内の貸出も上限に数える）
+        planned = []
+        seen = set()
+        for entry in entries:
+            book_id = entry["book_id"]
+            if book_id is None:
+                entry["message"] = "指定された書籍が見つかりません"
+            elif book_id in seen:
+                entry["message"] = "同じ書籍が重複して指定されています"
+            else:
+                seen.add(book_id)
+                entry["message"] = self._ineligibility_reason(facts[book_id], pending_loans=len(planned))
+                if entry["message"] is None:
+                    planned.append(book_id)
+        
+        claimed = self._claim_copies(planned, user_id)
+        
+        loan_date = date.today()
+        due_date = loan_date + timedelta(days=loan_period or 14)
+        loans = {
+            book_id: Loan(
+                user_id=user_id,
+                book_id=book_id,
+                loan_date=loan_date,
+                due_date=due_date,
+                status=LoanStatus.ACTIVE
+            )
+            for book_id in planned if book_id in claimed
+        }
+        self.db.add_all(loans.values())
+        self.db.flush()
+        
+        for entry in entries:
+            if entry["book_id"] in loans and entry["message"] is None:
+                entry["success"] = True
+                entry["loan_id"] = loans[entry["book_id"]].id
+                entry["message"] = "貸出しました"
+            elif entry["message"] is None:
+                entry["message"] = self._claim_failure_reason(entry["book_id"])
+        
+        TimeSeriesService(self.db).record(ActivityMetric.LOANS_CREATED, loan_date, count=len(loans))
+        self.db.commit()
+        
+        logger.info(f"一括貸出: ユーザー{user_id}, {len(loans)}/{len(entries)}冊")
+        return entries
+    
+    def _resolve_book_refs(self, book_ids: List[int], isbns: List[str]) -> List[Dict[str, Any]]:
+        """書籍ID・ISBNの指定を1クエリで書籍IDに解決（指定順の結果エントリを返す）
+
+        book_id は解決できた書籍ID（見つからなければ None）、requested_book_id は指定された書籍IDで、
+        存在しないIDを指定した場合もどの指定の結果かが分かるようにする。
+        """
+        isbns = [isbn.strip() for isbn in isbns]
+        conditions = []
+        if book_ids:
+            conditions.append(Book.id.in_(book_ids))
+        if isbns:
+            conditions.append(Book.isbn.in_(isbns))
+        if not conditions:
+            return []
+        
+        rows = self.db.query(Book.id, Book.isbn).filter(or_(*conditions)).all()
+        existing_ids = {row.id for row in rows}
+        ids_by_isbn = {row.isbn: row.id for row in rows if row.isbn}
+        
+        entries = [
+            {"book_id": book_id if book_id in existing_ids else None, "requested_book_id": book_id, "isbn": None}
+            for book_id in book_ids
+        ]
+        entries += [
+            {"book_id": ids_by_isbn.get(isbn), "requested_book_id": None, "isbn": isbn}
+            for isbn in isbns
+        ]
+        for entry in entries:
+            entry.update({"success": False, "loan_id": None, "message": None})
+        return entries
+    
+    def check_eligibility(self, pairs: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """複数の (ユーザーID, 書籍ID) について貸出可否を判定（UNION ALL の1クエリ）"""
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return []
+        
+        results = []
+        for facts in self._fetch_eligibility_facts(pairs):
+            reason = self._ineligibility_reason(facts)
+            results.append({
+                "user_id": facts.user_id,
+                "book_id": facts.book_id,
+                "eligible": reason is None,
+                "reason": reason
+            })
+        return results
+    
+    def _fetch_eligibility_facts(self, pairs: List[Tuple[int, int]]) -> list:
+        """(ユーザーID, 書籍ID) ごとの判定材料を UNION ALL の1クエリで取得"""
+        queries = [self._eligibility_query(user_id, book_id) for user_id, book_id in pairs]
+        query = queries[0] if len(queries) == 1 else union_all(*queries)
+        return self.db.execute(query).all()
+    
+    def _eligibility_query(self, user_id: int, book_id: int):
+        """貸出可否の判定材料をスカラーサブクエリで1行にまとめた SELECT"""
+        from src.models.reservation import Reservation, ReservationStatus
+        
+        user_exists = select(func.count(User.id)).where(User.id == user_id).scalar_subquery()
+        book_status = select(Book.status).where(Book.id == book_id).scalar_subquery()
+        available_copies = select(Book.available_copies).where(Book.id == book_id).scalar_subquery()
+        has_ready_reservation = select(func.count(Reservation.id)).where(
+            Reservation.book_id == book_id,
+            Reservation.user_id == user_id,
+            Reservation.status == ReservationStatus.READY
+        ).scalar_subquery()
+        waiting_reservations = select(Book.pending_reservation_count).where(Book.id == book_id).scalar_subquery()
+        open_loans = select(func.count(Loan.id)).where(
+            Loan.user_id == user_id,
+            Loan.status.in_(OPEN_LOAN_STATUSES)
+        ).scalar_subquery()
+        overdue_loans = select(func.count(Loan.id)).where(
+            Loan.user_id == user_id,
+            Loan.status.in_(OPEN_LOAN_STATUSES),
+            Loan.due_date < date.today()
+        ).scalar_subquery()
+        
+        return select(
+            literal(user_id).label("user_id"),
+            literal(book_id).label("book_id"),
+            user_exists.label("user_exists"),
+            book_status.label("book_status"),
+            available_copies.label("available_copies"),
+            has_ready_reservation.label("has_ready_reservation"),
+            waiting_reservations.label("waiting_reservations"),
+            open_loans.label("open_loans"),
+            overdue_loans.label("overdue_loans"),
+        )
+    
+    @staticmethod
+    def _ineligibility_reason(facts, pending_loans: int = 0) -> Optional[str]:
+        """判定材料から貸出できない理由を返す（貸出可能なら None）
+
+        pending_loans は同一リクエスト内で先に貸出予定となった冊数。
+        """
+        if facts.book_status is None:
+            return "指定された書籍が見つかりません"
+        if not facts.user_exists:
+            return "指定されたユーザーが見つかりません"
+        
+        book_status = facts.book_status if isinstance(facts.book_status, BookStatus) else BookStatus(str(facts.book_status).upper())
+        if book_status == BookStatus.RESERVED:
+            # 予約準備完了の書籍は、該当ユーザーの予約がある場合のみ貸出可能
+            if not facts.has_ready_reservation:
+                if facts.waiting_reservations > 0:
+                    return f"この書籍は他の利用者が予約しており、現在予約者専用となっています。（予約待ち: {facts.waiting_reservations}人）予約をしてお待ちください。"
+                return "この書籍は現在貸出できません。"
+        elif book_status != BookStatus.AVAILABLE or facts.available_copies <= 0:
+            return "この書籍は現在貸出できません"
+        
+        if facts.open_loans + pending_loans >= MAX_ACTIVE_LOANS:
+            return f"貸出上限（{MAX_ACTIVE_LOANS}冊）に達しています"
+        
+        if facts.overdue_loans:
+            return "返却期限切れの書籍があるため、新規貸出はできません"
+        
+        return None
+    
+    def _claim_copy(self, book_id: int, user_id: int) -> bool:
+        """貸出可能な在庫を条件付き UPDATE で1冊確保（確保できなければ False）"""
+        return book_id in self._claim_copies([book_id], user_id)
+    
+    def _claim_copies(self, book_ids: List[int], user_id: int) -> Set[int]:
+        """指定書籍の在庫を1冊ずつ条件付き UPDATE の1文で確保し、確保できた書籍IDを返す
+
+        貸出可能なのは AVAILABLE の書籍、または RESERVED で当該ユーザーの
+        READY 予約がある書籍。最後の1冊を確保した場合のみ BORROWED にする。
+        確保した書籍の当該ユーザーの READY 予約は受け取り済みとして COMPLETED にする。
+        コミットは呼び出し側で行い、貸出レコードの INSERT と同一トランザクションとする。
+        """
+        from src.models.reservation import Reservation, ReservationStatus
+        
+        if not book_ids:
+            return set()
+        
+        holds_ready_reservation = select(Reservation.id).where(
+            Reservation.book_id == Book.id,
+            Reservation.user_id == user_id,
+            Reservation.status == ReservationStatus.READY
+        ).exists()
+        stmt = update(Book).where(
+            Book.available_copies > 0,
+            or_(
+                Book.status == BookStatus.AVAILABLE,
+                and_(Book.status == BookStatus.RESERVED, holds_ready_reservation)
+            )
+        ).values(
+            available_copies=Book.available_copies - 1,
+            active_loan_count=Book.active_loan_count + 1,
+            status=case(
+                (Book.available_copies > 1, Book.status),
+                else_=literal(BookStatus.BORROWED, type_=Book.status.type)
+            ),
+            updated_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+        
+        if self.db.get_bind().dialect.update_returning:
+            claimed = set(self.db.execute(stmt.where(Book.id.in_(book_ids)).returning(Book.id)).scalars())
+        else:
+            claimed = {
+                book_id for book_id in book_ids
+                if self.db.execute(stmt.where(Book.id == book_id)).rowcount == 1
+            }
+        
+        if claimed:
+            completed = self.db.execute(
+                update(Reservation).where(
+                    Reservation.user_id == user_id,
+                    Reservation.book_id.in_(list(claimed)),
+                    Reservation.status == ReservationStatus.READY
+                ).values(
+                    status=ReservationStatus.COMPLETED,
+                    updated_at=datetime.utcnow()
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            TimeSeriesService(self.db).record(ActivityMetric.RESERVATIONS_COMPLETED, count=completed)
+        return claimed
+    
+    def _claim_failure_reason(self, book_id: int) -> str:
+        """在庫確保に失敗した理由を判定（失敗時のみ実行）"""
+        book = self.db.query(Book.status, Book.pending_reservation_count).filter(Book.id == book_id).first()
+        if not book:
+            return "指定された書籍が見つかりません"
+        
+        if book.status == BookStatus.RESERVED:
+            if book.pending_reservation_count > 0:
+                return f"この書籍は他の利用者が予約しており、現在予約者専用となっています。（予約待ち: {book.pending_reservation_count}人）予約をしてお待ちください。"
+            return "この書籍は現在貸出できません。"
+        
+        return "この書籍は現在貸出できません"
+    
     def return_book(self, loan_id: int, notes: Optional[str] = None) -> LoanResponse:
-        """書籍を返却"""
-        loan = self.db.query(Loan).filter(Loan.id == loan_id).first()
+        """書籍を返却（同じ貸出の同時返却は行ロックで直列化する）"""
+        loan = self.db.query(Loan).filter(Loan.id == loan_id).with_for_update().first()
         if not loan:
             raise ValueError("指定された貸出記録が見つかりません")
         
-        if loan.status != LoanStatus.ACTIVE:
+        if loan.status not in OPEN_LOAN_STATUSES:
             raise ValueError("この貸出は既に返却済みまたは無効です")
         
         # 返却処理
@@ -219,28 +453,147 @@ class LoanService:
         if notes:
             loan.notes = f"{loan.notes or ''}\n返却時メモ: {notes}".strip()
         
-        # 書籍のステータスを更新
-        book = self.db.query(Book).filter(Book.id == loan.book_id).first()
-        if book:
-            # 予約処理を実行
-            next_reservation = self._process_book_return_reservations(loan.book_id)
-            
-            if next_reservation:
-                # 予約者がいる場合は、書籍を予約者用に準備
-                book.status = "RESERVED"  # 予約者用に確保
-                logger.info(f"書籍返却: 貸出ID{loan_id}, 次の予約者ID{next_reservation.user_id}に割り当て")
-            else:
-                # 予約者がいない場合は利用可能状態に
-                book.status = "AVAILABLE"
-                logger.info(f"書籍返却: 貸出ID{loan_id}, 利用可能状態に変更")
-            
-            book.available_copies = min(book.total_copies, book.available_copies + 1)
+        # 予約処理を実行（待ち行列の先頭を準備完了にする）
+        next_reservation = self._process_book_return_reservations(loan.book_id)
+        if next_reservation:
+            logger.info(f"書籍返却: 貸出ID{loan_id}, 次の予約者ID{next_reservation.user_id}に割り当て")
+        else:
+            logger.info(f"書籍返却: 貸出ID{loan_id}, 利用可能状態に変更")
+        
+        # 在庫の戻しは _claim_copies と同様に1文の UPDATE で行い、同時返却でも加算を失わない
+        restored = Book.available_copies + 1
+        self.db.execute(
+            update(Book).where(
+                Book.id == loan.book_id
+            ).values(
+                available_copies=case((restored > Book.total_copies, Book.total_copies), else_=restored),
+                active_loan_count=Book.active_loan_count - 1,
+                # 予約者がいる場合は予約者用に確保し、いなければ利用可能にする
+                status=literal(
+                    BookStatus.RESERVED if next_reservation else BookStatus.AVAILABLE,
+                    type_=Book.status.type
+                ),
+                updated_at=datetime.utcnow()
+            ).execution_options(synchronize_session=False)
+        )
+        
+        # 読書統計ロールアップを更新（返却と同一トランザクション）
+        ReadingStatsService(self.db).record_completed_read(loan.user_id, loan.book_id, loan.return_date)
+        TimeSeriesService(self.db).record(ActivityMetric.LOANS_RETURNED, loan.return_date)
+        # 予約待ちの貸出可能予定日を返却後の状態で再計算
+        AvailabilityEstimateService(self.db).refresh([loan.book_id])
         
         self.db.commit()
         self.db.refresh(loan)
         
         return LoanResponse.model_validate(loan)
     
+    def bulk_return(
+        self,
+        book_ids: List[int],
+        isbns: List[str],
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """複数冊をまとめて返却（1トランザクション、書籍ごとの結果を返す）
+
+        書籍ごとに返却期限の早い未返却の貸出を返却し、貸出・書籍・予約の更新を
+        それぞれ一括の UPDATE で行う。予約者への引き当ても書籍単位でまとめて処理する。
+        """
+        from src.services.reservation_service import ReservationService
+        
+        entries = self._resolve_book_refs(book_ids, isbns)
+        if not entries:
+            raise ValueError("書籍IDまたはISBNを1件以上指定してください")
+        
+        # 対象書籍の未返却の貸出を1クエリで取得し、書籍ごとに返却期限順で割り当て
+        resolved_ids = list({entry["book_id"] for entry in entries if entry["book_id"]})
+        open_loans_query = self.db.query(Loan.id, Loan.book_id, Loan.user_id).filter(
+            Loan.book_id.in_(resolved_ids),
+            Loan.status.in_(OPEN_LOAN_STATUSES)
+        )
+        if user_id is not None:
+            open_loans_query = open_loans_query.filter(Loan.user_id == user_id)
+        open_loans = defaultdict(deque)
+        for row in open_loans_query.order_by(Loan.book_id, Loan.due_date, Loan.id).all() if resolved_ids else []:
+            open_loans[row.book_id].append(row)
+        
+        targets = {}
+        for index, entry in enumerate(entries):
+            if entry["book_id"] is None:
+                entry["message"] = "指定された書籍が見つかりません"
+            elif not open_loans[entry["book_id"]]:
+                entry["message"] = "この書籍の未返却の貸出が見つかりません"
+            else:
+                targets[index] = open_loans[entry["book_id"]].popleft()
+        
+        today = date.today()
+        returned_ids = set()
+        if targets:
+            stmt = update(Loan).where(
+                Loan.id.in_([loan.id for loan in targets.values()]),
+                Loan.status.in_(OPEN_LOAN_STATUSES)
+            ).values(
+                status=LoanStatus.RETURNED,
+                return_date=today,
+                updated_at=datetime.utcnow()
+            ).execution_options(synchronize_session=False)
+            if self.db.get_bind().dialect.update_returning:
+                returned_ids = set(self.db.execute(stmt.returning(Loan.id)).scalars())
+            else:
+                self.db.execute(stmt)
+                returned_ids = {loan.id for loan in targets.values()}
+        
+        returned = [loan for loan in targets.values() if loan.id in returned_ids]
+        returned_per_book = Counter(loan.book_id for loan in returned)
+        
+        # 返却冊数分だけ、書籍ごとに先頭の待機中予約を準備完了にする（期限切れ処理と共通）
+        handoffs = ReservationService(self.db).hand_off_copies(returned_per_book)
+        
+        if returned_per_book:
+            handoffs_per_book = Counter(reservation.book_id for reservation in handoffs)
+            restored = Book.available_copies + case(dict(returned_per_book), value=Book.id, else_=0)
+            self.db.execute(
+                update(Book).where(
+                    Book.id.in_(list(returned_per_book))
+                ).values(
+                    available_copies=case((restored > Book.total_copies, Book.total_copies), else_=restored),
+                    active_loan_count=Book.active_loan_count - case(dict(returned_per_book), value=Book.id, else_=0),
+                    status=case(
+                        (Book.id.in_(list(handoffs_per_book)), literal(BookStatus.RESERVED, type_=Book.status.type)),
+                        else_=literal(BookStatus.AVAILABLE, type_=Book.status.type)
+                    ),
+                    updated_at=datetime.utcnow()
+                ).execution_options(synchronize_session=False)
+            )
+        
+        # 読書統計・時系列カウンターを更新（返却と同一トランザクション）
+        reading_stats = ReadingStatsService(self.db)
+        for (loan_user_id, book_id), count in Counter((loan.user_id, loan.book_id) for loan in returned).items():
+            reading_stats.record_completed_read(loan_user_id, book_id, today, count=count)
+        timeseries = TimeSeriesService(self.db)
+        timeseries.record(ActivityMetric.LOANS_RETURNED, today, count=len(returned))
+        timeseries.record(ActivityMetric.RESERVATIONS_READY, count=len(handoffs))
+        
+        # 予約者への通知はアウトボックスに積み、配信はディスパッチャーに任せる
+        NotificationService(self.db).enqueue_reservation_ready([reservation.id for reservation in handoffs])
+        AvailabilityEstimateService(self.db).refresh(list(returned_per_book))
+        
+        self.db.commit()
+        
+        for index, entry in enumerate(entries):
+            loan = targets.get(index)
+            if loan is None:
+                continue
+            entry["loan_id"] = loan.id
+            if loan.id in returned_ids:
+                entry["success"] = True
+                entry["message"] = "返却しました"
+            else:
+                entry["message"] = "この貸出は既に返却済みまたは無効です"
+        
+        logger.info(f"一括返却: {len(returned)}/{len(entries)}冊, 予約引き当て{len(handoffs)}件")
+        return entries
+    
     def _process_book_return_reservations(self, book_id: int):
         """書籍返却時の予約処理（内部メソッド）"""
         from src.services.reservation_service import ReservationService
@@ -250,23 +603,10 @@ class LoanService:
         next_reservation = reservation_service.process_book_return(book_id)
         
         if next_reservation:
-            # 通知処理（将来的にメール通知などを実装）
-            self._notify_reservation_ready(next_reservation)
             logger.info(f"予約処理完了: 予約ID{next_reservation.id}, ユーザーID{next_reservation.user_id}")
         
         return next_reservation
     
-    def _notify_reservation_ready(self, reservation):
-        """予約準備完了通知（基本版）"""
-        # 現在はログ出力のみ。将来的にメール通知やプッシュ通知を実装
-        logger.info(f"通知: ユーザーID{reservation.user_id}の予約書籍（書籍ID{reservation.book_id}）が準備完了しました")
-        
-        # TODO: 以下の機能を将来実装
-        # - メール通知
-        # - システム内通知
-        # - プッシュ通知
-        # - SMS通知（オプション）
-    
     def extend_loan(self, loan_id: int, extension_days: int = 7) -> LoanResponse:
         """貸出期間を延長"""
         loan = self.db.query(Loan).filter(Loan.id == loan_id).first()
@@ -277,26 +617,22 @@ class LoanService:
             raise ValueError("アクティブな貸出のみ延長できます")
         
         # 延長回数制限チェック
-        max_renewals = 2
-        if loan.renewal_count >= max_renewals:
-            raise ValueError(f"延長上限回数（{max_renewals}回）に達しています")
+        if loan.renewal_count >= MAX_RENEWALS:
+            raise ValueError(f"延長上限回数（{MAX_RENEWALS}回）に達しています")
         
         # 予約がある場合は延長不可
-        from src.models.reservation import Reservation, ReservationStatus
-        pending_reservations = self.db.query(Reservation).filter(
-            and_(
-                Reservation.book_id == loan.book_id,
-                Reservation.status == ReservationStatus.PENDING
-            )
-        ).count()
+        pending_reservations = self.db.query(Book.pending_reservation_count).filter(
+            Book.id == loan.book_id
+        ).scalar()
         
-        if pending_reservations > 0:
+        if pending_reservations:
             raise ValueError("この書籍には予約が入っているため延長できません")
         
         # 延長処理
         loan.due_date = loan.due_date + timedelta(days=extension_days)
         loan.renewal_count += 1
         
+        TimeSeriesService(self.db).record(ActivityMetric.LOANS_RENEWED)
         self.db.commit()
         self.db.refresh(loan)
         
@@ -321,7 +657,9 @@ class LoanService:
         book = self.db.query(Book).filter(Book.id == loan.book_id).first()
         if book:
             book.status = "LOST"
+            book.active_loan_count = Book.active_loan_count - 1
         
+        TimeSeriesService(self.db).record(ActivityMetric.LOANS_LOST)
         self.db.commit()
         self.db.refresh(loan)
         
@@ -332,66 +670,168 @@ class LoanService:
         """期限切れ貸出一覧を取得"""
         loans = self.db.query(Loan).filter(
             and_(
-                Loan.status == LoanStatus.ACTIVE,
+                Loan.status.in_(OPEN_LOAN_STATUSES),
                 Loan.due_date < date.today()
             )
         ).all()
         return [LoanResponse.model_validate(loan) for loan in loans]
     
     def get_loan_statistics(self) -> Dict[str, Any]:
-        """貸出統計情報を取得"""
-        total_loans = self.db.query(Loan).count()
-        active_loans = self.db.query(Loan).filter(Loan.status == LoanStatus.ACTIVE).count()
-        overdue_loans = self.db.query(Loan).filter(
-            and_(
-                Loan.status == LoanStatus.ACTIVE,
-                Loan.due_date < date.today()
-            )
-        ).count()
-        returned_loans = self.db.query(Loan).filter(Loan.status == LoanStatus.RETURNED).count()
-        lost_loans = self.db.query(Loan).filter(Loan.status == LoanStatus.LOST).count()
+        """貸出統計情報を取得（アーカイブを含む貸出履歴を条件付き集計で1クエリ）"""
+        history = loan_history()
+        row = self.db.query(
+            func.count(history.c.id).label("total_loans"),
+            func.sum(case((history.c.status.in_(OPEN_LOAN_STATUSES), 1), else_=0)).label("active_loans"),
+            func.sum(case(
+                (and_(history.c.status.in_(OPEN_LOAN_STATUSES), history.c.due_date < date.today()), 1),
+                else_=0
+            )).label("overdue_loans"),
+            func.sum(case((history.c.status == LoanStatus.RETURNED, 1), else_=0)).label("returned_loans"),
+            func.sum(case((history.c.status == LoanStatus.LOST, 1), else_=0)).label("lost_loans"),
+        ).one()
+        
+        total_loans = row.total_loans or 0
+        returned_loans = int(row.returned_loans or 0)
         
         return {
             "total_loans": total_loans,
-            "active_loans": active_loans,
-            "overdue_loans": overdue_loans,
+            "active_loans": int(row.active_loans or 0),
+            "overdue_loans": int(row.overdue_loans or 0),
             "returned_loans": returned_loans,
-            "lost_loans": lost_loans,
+            "lost_loans": int(row.lost_loans or 0),
             "return_rate": round((returned_loans / total_loans * 100) if total_loans > 0 else 0, 2)
         }
     
-    def update_overdue_loans(self) -> int:
-        """延滞中の貸出を自動検出してステータスを更新"""
+    def sweep_overdue_loans(self) -> List[Dict[str, Any]]:
+        """期限切れの貸出を1文の UPDATE で OVERDUE に更新（スケジューラーから実行）
+
+        アドバイザリロックで同時実行を1ワーカーに限定し、更新した貸出を返す。
+        更新した貸出ごとの延滞通知は同じトランザクションでアウトボックスに積む。
+        """
+        if not try_advisory_xact_lock(self.db, "loan_overdue_sweep"):
+            logger.info("延滞スイープは他のワーカーで実行中のためスキップしました")
+            self.db.rollback()
+            return []
+        
+        overdue_condition = and_(
+            Loan.status == LoanStatus.ACTIVE,
+            Loan.due_date < date.today()
+        )
+        stmt = update(Loan).values(status=LoanStatus.OVERDUE, updated_at=datetime.utcnow())
+        
         try:
-            # ACTIVEステータスで期限切れの貸出を取得
-            overdue_loans = self.db.query(Loan).filter(
-                and_(
-                    Loan.status == LoanStatus.ACTIVE,
-                    Loan.due_date < date.today()
-                )
-            ).all()
-            
-            updated_count = 0
-            for loan in overdue_loans:
-                # OVERDUEステータスに更新
-                loan.status = LoanStatus.OVERDUE
-                updated_count += 1
-                logger.info(f"Loan {loan.id} marked as overdue (book_id: {loan.book_id}, user_id: {loan.user_id})")
+            if self.db.get_bind().dialect.update_returning:
+                rows = self.db.execute(
+                    stmt.where(overdue_condition).returning(Loan.id, Loan.user_id, Loan.book_id, Loan.due_date),
+                    execution_options={"synchronize_session": False}
+                ).all()
+            else:
+                rows = self.db.execute(
+                    select(Loan.id, Loan.user_id, Loan.book_id, Loan.due_date).where(overdue_condition).with_for_update()
+                ).all()
+                if rows:
+                    self.db.execute(
+                        stmt.where(Loan.id.in_([row.id for row in rows])),
+                        execution_options={"synchronize_session": False}
+                    )
             
+            TimeSeriesService(self.db).record(ActivityMetric.LOANS_OVERDUE, count=len(rows))
+            # 延滞の通知は同じコミットでアウトボックスに積む
+            NotificationService(self.db).enqueue_overdue_notices([row.id for row in rows])
             self.db.commit()
-            return updated_count
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error sweeping overdue loans: {str(e)}")
+            raise e
+        
+        if rows:
+            logger.info(f"延滞スイープ: {len(rows)}件を延滞に更新")
+        return [
+            {"loan_id": row.id, "user_id": row.user_id, "book_id": row.book_id, "due_date": row.due_date}
+            for row in rows
+        ]
+    
+    def auto_renew_loans(
+        self,
+        due_within_days: Optional[int] = None,
+        extension_days: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """返却期限が近い貸出を1文の UPDATE で自動延長（スケジューラーから実行）
+
+        対象は返却期限まで due_within_days 日以内の ACTIVE な貸出のうち、延長回数が上限未満で
+        書籍に待機中の予約がないもの。延長した利用者ごとにまとめて1件の通知を積む。
+        """
+        due_within_days = settings.AUTO_RENEW_DUE_WITHIN_DAYS if due_within_days is None else due_within_days
+        extension_days = extension_days or settings.AUTO_RENEW_EXTENSION_DAYS
+        if due_within_days >= extension_days:
+            # 延長後も対象期間に残り、同じ貸出が実行のたびに延長されてしまう
+            raise ValueError("自動延長の対象日数は延長日数より短くしてください")
+        
+        if not try_advisory_xact_lock(self.db, "loan_auto_renew"):
+            logger.info("自動延長は他のワーカーで実行中のためスキップしました")
+            self.db.rollback()
+            return []
+        
+        # 対象の返却期限は数日分しかないため、延長後の期限は日付ごとに計算した値を CASE で割り当てる
+        # （DBごとに異なる日付演算を使わない）
+        due_dates = [date.today() + timedelta(days=offset) for offset in range(due_within_days + 1)]
+        renewable_condition = and_(
+            Loan.status == LoanStatus.ACTIVE,
+            Loan.due_date.in_(due_dates),
+            Loan.renewal_count < MAX_RENEWALS,
+            Loan.book_id.in_(select(Book.id).where(Book.pending_reservation_count == 0))
+        )
+        stmt = update(Loan).values(
+            due_date=case(
+                {due_date: due_date + timedelta(days=extension_days) for due_date in due_dates},
+                value=Loan.due_date
+            ),
+            renewal_count=Loan.renewal_count + 1,
+            updated_at=datetime.utcnow()
+        )
+        
+        try:
+            if self.db.get_bind().dialect.update_returning:
+                rows = self.db.execute(
+                    stmt.where(renewable_condition).returning(Loan.id, Loan.user_id, Loan.book_id, Loan.due_date),
+                    execution_options={"synchronize_session": False}
+                ).all()
+            else:
+                locked = self.db.execute(
+                    select(Loan.id).where(renewable_condition).with_for_update()
+                ).scalars().all()
+                rows = []
+                if locked:
+                    self.db.execute(
+                        stmt.where(Loan.id.in_(locked)),
+                        execution_options={"synchronize_session": False}
+                    )
+                    rows = self.db.execute(
+                        select(Loan.id, Loan.user_id, Loan.book_id, Loan.due_date).where(Loan.id.in_(locked))
+                    ).all()
             
+            renewed = [
+                {"loan_id": row.id, "user_id": row.user_id, "book_id": row.book_id, "due_date": row.due_date}
+                for row in rows
+            ]
+            TimeSeriesService(self.db).record(ActivityMetric.LOANS_RENEWED, count=len(renewed))
+            NotificationService(self.db).enqueue_auto_renewal_summaries(renewed)
+            self.db.commit()
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error updating overdue loans: {str(e)}")
+            logger.error(f"Error auto-renewing loans: {str(e)}")
             raise e
+        
+        if renewed:
+            logger.info(f"自動延長: {len(renewed)}件, 利用者{len({loan['user_id'] for loan in renewed})}人")
+        return renewed
     
     def get_overdue_loans(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
         """延滞中の貸出を詳細情報付きで取得"""
         overdue_loans = self.db.query(Loan)\
             .join(Book, Loan.book_id == Book.id)\
             .join(User, Loan.user_id == User.id)\
-            .filter(Loan.status == LoanStatus.OVERDUE)\
+            .filter(Loan.status.in_(OPEN_LOAN_STATUSES), Loan.due_date < date.today())\
             .offset(skip).limit(limit).all()
         
         result = []
@@ -426,55 +866,57 @@ class LoanService:
         
         return result
     
-    def get_books_with_loan_status(self, skip: int = 0, limit: int = 100, include_overdue_info: bool = True) -> List[Dict[str, Any]]:
-        """貸出状況を含む書籍一覧を取得（延滞情報含む）"""
-        from sqlalchemy.orm import joinedload
-        
-        books = self.db.query(Book)\
-            .options(joinedload(Book.loans))\
-            .offset(skip).limit(limit).all()
-        
+    def get_books_with_loan_status(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        include_overdue_info: bool = True,
+        status_filter: Optional[str] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """貸出状況を含む書籍一覧を取得（延滞情報含む）
+
+        書籍ごとに現在の貸出（未返却のうち返却期限が最も早いもの）と借り手だけを
+        LEFT JOIN した1クエリで取得し、絞り込み・ページングもSQL側で行う。
+        """
+        current_loan = self._current_loan_subquery()
+        is_overdue = self._current_loan_overdue(current_loan)
+
+        query = self.db.query(
+            Book,
+            current_loan.c.id.label("loan_id"),
+            current_loan.c.user_id.label("loan_user_id"),
+            current_loan.c.due_date.label("loan_due_date"),
+            is_overdue.label("is_overdue"),
+            User.username.label("borrower_username"),
+            User.full_name.label("borrower_full_name")
+        ).outerjoin(
+            current_loan, and_(current_loan.c.book_id == Book.id, current_loan.c.loan_rank == 1)
+        ).outerjoin(
+            User, User.id == current_loan.c.user_id
+        )
+        query = self._filter_books(query, current_loan, title=title, author=author, status_filter=status_filter)
+        rows = query.order_by(Book.id).offset(skip).limit(limit).all()
+
         result = []
-        for book in books:
-            # 現在のアクティブな貸出を確認
-            active_loan = None
-            overdue_loan = None
-            
-            for loan in book.loans:
-                if loan.status == LoanStatus.ACTIVE:
-                    active_loan = loan
-                elif loan.status == LoanStatus.OVERDUE:
-                    overdue_loan = loan
-            
-            # 書籍の詳細ステータスを決定
+        for row in rows:
+            book = row.Book
+            is_borrowed = row.loan_id is not None
             detailed_status = {
                 "basic_status": book.status.value if hasattr(book.status, 'value') else str(book.status),
-                "is_borrowed": active_loan is not None or overdue_loan is not None,
-                "is_overdue": overdue_loan is not None,
-                "days_overdue": 0,
-                "borrower_info": None
+                "is_borrowed": is_borrowed,
+                "is_overdue": bool(row.is_overdue),
+                "days_overdue": (date.today() - row.loan_due_date).days if row.is_overdue else 0,
+                "borrower_info": {
+                    "user_id": row.loan_user_id,
+                    "username": row.borrower_username,
+                    "full_name": row.borrower_full_name,
+                    "due_date": row.loan_due_date,
+                    "loan_id": row.loan_id
+                } if is_borrowed and include_overdue_info else None
             }
-            
-            # 延滞情報がある場合
-            if overdue_loan and include_overdue_info:
-                detailed_status["days_overdue"] = (date.today() - overdue_loan.due_date).days
-                detailed_status["borrower_info"] = {
-                    "user_id": overdue_loan.user_id,
-                    "username": overdue_loan.user.username if overdue_loan.user else None,
-                    "full_name": overdue_loan.user.full_name if overdue_loan.user else None,
-                    "due_date": overdue_loan.due_date,
-                    "loan_id": overdue_loan.id
-                }
-            # アクティブな貸出情報がある場合
-            elif active_loan and include_overdue_info:
-                detailed_status["borrower_info"] = {
-                    "user_id": active_loan.user_id,
-                    "username": active_loan.user.username if active_loan.user else None,
-                    "full_name": active_loan.user.full_name if active_loan.user else None,
-                    "due_date": active_loan.due_date,
-                    "loan_id": active_loan.id
-                }
-            
+
             book_data = {
                 "id": book.id,
                 "title": book.title,
@@ -493,5 +935,81 @@ class LoanService:
                 "updated_at": book.updated_at
             }
             result.append(book_data)
-        
-        return result 
\ No newline at end of file
+
+        return result
+
+    def get_books_loan_status_counts(
+        self,
+        title: Optional[str] = None,
+        author: Optional[str] = None
+    ) -> Dict[str, int]:
+        """タイトル・著者で絞り込んだ書籍の貸出状況別件数（条件付き集計で1クエリ）"""
+        current_loan = self._current_loan_subquery()
+        is_overdue = self._current_loan_overdue(current_loan)
+
+        query = self.db.query(
+            func.count(Book.id).label("total_books"),
+            func.sum(case((current_loan.c.id.isnot(None), 1), else_=0)).label("borrowed_count"),
+            func.sum(case((is_overdue, 1), else_=0)).label("overdue_count")
+        ).select_from(Book).outerjoin(
+            current_loan, and_(current_loan.c.book_id == Book.id, current_loan.c.loan_rank == 1)
+        )
+        row = self._filter_books(query, current_loan, title=title, author=author).one()
+
+        total_books = row.total_books or 0
+        borrowed_count = int(row.borrowed_count or 0)
+        return {
+            "total_books": total_books,
+            "borrowed_count": borrowed_count,
+            "overdue_count": int(row.overdue_count or 0),
+            "available_count": total_books - borrowed_count
+        }
+
+    @staticmethod
+    def _current_loan_subquery():
+        """書籍ごとの未返却の貸出に返却期限順の順位を付けたサブクエリ（順位1が現在の貸出）"""
+        return select(
+            Loan.id,
+            Loan.book_id,
+            Loan.user_id,
+            Loan.due_date,
+            Loan.status,
+            func.row_number().over(
+                partition_by=Loan.book_id,
+                order_by=(Loan.due_date, Loan.id)
+            ).label("loan_rank")
+        ).where(
+            Loan.return_date.is_(None),
+            Loan.status.in_(OPEN_LOAN_STATUSES)
+        ).subquery()
+
+    @staticmethod
+    def _current_loan_overdue(current_loan):
+        """現在の貸出が延滞中かどうか（延滞スイープ前でも返却期限で判定）"""
+        return and_(
+            current_loan.c.id.isnot(None),
+            or_(current_loan.c.status == LoanStatus.OVERDUE, current_loan.c.due_date < date.today())
+        )
+
+    def _filter_books(
+        self,
+        query,
+        current_loan,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        status_filter: Optional[str] = None
+    ):
+        """書籍一覧の絞り込み条件をクエリに適用"""
+        if title:
+            query = query.filter(Book.title.ilike(f"%{title}%"))
+        if author:
+            query = query.filter(Book.author.ilike(f"%{author}%"))
+
+        if status_filter == "available":
+            query = query.filter(current_loan.c.id.is_(None))
+        elif status_filter == "borrowed":
+            # 貸出中: 通常の貸出中 + 延滞中（両方含む）
+            query = query.filter(current_loan.c.id.isnot(None))
+        elif status_filter == "overdue":
+            query = query.filter(self._current_loan_overdue(current_loan))
+        return query
\ No newline at end of file
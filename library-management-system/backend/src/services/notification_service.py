@@ -0,0 +1,263 @@
+"""
+通知サービス - ビジネスロジック層
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, exists, literal, cast, String, Integer, DateTime
+from typing import List, Dict, Optional, Any
+from datetime import date, datetime, timedelta
+from collections import defaultdict
+import hashlib
+import logging
+
+from src.config.settings import Settings
+from src.models.book import Book
+from src.models.loan import Loan, LoanStatus
+from src.models.notification_outbox import NotificationOutbox, NotificationStatus
+from src.models.reservation import Reservation
+from src.models.user import User
+from src.utils.locks import try_advisory_xact_lock
+from src.utils.notification_sinks import NotificationSink, OutgoingNotification, build_sink
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+KIND_RESERVATION_READY = "reservation_ready"
+KIND_LOAN_DUE_SOON = "loan_due_soon"
+KIND_LOAN_OVERDUE = "loan_overdue"
+KIND_LOAN_AUTO_RENEWED = "loan_auto_renewed"
+
+OUTBOX_COLUMNS = [
+    "kind", "user_id", "subject", "message", "dedupe_key",
+    "status", "attempts", "next_attempt_at", "created_at"
+]
+
+
+class NotificationService:
+    """通知サービスクラス
+
+    通知は状態変更と同じトランザクションでアウトボックスに積むだけにし、
+    配信は dispatch_pending がバッチ・再試行付きで行う。返却等の処理は配信を待たない。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue_reservation_ready(self, reservation_ids: List[int]) -> int:
+        """予約準備完了の通知を積む（コミットは呼び出し側で行う）"""
+        if not reservation_ids:
+            return 0
+        # 未フラッシュの予約の状態変更を INSERT ... SELECT から見えるようにする
+        self.db.flush()
+
+        dedupe_key = literal(f"{KIND_RESERVATION_READY}:") + cast(Reservation.id, String)
+        message = (
+            literal("予約した「") + Book.title
+            + literal("」の準備ができました。受取期限: ") + cast(Reservation.expiry_date, String)
+        )
+        source = self._outbox_select(
+            KIND_RESERVATION_READY, Reservation.user_id, "予約書籍の準備ができました", message, dedupe_key
+        ).join_from(
+            Reservation, Book, Book.id == Reservation.book_id
+        ).where(
+            Reservation.id.in_(reservation_ids)
+        )
+        return self._insert(source)
+
+    def enqueue_due_soon_reminders(self, days: Optional[int] = None) -> int:
+        """返却期限が近い貸出の通知を1回の走査でまとめて積み、コミットする
+
+        返却期限ごとに1回だけ通知する（延長で期限が変わった場合は再通知）。
+        """
+        days = settings.DUE_SOON_REMINDER_DAYS if days is None else days
+        if not try_advisory_xact_lock(self.db, "due_soon_reminder"):
+            logger.info("返却期限通知: 他のワーカーが実行中のためスキップ")
+            return 0
+
+        today = date.today()
+        dedupe_key = (
+            literal(f"{KIND_LOAN_DUE_SOON}:") + cast(Loan.id, String)
+            + literal(":") + cast(Loan.due_date, String)
+        )
+        message = (
+            literal("貸出中の「") + Book.title
+            + literal("」の返却期限は ") + cast(Loan.due_date, String) + literal(" です。")
+        )
+        source = self._outbox_select(
+            KIND_LOAN_DUE_SOON, Loan.user_id, "返却期限が近づいています", message, dedupe_key
+        ).join_from(
+            Loan, Book, Book.id == Loan.book_id
+        ).where(
+            Loan.status == LoanStatus.ACTIVE,
+            Loan.due_date >= today,
+            Loan.due_date <= today + timedelta(days=days)
+        )
+        enqueued = self._insert(source)
+        self.db.commit()
+
+        logger.info(f"返却期限通知: {enqueued}件")
+        return enqueued
+
+    def enqueue_overdue_notices(self, loan_ids: List[int]) -> int:
+        """延滞になった貸出の通知を積む（コミットは呼び出し側で行う）
+
+        延滞スイープが RETURNING で得た貸出IDを渡す。返却期限ごとに1回だけ通知する。
+        """
+        if not loan_ids:
+            return 0
+
+        dedupe_key = (
+            literal(f"{KIND_LOAN_OVERDUE}:") + cast(Loan.id, String)
+            + literal(":") + cast(Loan.due_date, String)
+        )
+        message = (
+            literal("貸出中の「") + Book.title
+            + literal("」の返却期限（") + cast(Loan.due_date, String) + literal("）が過ぎています。速やかに返却してください。")
+        )
+        source = self._outbox_select(
+            KIND_LOAN_OVERDUE, Loan.user_id, "返却期限を過ぎています", message, dedupe_key
+        ).join_from(
+            Loan, Book, Book.id == Loan.book_id
+        ).where(
+            Loan.id.in_(loan_ids)
+        )
+        return self._insert(source)
+
+    def enqueue_auto_renewal_summaries(self, renewed_loans: List[Dict[str, Any]]) -> int:
+        """自動延長した貸出を利用者ごとに1件の通知にまとめて積む（コミットは呼び出し側で行う）
+
+        renewed_loans は loan_id / user_id / book_id / due_date（延長後）を持つ辞書のリスト。
+        同じ日に複数回実行しても、延長した貸出と延長後の期限の組が異なれば別の通知になる。
+        """
+        if not renewed_loans:
+            return 0
+        
+        titles = dict(self.db.query(Book.id, Book.title).filter(
+            Book.id.in_({loan["book_id"] for loan in renewed_loans})
+        ).all())
+        loans_by_user = defaultdict(list)
+        for loan in sorted(renewed_loans, key=lambda loan: (loan["due_date"], loan["loan_id"])):
+            loans_by_user[loan["user_id"]].append(loan)
+        
+        dedupe_keys = {
+            user_id: f"{KIND_LOAN_AUTO_RENEWED}:{user_id}:" + hashlib.sha1(
+                ",".join(f"{loan['loan_id']}:{loan['due_date']}" for loan in loans).encode()
+            ).hexdigest()
+            for user_id, loans in loans_by_user.items()
+        }
+        existing = {
+            row.dedupe_key for row in self.db.query(NotificationOutbox.dedupe_key).filter(
+                NotificationOutbox.dedupe_key.in_(list(dedupe_keys.values()))
+            ).all()
+        }
+        
+        now = datetime.utcnow()
+        rows = []
+        for user_id, loans in loans_by_user.items():
+            if dedupe_keys[user_id] in existing:
+                continue
+            lines = [f"・「{titles.get(loan['book_id'], '')}」 新しい返却期限: {loan['due_date']}" for loan in loans]
+            rows.append({
+                "kind": KIND_LOAN_AUTO_RENEWED,
+                "user_id": user_id,
+                "subject": "貸出を自動延長しました",
+                "message": "次の貸出の返却期限を自動延長しました。\n" + "\n".join(lines),
+                "dedupe_key": dedupe_keys[user_id],
+                "status": NotificationStatus.PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now
+            })
+        if rows:
+            self.db.execute(NotificationOutbox.__table__.insert(), rows)
+        return len(rows)
+    
+    def dispatch_pending(self, sink: Optional[NotificationSink] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """配信待ちの通知をバッチ単位で配信（失敗は指数バックオフで再試行）"""
+        sink = sink or build_sink(settings)
+        batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        result = {"sent": 0, "retrying": 0, "failed": 0}
+
+        while True:
+            now = datetime.utcnow()
+            # 複数ディスパッチャーが同じ行を取らないよう行ロック（ロック中の行は読み飛ばす）
+            rows = self.db.query(NotificationOutbox, User.email).outerjoin(
+                User, User.id == NotificationOutbox.user_id
+            ).filter(
+                NotificationOutbox.status == NotificationStatus.PENDING,
+                NotificationOutbox.next_attempt_at <= now
+            ).order_by(NotificationOutbox.id).limit(batch_size).with_for_update(
+                skip_locked=True, of=NotificationOutbox
+            ).all()
+            if not rows:
+                self.db.rollback()
+                break
+
+            for notification, email in rows:
+                notification.attempts += 1
+                try:
+                    sink.send(OutgoingNotification(
+                        id=notification.id,
+                        kind=notification.kind,
+                        user_id=notification.user_id,
+                        email=email,
+                        subject=notification.subject,
+                        message=notification.message
+                    ))
+                except Exception as e:
+                    notification.last_error = str(e)[:1000]
+                    if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                        notification.status = NotificationStatus.FAILED
+                        result["failed"] += 1
+                        logger.error(f"通知配信失敗（再試行上限）: 通知ID{notification.id}: {str(e)}")
+                    else:
+                        delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (notification.attempts - 1)
+                        notification.next_attempt_at = now + timedelta(seconds=delay)
+                        result["retrying"] += 1
+                        logger.warning(f"通知配信失敗（{delay}秒後に再試行）: 通知ID{notification.id}: {str(e)}")
+                    continue
+
+                notification.status = NotificationStatus.SENT
+                notification.sent_at = datetime.utcnow()
+                result["sent"] += 1
+            self.db.commit()
+
+            if len(rows) < batch_size:
+                break
+
+        if any(result.values()):
+            logger.info(f"通知配信: {result}")
+        return result
+
+    def purge_sent(self) -> int:
+        """配信済みから保持期間を過ぎた通知を削除"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        deleted = self.db.query(NotificationOutbox).filter(
+            NotificationOutbox.status == NotificationStatus.SENT,
+            NotificationOutbox.sent_at < cutoff
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+    @staticmethod
+    def _outbox_select(kind: str, user_id_column, subject: str, message, dedupe_key):
+        """アウトボックスへの INSERT ... SELECT 用の SELECT（既に積まれた通知は除外）"""
+        now = datetime.utcnow()
+        return select(
+            literal(kind),
+            user_id_column,
+            literal(subject),
+            message,
+            dedupe_key,
+            literal(NotificationStatus.PENDING),
+            literal(0, type_=Integer),
+            literal(now, type_=DateTime),
+            literal(now, type_=DateTime)
+        ).where(
+            ~exists().where(NotificationOutbox.dedupe_key == dedupe_key)
+        )
+
+    def _insert(self, source) -> int:
+        """SELECT 結果をアウトボックスに挿入し、件数を返す"""
+        return self.db.execute(
+            NotificationOutbox.__table__.insert().from_select(OUTBOX_COLUMNS, source)
+        ).rowcount
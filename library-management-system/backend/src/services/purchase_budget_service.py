@@ -0,0 +1,163 @@
+"""
+購入予算集計サービス - ビジネスロジック層
+"""
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, datetime
+from decimal import Decimal
+from collections import defaultdict
+import logging
+
+from src.models.purchase_budget_rollup import PurchaseBudgetRollup
+from src.models.purchase_request import PurchaseRequest, PurchaseRequestStatus
+from src.utils.counters import increment_counter
+
+logger = logging.getLogger(__name__)
+
+# 予算に計上する（承認済み以降の）購入申請ステータス
+BUDGET_STATUSES = (
+    PurchaseRequestStatus.APPROVED,
+    PurchaseRequestStatus.ORDERED,
+    PurchaseRequestStatus.RECEIVED,
+)
+
+
+def _month_start(value) -> date:
+    """日時を月初日に丸める"""
+    value = value.date() if isinstance(value, datetime) else value
+    return value.replace(day=1)
+
+
+class PurchaseBudgetService:
+    """購入予算集計サービスクラス
+
+    購入申請の作成・ステータス遷移・見積金額の変更のたびに (月, 部署, ステータス) の
+    集計行を加算し、予算の内訳や統計は集計行の読み取りだけで返す。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def move(
+        self,
+        request: PurchaseRequest,
+        from_status: Optional[PurchaseRequestStatus],
+        to_status: Optional[PurchaseRequestStatus]
+    ) -> None:
+        """申請1件分の件数・金額を from_status から to_status の集計行へ移す（コミットは呼び出し側で行う）
+
+        作成時は from_status を None にする。ステータス変更の前後どちらで呼んでもよい。
+        """
+        if from_status == to_status:
+            return
+        if request.created_at is None:
+            self.db.flush()
+        amount = request.estimated_price or Decimal(0)
+        if from_status is not None:
+            self._add(request, from_status, -1, -amount)
+        if to_status is not None:
+            self._add(request, to_status, 1, amount)
+
+    def adjust_amount(self, request: PurchaseRequest, old_amount: Optional[Decimal]) -> None:
+        """見積金額の変更分を現在のステータスの集計行に反映（コミットは呼び出し側で行う）"""
+        delta = (request.estimated_price or Decimal(0)) - (old_amount or Decimal(0))
+        if delta:
+            self._add(request, request.status, 0, delta)
+
+    def _add(self, request: PurchaseRequest, status: PurchaseRequestStatus, count: int, amount: Decimal) -> None:
+        """申請の作成月・申請時点の部署の集計行に加算"""
+        increment_counter(
+            self.db, PurchaseBudgetRollup,
+            {
+                "month": _month_start(request.created_at),
+                "department": request.department or "",
+                "status": status.value
+            },
+            {"request_count": count, "total_amount": amount}
+        )
+
+    def get_rollup(
+        self,
+        from_month: Optional[date] = None,
+        to_month: Optional[date] = None,
+        department: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """期間（月単位、両端を含む）・部署で絞り込んだ予算の内訳を取得"""
+        if from_month and to_month and from_month > to_month:
+            raise ValueError("開始月は終了月以前を指定してください")
+
+        query = self.db.query(PurchaseBudgetRollup).filter(PurchaseBudgetRollup.request_count != 0)
+        if from_month:
+            query = query.filter(PurchaseBudgetRollup.month >= _month_start(from_month))
+        if to_month:
+            query = query.filter(PurchaseBudgetRollup.month <= _month_start(to_month))
+        if department is not None:
+            query = query.filter(PurchaseBudgetRollup.department == department)
+        rows = query.order_by(
+            PurchaseBudgetRollup.month, PurchaseBudgetRollup.department, PurchaseBudgetRollup.status
+        ).all()
+
+        budget_values = {status.value for status in BUDGET_STATUSES}
+        return {
+            "rows": [
+                {
+                    "month": row.month,
+                    "department": row.department or None,
+                    "status": row.status,
+                    "request_count": row.request_count,
+                    "total_amount": float(row.total_amount or 0)
+                }
+                for row in rows
+            ],
+            "total_requests": sum(row.request_count for row in rows),
+            "total_budget": float(sum(
+                (row.total_amount or 0) for row in rows if row.status in budget_values
+            ))
+        }
+
+    def status_totals(self) -> Dict[PurchaseRequestStatus, Tuple[int, Decimal]]:
+        """ステータス -> (件数, 見積金額の合計)（全期間・全部署）"""
+        totals = {status: (0, Decimal(0)) for status in PurchaseRequestStatus}
+        for row in self.db.query(
+            PurchaseBudgetRollup.status,
+            PurchaseBudgetRollup.request_count,
+            PurchaseBudgetRollup.total_amount
+        ).all():
+            status = PurchaseRequestStatus(row.status)
+            count, amount = totals[status]
+            totals[status] = (count + row.request_count, amount + (row.total_amount or 0))
+        return totals
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """購入申請から集計行を再構築し、行数を返す"""
+        totals: Dict[Tuple[date, str, str], List] = defaultdict(lambda: [0, Decimal(0)])
+        rows = self.db.query(
+            PurchaseRequest.created_at,
+            PurchaseRequest.status,
+            PurchaseRequest.estimated_price,
+            PurchaseRequest.department
+        ).yield_per(batch_size)
+        for row in rows:
+            total = totals[(_month_start(row.created_at), row.department or "", row.status.value)]
+            total[0] += 1
+            total[1] += row.estimated_price or Decimal(0)
+
+        self.db.execute(PurchaseBudgetRollup.__table__.delete())
+        if totals:
+            self.db.execute(
+                PurchaseBudgetRollup.__table__.insert(),
+                [
+                    {
+                        "month": month,
+                        "department": department,
+                        "status": status,
+                        "request_count": count,
+                        "total_amount": amount
+                    }
+                    for (month, department, status), (count, amount) in totals.items()
+                ]
+            )
+        self.db.commit()
+
+        logger.info(f"購入予算集計再構築: {len(totals)}行")
+        return len(totals)
@@ -2,19 +2,31 @@
 購入申請サービス - ビジネスロジック層
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_, func, update
+from typing import List, Optional, Dict, Any, Union
 from datetime import date, datetime, timedelta
 import logging
 import re
 from urllib.parse import unquote
 
-from src.models.purchase_request import PurchaseRequest, PurchaseRequestStatus
+from src.models.book import Book
+from src.models.purchase_request import PurchaseRequest, PurchaseRequestStatus, ACTIVE_PURCHASE_REQUEST_STATUSES
 from src.models.user import User
-from src.schemas.purchase_request import PurchaseRequestCreate, PurchaseRequestUpdate, PurchaseRequestResponse
+from src.schemas.purchase_request import PurchaseRequestCreate, PurchaseRequestUpdate, PurchaseRequestResponse, DuplicateCheckItem
+from src.services.purchase_budget_service import PurchaseBudgetService, BUDGET_STATUSES
+from src.utils.book_keys import normalize_isbn13, title_author_key
 
 logger = logging.getLogger(__name__)
 
+# 旧実装で admin_notes に保存していた Amazon URL（backfill_amazon_urls で amazon_url 列へ移行）
+AMAZON_URL_PATTERN = re.compile(r'Amazon URL: (https?://[^\s]+)')
+
+# 一覧で返す購入申請の列（PurchaseRequestResponse のフィールドに対応）
+LISTING_FIELDS = (
+    "id", "user_id", "title", "author", "isbn", "publisher", "estimated_price", "reason",
+    "image_url", "amazon_url", "status", "priority", "admin_notes", "created_at", "updated_at"
+)
+
 
 class PurchaseRequestService:
     """購入申請サービスクラス"""
@@ -30,131 +42,124 @@ class PurchaseRequestService:
         user_id: Optional[int] = None,
         priority: Optional[int] = None,
         pending_only: bool = False
-    ) -> List[PurchaseRequestResponse]:
-        """購入申請一覧を取得"""
-        query = self.db.query(PurchaseRequest).join(User)
-        
-        # フィルタリング
-        if status:
-            query = query.filter(PurchaseRequest.status == status)
-        
-        if user_id:
-            query = query.filter(PurchaseRequest.user_id == user_id)
-        
-        if priority:
-            query = query.filter(PurchaseRequest.priority == priority)
-        
-        if pending_only:
-            query = query.filter(PurchaseRequest.status == PurchaseRequestStatus.PENDING)
+    ) -> List[Dict[str, Any]]:
+        """購入申請一覧を取得（申請者情報を含む1クエリの射影）"""
+        query = self._filter_requests(self._listing_query(), status, user_id, priority, pending_only)
         
         # 優先度、作成日順でソート
-        requests = query.order_by(
+        rows = query.order_by(
             PurchaseRequest.priority, 
             PurchaseRequest.created_at.desc()
         ).offset(skip).limit(limit).all()
-        
-        # ユーザー情報を含めてレスポンスを作成
-        result = []
-        for request in requests:
-            # PurchaseRequestResponseに変換
-            response_data = PurchaseRequestResponse.model_validate(request)
-            response_dict = response_data.model_dump()
-            
-            # ユーザー情報を追加
-            response_dict['user'] = {
-                'id': request.user.id,
-                'full_name': request.user.full_name or request.user.username,
-                'email': request.user.email
-            }
-            
-            # admin_notesからAmazon URLを抽出
-            if request.admin_notes and "Amazon URL:" in request.admin_notes:
-                import re
-                url_match = re.search(r'Amazon URL: (https?://[^\s]+)', request.admin_notes)
-                if url_match:
-                    response_dict['amazon_url'] = url_match.group(1)
-            
-            result.append(response_dict)
-        
-        return result
+        return [self._listing_row(row) for row in rows]
+    
+    def count_purchase_requests(
+        self,
+        status: Optional[PurchaseRequestStatus] = None,
+        user_id: Optional[int] = None,
+        priority: Optional[int] = None,
+        pending_only: bool = False
+    ) -> int:
+        """一覧と同じ条件の購入申請数を取得"""
+        query = self.db.query(func.count(PurchaseRequest.id))
+        return self._filter_requests(query, status, user_id, priority, pending_only).scalar() or 0
     
     def get_purchase_request_by_id(self, request_id: int) -> Optional[PurchaseRequestResponse]:
         """IDで購入申請を取得"""
         request = self.db.query(PurchaseRequest).filter(PurchaseRequest.id == request_id).first()
         if request:
-            # PurchaseRequestResponseに変換
-            response_data = PurchaseRequestResponse.model_validate(request)
-            
-            # admin_notesからAmazon URLを抽出
-            if request.admin_notes and "Amazon URL:" in request.admin_notes:
-                import re
-                url_match = re.search(r'Amazon URL: (https?://[^\s]+)', request.admin_notes)
-                if url_match:
-                    # amazon_urlフィールドを設定
-                    response_dict = response_data.model_dump()
-                    response_dict['amazon_url'] = url_match.group(1)
-                    return PurchaseRequestResponse(**response_dict)
-            
-            return response_data
+            return PurchaseRequestResponse.model_validate(request)
         return None
     
-    def get_user_purchase_requests(self, user_id: int, active_only: bool = False) -> List[PurchaseRequestResponse]:
+    def get_user_purchase_requests(self, user_id: int, active_only: bool = False) -> List[Dict[str, Any]]:
         """ユーザーの購入申請を取得"""
-        query = self.db.query(PurchaseRequest).filter(PurchaseRequest.user_id == user_id)
+        query = self._listing_query().filter(PurchaseRequest.user_id == user_id)
         
         if active_only:
-            query = query.filter(
-                PurchaseRequest.status.in_([
-                    PurchaseRequestStatus.PENDING,
-                    PurchaseRequestStatus.APPROVED,
-                    PurchaseRequestStatus.ORDERED
-                ])
-            )
-        
-        requests = query.order_by(PurchaseRequest.created_at.desc()).all()
+            query = query.filter(PurchaseRequest.status.in_(ACTIVE_PURCHASE_REQUEST_STATUSES))
         
-        # Amazon URLを抽出してレスポンスに含める
-        result = []
-        for request in requests:
-            request_dict = PurchaseRequestResponse.model_validate(request).model_dump()
-            
-            # admin_notesからAmazon URLを抽出
-            if request.admin_notes and "Amazon URL:" in request.admin_notes:
-                import re
-                url_match = re.search(r'Amazon URL: (https?://[^\s]+)', request.admin_notes)
-                if url_match:
-                    request_dict['amazon_url'] = url_match.group(1)
-            
-            result.append(request_dict)
-        
-        return result
+        rows = query.order_by(PurchaseRequest.created_at.desc()).all()
+        return [self._listing_row(row) for row in rows]
     
-    def get_pending_requests(self) -> List[PurchaseRequestResponse]:
+    def get_pending_requests(self) -> List[Dict[str, Any]]:
         """承認待ちの購入申請を取得"""
-        requests = self.db.query(PurchaseRequest).join(User).filter(
+        rows = self._listing_query().filter(
             PurchaseRequest.status == PurchaseRequestStatus.PENDING
         ).order_by(PurchaseRequest.priority, PurchaseRequest.created_at).all()
-        
-        # ユーザー情報を含めてレスポンスを作成
-        result = []
-        for request in requests:
-            request_dict = PurchaseRequestResponse.model_validate(request).model_dump()
-            request_dict['user'] = {
-                'id': request.user.id,
-                'full_name': request.user.full_name or request.user.username,
-                'email': request.user.email
-            }
+        return [self._listing_row(row) for row in rows]
+    
+    def _listing_query(self):
+        """一覧用に購入申請と申請者の必要な列だけを射影したクエリ"""
+        return self.db.query(
+            *[getattr(PurchaseRequest, name) for name in LISTING_FIELDS],
+            User.full_name.label("user_full_name"),
+            User.username.label("user_username"),
+            User.email.label("user_email")
+        ).join(User, User.id == PurchaseRequest.user_id)
+    
+    @staticmethod
+    def _filter_requests(
+        query,
+        status: Optional[PurchaseRequestStatus],
+        user_id: Optional[int],
+        priority: Optional[int],
+        pending_only: bool
+    ):
+        """一覧・件数共通の絞り込み"""
+        if status:
+            query = query.filter(PurchaseRequest.status == status)
+        if user_id:
+            query = query.filter(PurchaseRequest.user_id == user_id)
+        if priority:
+            query = query.filter(PurchaseRequest.priority == priority)
+        if pending_only:
+            query = query.filter(PurchaseRequest.status == PurchaseRequestStatus.PENDING)
+        return query
+    
+    @staticmethod
+    def _listing_row(row) -> Dict[str, Any]:
+        """射影した1行をレスポンス用の辞書に変換"""
+        data = {name: getattr(row, name) for name in LISTING_FIELDS}
+        data["user"] = {
+            "id": row.user_id,
+            "full_name": row.user_full_name or row.user_username,
+            "email": row.user_email
+        }
+        return data
+    
+    def backfill_amazon_urls(self, batch_size: int = 1000) -> int:
+        """admin_notes の「Amazon URL: ...」を amazon_url 列へバッチ単位で移し、件数を返す
+
+        旧実装では Amazon URL を admin_notes に保存していたため、その移行用。
+        バッチごとにコミットする。
+        """
+        migrated = 0
+        last_id = 0
+        while True:
+            rows = self.db.query(PurchaseRequest.id, PurchaseRequest.admin_notes).filter(
+                PurchaseRequest.id > last_id,
+                PurchaseRequest.amazon_url.is_(None),
+                PurchaseRequest.admin_notes.like("%Amazon URL:%")
+            ).order_by(PurchaseRequest.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
             
-            # admin_notesからAmazon URLを抽出
-            if request.admin_notes and "Amazon URL:" in request.admin_notes:
-                import re
-                url_match = re.search(r'Amazon URL: (https?://[^\s]+)', request.admin_notes)
-                if url_match:
-                    request_dict['amazon_url'] = url_match.group(1)
+            values = []
+            for row in rows:
+                match = AMAZON_URL_PATTERN.search(row.admin_notes)
+                if match:
+                    values.append({"id": row.id, "amazon_url": match.group(1)})
+            if values:
+                self.db.execute(update(PurchaseRequest), values)
+            self.db.commit()
             
-            result.append(request_dict)
+            migrated += len(values)
+            if len(rows) < batch_size:
+                break
         
-        return result
+        logger.info(f"Amazon URL移行: {migrated}件")
+        return migrated
     
     def create_purchase_request(self, request_data: PurchaseRequestCreate) -> PurchaseRequestResponse:
         """新しい購入申請を作成"""
@@ -163,32 +168,18 @@ class PurchaseRequestService:
         if not user:
             raise ValueError("指定されたユーザーが見つかりません")
         
-        # 同じ書籍の重複申請チェック
-        existing_request = self.db.query(PurchaseRequest).filter(
-            and_(
-                PurchaseRequest.user_id == request_data.user_id,
-                PurchaseRequest.title == request_data.title,
-                PurchaseRequest.author == request_data.author,
-                PurchaseRequest.status.in_([
-                    PurchaseRequestStatus.PENDING,
-                    PurchaseRequestStatus.APPROVED,
-                    PurchaseRequestStatus.ORDERED
-                ])
-            )
-        ).first()
-        
-        if existing_request:
+        # 所蔵済み・同じ書籍の重複申請チェック（正規化キーの索引で照合）
+        duplicates = self.find_duplicates([request_data])[0]
+        if duplicates["books"]:
+            raise ValueError(f"この書籍は既に図書館に所蔵されています（書籍ID: {duplicates['books'][0]['id']}）")
+        if any(match["user_id"] == request_data.user_id for match in duplicates["requests"]):
             raise ValueError("同じ書籍の申請が既に存在します")
         
         # ユーザーの申請制限チェック
         active_requests_count = self.db.query(PurchaseRequest).filter(
             and_(
                 PurchaseRequest.user_id == request_data.user_id,
-                PurchaseRequest.status.in_([
-                    PurchaseRequestStatus.PENDING,
-                    PurchaseRequestStatus.APPROVED,
-                    PurchaseRequestStatus.ORDERED
-                ])
+                PurchaseRequest.status.in_(ACTIVE_PURCHASE_REQUEST_STATUSES)
             )
         ).count()
         
@@ -196,11 +187,6 @@ class PurchaseRequestService:
         if active_requests_count >= max_requests:
             raise ValueError(f"申請上限（{max_requests}件）に達しています")
         
-        # Amazon URLをadmin_notesに保存（一時的な対応）
-        admin_notes = None
-        if hasattr(request_data, 'amazon_url') and request_data.amazon_url:
-            admin_notes = f"Amazon URL: {request_data.amazon_url}"
-        
         # 購入申請レコードを作成
         purchase_request = PurchaseRequest(
             user_id=request_data.user_id,
@@ -212,17 +198,89 @@ class PurchaseRequestService:
             reason=request_data.reason,
             priority=request_data.priority or 3,
             image_url=request_data.image_url,
-            admin_notes=admin_notes,
+            amazon_url=request_data.amazon_url,
+            department=user.department,
             status=PurchaseRequestStatus.PENDING
         )
         
         self.db.add(purchase_request)
+        PurchaseBudgetService(self.db).move(purchase_request, None, PurchaseRequestStatus.PENDING)
         self.db.commit()
         self.db.refresh(purchase_request)
         
         logger.info(f"新規購入申請作成: ユーザー{request_data.user_id}, 書籍'{request_data.title}'")
         return PurchaseRequestResponse.model_validate(purchase_request)
     
+    def find_duplicates(self, items: List[Union[DuplicateCheckItem, PurchaseRequestCreate]]) -> List[Dict[str, Any]]:
+        """書籍ごとに所蔵書籍・進行中の購入申請との重複を判定（入力と同じ順で返す）
+
+        ISBN-13 とタイトル＋著者の正規化キーで、書籍・購入申請それぞれ1回の索引検索で照合する。
+        """
+        keys = [(normalize_isbn13(item.isbn), title_author_key(item.title, item.author)) for item in items]
+        isbns = {isbn for isbn, _ in keys if isbn}
+        title_keys = {title_key for _, title_key in keys if title_key}
+        
+        books = self._match_rows(
+            Book, isbns, title_keys,
+            self.db.query(Book.id, Book.title, Book.author, Book.isbn13, Book.title_key)
+        )
+        requests = self._match_rows(
+            PurchaseRequest, isbns, title_keys,
+            self.db.query(
+                PurchaseRequest.id, PurchaseRequest.title, PurchaseRequest.author,
+                PurchaseRequest.isbn13, PurchaseRequest.title_key,
+                PurchaseRequest.status, PurchaseRequest.user_id
+            ).filter(PurchaseRequest.status.in_(ACTIVE_PURCHASE_REQUEST_STATUSES))
+        )
+        
+        results = []
+        for item, (isbn, title_key) in zip(items, keys):
+            matched_books = self._matches_for(books, isbn, title_key)
+            matched_requests = self._matches_for(requests, isbn, title_key)
+            results.append({
+                "title": item.title,
+                "author": item.author,
+                "isbn": item.isbn,
+                "is_duplicate": bool(matched_books or matched_requests),
+                "books": matched_books,
+                "requests": matched_requests
+            })
+        return results
+    
+    @staticmethod
+    def _match_rows(model, isbns: set, title_keys: set, query) -> list:
+        """isbn13 または title_key が一致する行を取得"""
+        conditions = []
+        if isbns:
+            conditions.append(model.isbn13.in_(isbns))
+        if title_keys:
+            conditions.append(model.title_key.in_(title_keys))
+        if not conditions:
+            return []
+        return query.filter(or_(*conditions)).order_by(model.id).all()
+    
+    @staticmethod
+    def _matches_for(rows: list, isbn: Optional[str], title_key: Optional[str]) -> List[Dict[str, Any]]:
+        """1件分の一致行を重複候補の辞書に変換（ISBN一致を優先）"""
+        matches = []
+        for row in rows:
+            if isbn and row.isbn13 == isbn:
+                matched_by = "isbn"
+            elif title_key and row.title_key == title_key:
+                matched_by = "title_author"
+            else:
+                continue
+            status = getattr(row, "status", None)
+            matches.append({
+                "id": row.id,
+                "title": row.title,
+                "author": row.author,
+                "matched_by": matched_by,
+                "status": status.value if status is not None else None,
+                "user_id": getattr(row, "user_id", None)
+            })
+        return matches
+    
     def update_purchase_request(
         self, 
         request_id: int, 
@@ -244,9 +302,11 @@ class PurchaseRequestService:
         
         # 更新可能なフィールドのみ更新
         update_fields = update_data.model_dump(exclude_unset=True)
+        old_price = request.estimated_price
         for field, value in update_fields.items():
             if hasattr(request, field):
                 setattr(request, field, value)
+        PurchaseBudgetService(self.db).adjust_amount(request, old_price)
         
         self.db.commit()
         self.db.refresh(request)
@@ -264,6 +324,7 @@ class PurchaseRequestService:
             raise ValueError("承認待ち状態の申請のみ承認できます")
 
         # 申請ステータスを承認済みに更新
+        PurchaseBudgetService(self.db).move(request, request.status, PurchaseRequestStatus.APPROVED)
         request.status = PurchaseRequestStatus.APPROVED
         request.approved_at = datetime.utcnow()
         if admin_notes:
@@ -319,6 +380,7 @@ class PurchaseRequestService:
             raise ValueError("承認待ち状態の申請のみ却下できます")
         
         # 却下処理
+        PurchaseBudgetService(self.db).move(request, request.status, PurchaseRequestStatus.REJECTED)
         request.status = PurchaseRequestStatus.REJECTED
         request.admin_notes = admin_notes
         
@@ -338,6 +400,7 @@ class PurchaseRequestService:
             raise ValueError("承認済みの申請のみ発注済みに設定できます")
         
         # 発注済み処理
+        PurchaseBudgetService(self.db).move(request, request.status, PurchaseRequestStatus.ORDERED)
         request.status = PurchaseRequestStatus.ORDERED
         if admin_notes:
             request.admin_notes = f"{request.admin_notes or ''}\n発注メモ: {admin_notes}".strip()
@@ -390,6 +453,7 @@ class PurchaseRequestService:
             book = book_service.create_book(book_create_data)
             
             # 受領済み処理（完了状態に設定）
+            PurchaseBudgetService(self.db).move(request, request.status, PurchaseRequestStatus.COMPLETED)
             request.status = PurchaseRequestStatus.COMPLETED
             if admin_notes:
                 request.admin_notes = f"{request.admin_notes or ''}\n受領・図書館追加メモ: {admin_notes}\n図書館に追加されました (書籍ID: {book.id})".strip()
@@ -421,6 +485,7 @@ class PurchaseRequestService:
             raise ValueError("承認待ちまたは承認済みの申請のみキャンセルできます")
         
         # キャンセル処理
+        PurchaseBudgetService(self.db).move(request, request.status, PurchaseRequestStatus.CANCELLED)
         request.status = PurchaseRequestStatus.CANCELLED
         
         self.db.commit()
@@ -454,46 +519,27 @@ class PurchaseRequestService:
             }
     
     def get_purchase_request_statistics(self) -> Dict[str, Any]:
-        """購入申請統計情報を取得"""
-        total_requests = self.db.query(PurchaseRequest).count()
-        pending_requests = self.db.query(PurchaseRequest).filter(
-            PurchaseRequest.status == PurchaseRequestStatus.PENDING
-        ).count()
-        approved_requests = self.db.query(PurchaseRequest).filter(
-            PurchaseRequest.status == PurchaseRequestStatus.APPROVED
-        ).count()
-        rejected_requests = self.db.query(PurchaseRequest).filter(
-            PurchaseRequest.status == PurchaseRequestStatus.REJECTED
-        ).count()
-        ordered_requests = self.db.query(PurchaseRequest).filter(
-            PurchaseRequest.status == PurchaseRequestStatus.ORDERED
-        ).count()
-        received_requests = self.db.query(PurchaseRequest).filter(
-            PurchaseRequest.status == PurchaseRequestStatus.RECEIVED
-        ).count()
-        cancelled_requests = self.db.query(PurchaseRequest).filter(
-            PurchaseRequest.status == PurchaseRequestStatus.CANCELLED
-        ).count()
+        """購入申請統計情報を取得（予算集計行から算出し、申請テーブルは走査しない）"""
+        totals = PurchaseBudgetService(self.db).status_totals()
+        
+        def count_status(status: PurchaseRequestStatus) -> int:
+            return totals[status][0]
         
+        total_requests = sum(count for count, _ in totals.values())
+        approved_requests = count_status(PurchaseRequestStatus.APPROVED)
         # 総予算計算（承認済み以降の申請）
-        total_budget = self.db.query(func.sum(PurchaseRequest.estimated_price)).filter(
-            PurchaseRequest.status.in_([
-                PurchaseRequestStatus.APPROVED,
-                PurchaseRequestStatus.ORDERED,
-                PurchaseRequestStatus.RECEIVED
-            ])
-        ).scalar() or 0
+        total_budget = sum(totals[status][1] for status in BUDGET_STATUSES)
         
         return {
             "total_requests": total_requests,
-            "pending_requests": pending_requests,
+            "pending_requests": count_status(PurchaseRequestStatus.PENDING),
             "approved_requests": approved_requests,
-            "rejected_requests": rejected_requests,
-            "ordered_requests": ordered_requests,
-            "received_requests": received_requests,
-            "cancelled_requests": cancelled_requests,
+            "rejected_requests": count_status(PurchaseRequestStatus.REJECTED),
+            "ordered_requests": count_status(PurchaseRequestStatus.ORDERED),
+            "received_requests": count_status(PurchaseRequestStatus.RECEIVED),
+            "cancelled_requests": count_status(PurchaseRequestStatus.CANCELLED),
             "approval_rate": round((approved_requests / total_requests * 100) if total_requests > 0 else 0, 2),
-            "total_budget": float(total_budget)
+            "total_budget": float(total_budget or 0)
         }
     
     def mark_as_library_added(self, request_id: int, admin_notes: Optional[str] = None) -> PurchaseRequestResponse:
@@ -506,6 +552,7 @@ class PurchaseRequestService:
             raise ValueError("受領済みの申請のみ図書館に追加できます")
         
         # 図書館追加済み処理
+        PurchaseBudgetService(self.db).move(request, request.status, PurchaseRequestStatus.COMPLETED)
         request.status = PurchaseRequestStatus.COMPLETED
         if admin_notes:
             request.admin_notes = f"{request.admin_notes or ''}\n図書館追加メモ: {admin_notes}".strip()
@@ -0,0 +1,272 @@
+"""
+読書統計サービス - ビジネスロジック層
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, and_, tuple_
+from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
+from datetime import date
+import base64
+import logging
+
+from src.models.book import Book
+from src.models.loan import Loan, OPEN_LOAN_STATUSES
+from src.models.loan_archive import loan_history
+from src.models.reading_stats import DailyUserReads, DailyBookReads, ReadingLeaderboard
+from src.models.user import User
+from src.utils.counters import increment_counter
+
+logger = logging.getLogger(__name__)
+
+
+def month_period(day: date) -> str:
+    """ランキングの月キー（'YYYY-MM'）"""
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def year_period(day: date) -> str:
+    """ランキングの年キー（'YYYY'）"""
+    return f"{day.year:04d}"
+
+
+class ReadingStatsService:
+    """読書統計サービスクラス
+
+    返却完了数を (日, ユーザー) / (日, 書籍) 単位のロールアップと
+    月別・年別のランキングテーブルに積み上げ、ランキング表示は
+    loans テーブルを走査せずに上位K件だけを読む。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_completed_read(self, user_id: int, book_id: int, day: Optional[date] = None, count: int = 1) -> None:
+        """返却完了をロールアップに反映（コミットは呼び出し側で行う）"""
+        day = day or date.today()
+        increment_counter(self.db, DailyUserReads, {"day": day, "user_id": user_id}, {"completed_reads": count})
+        increment_counter(self.db, DailyBookReads, {"day": day, "book_id": book_id}, {"completed_reads": count})
+
+        department = self.db.query(User.department).filter(User.id == user_id).scalar()
+        for period in (month_period(day), year_period(day)):
+            increment_counter(
+                self.db, ReadingLeaderboard,
+                {"period": period, "scope": "user", "entity_id": user_id},
+                {"completed_reads": count},
+                {"department": department}
+            )
+            increment_counter(
+                self.db, ReadingLeaderboard,
+                {"period": period, "scope": "book", "entity_id": book_id},
+                {"completed_reads": count}
+            )
+
+    def backfill(self, start_date: Optional[date] = None) -> Dict[str, int]:
+        """既存の貸出履歴からロールアップを再構築
+
+        start_date 以降（未指定なら全期間）のロールアップを削除し、
+        loans・loans_archive から INSERT ... SELECT で一括再集計する。
+        """
+        history = loan_history()
+        user_delete = DailyUserReads.__table__.delete()
+        book_delete = DailyBookReads.__table__.delete()
+        returned = [history.c.return_date.isnot(None)]
+        if start_date:
+            user_delete = user_delete.where(DailyUserReads.day >= start_date)
+            book_delete = book_delete.where(DailyBookReads.day >= start_date)
+            returned.append(history.c.return_date >= start_date)
+
+        self.db.execute(user_delete)
+        self.db.execute(book_delete)
+
+        user_rows = self.db.execute(
+            DailyUserReads.__table__.insert().from_select(
+                ["day", "user_id", "completed_reads"],
+                select(history.c.return_date, history.c.user_id, func.count(history.c.id))
+                .where(and_(*returned))
+                .group_by(history.c.return_date, history.c.user_id)
+            )
+        ).rowcount
+        book_rows = self.db.execute(
+            DailyBookReads.__table__.insert().from_select(
+                ["day", "book_id", "completed_reads"],
+                select(history.c.return_date, history.c.book_id, func.count(history.c.id))
+                .where(and_(*returned))
+                .group_by(history.c.return_date, history.c.book_id)
+            )
+        ).rowcount
+        leaderboard_rows = self._rebuild_leaderboards(start_date)
+        self.db.commit()
+
+        logger.info(
+            f"読書統計ロールアップ再構築: ユーザー別{user_rows}行, 書籍別{book_rows}行, "
+            f"ランキング{leaderboard_rows}行"
+        )
+        return {"user_rows": user_rows, "book_rows": book_rows, "leaderboard_rows": leaderboard_rows}
+
+    def _rebuild_leaderboards(self, start_date: Optional[date] = None) -> int:
+        """日別ロールアップからランキングを再構築
+
+        年ランキングを正しく作り直すため、start_date を含む年の1月1日以降を対象とする。
+        """
+        leaderboard_delete = ReadingLeaderboard.__table__.delete()
+        user_query = self.db.query(DailyUserReads.day, DailyUserReads.user_id, DailyUserReads.completed_reads)
+        book_query = self.db.query(DailyBookReads.day, DailyBookReads.book_id, DailyBookReads.completed_reads)
+        if start_date:
+            year_start = date(start_date.year, 1, 1)
+            # 'YYYY' <= 'YYYY-MM' の文字列順なので年・月キーをまとめて削除できる
+            leaderboard_delete = leaderboard_delete.where(ReadingLeaderboard.period >= year_period(year_start))
+            user_query = user_query.filter(DailyUserReads.day >= year_start)
+            book_query = book_query.filter(DailyBookReads.day >= year_start)
+        self.db.execute(leaderboard_delete)
+
+        totals: Dict[tuple, int] = defaultdict(int)
+        for day, user_id, completed_reads in user_query.yield_per(1000):
+            for period in (month_period(day), year_period(day)):
+                totals[(period, "user", user_id)] += completed_reads
+        for day, book_id, completed_reads in book_query.yield_per(1000):
+            for period in (month_period(day), year_period(day)):
+                totals[(period, "book", book_id)] += completed_reads
+        if not totals:
+            return 0
+
+        user_ids = {entity_id for (_, scope, entity_id) in totals if scope == "user"}
+        departments = dict(
+            self.db.query(User.id, User.department).filter(User.id.in_(user_ids)).all()
+        ) if user_ids else {}
+
+        self.db.execute(ReadingLeaderboard.__table__.insert(), [
+            {
+                "period": period,
+                "scope": scope,
+                "entity_id": entity_id,
+                "department": departments.get(entity_id) if scope == "user" else None,
+                "completed_reads": completed_reads,
+            }
+            for (period, scope, entity_id), completed_reads in totals.items()
+        ])
+        return len(totals)
+
+    def get_user_leaderboard(
+        self,
+        period: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        department: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """期間内のユーザー別返却完了数ランキング（上位 limit 件と次ページカーソル）"""
+        entries, next_cursor = self._leaderboard_page("user", period, limit, cursor, department)
+        user_ids = [entry.entity_id for entry in entries]
+        users = {
+            row.id: row for row in self.db.query(
+                User.id, User.username, User.full_name, User.department
+            ).filter(User.id.in_(user_ids)).all()
+        } if user_ids else {}
+        active_loans = self._count_active_loans(Loan.user_id, user_ids)
+
+        results = []
+        for entry in entries:
+            user = users.get(entry.entity_id)
+            if user is None:
+                continue
+            results.append({
+                "user_id": user.id,
+                "user_name": user.username,
+                "full_name": user.full_name,
+                "department": user.department or "不明",
+                "completed_reads": entry.completed_reads,
+                "active_loans": active_loans.get(user.id, 0)
+            })
+        return results, next_cursor
+
+    def get_book_leaderboard(
+        self,
+        period: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """期間内の書籍別返却完了数ランキング（上位 limit 件と次ページカーソル）"""
+        entries, next_cursor = self._leaderboard_page("book", period, limit, cursor)
+        book_ids = [entry.entity_id for entry in entries]
+        books = {
+            row.id: row for row in self.db.query(
+                Book.id, Book.title, Book.author
+            ).filter(Book.id.in_(book_ids)).all()
+        } if book_ids else {}
+        current_loans = self._count_active_loans(Loan.book_id, book_ids)
+
+        results = []
+        for entry in entries:
+            book = books.get(entry.entity_id)
+            if book is None:
+                continue
+            results.append({
+                "book_id": book.id,
+                "title": book.title,
+                "author": book.author,
+                "completed_reads": entry.completed_reads,
+                "current_loans": current_loans.get(book.id, 0)
+            })
+        return results, next_cursor
+
+    def _leaderboard_page(
+        self,
+        scope: str,
+        period: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        department: Optional[str] = None
+    ) -> Tuple[List[ReadingLeaderboard], Optional[str]]:
+        """ランキング索引を (completed_reads, entity_id) の降順に limit 件だけ読む"""
+        query = self.db.query(ReadingLeaderboard).filter(
+            ReadingLeaderboard.period == period,
+            ReadingLeaderboard.scope == scope
+        )
+        if department is not None:
+            query = query.filter(ReadingLeaderboard.department == department)
+        if cursor:
+            completed_reads, entity_id = self._decode_cursor(cursor)
+            query = query.filter(
+                tuple_(ReadingLeaderboard.completed_reads, ReadingLeaderboard.entity_id)
+                < tuple_(completed_reads, entity_id)
+            )
+
+        entries = query.order_by(
+            ReadingLeaderboard.completed_reads.desc(),
+            ReadingLeaderboard.entity_id.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            last = entries[-1]
+            next_cursor = self._encode_cursor(last.completed_reads, last.entity_id)
+        return entries, next_cursor
+
+    @staticmethod
+    def _encode_cursor(completed_reads: int, entity_id: int) -> str:
+        """次ページの開始位置を不透明な文字列に変換"""
+        raw = f"{completed_reads}:{entity_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[int, int]:
+        """カーソル文字列を (completed_reads, entity_id) に復元"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            completed_reads, entity_id = base64.urlsafe_b64decode(padded).decode().split(":")
+            return int(completed_reads), int(entity_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("無効なカーソルです")
+
+    def _count_active_loans(self, key_column, ids: List[int]) -> Dict[int, int]:
+        """ランキング対象に絞って現在の貸出中件数を取得"""
+        if not ids:
+            return {}
+        rows = self.db.query(
+            key_column.label("key"),
+            func.count(Loan.id).label("active_count")
+        ).filter(
+            Loan.status.in_(OPEN_LOAN_STATUSES),
+            key_column.in_(ids)
+        ).group_by(key_column).all()
+        return {row.key: row.active_count for row in rows}
@@ -2,16 +2,23 @@
 予約サービス - ビジネスロジック層
 """
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, case, select, update
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
+from collections import Counter
 import logging
 
-from src.models.reservation import Reservation, ReservationStatus
+from src.models.reservation import Reservation, ReservationStatus, RESERVATION_QUEUE_ORDER
 from src.models.book import Book, BookStatus
 from src.models.user import User
-from src.models.loan import Loan, LoanStatus
+from src.models.loan import Loan, OPEN_LOAN_STATUSES
+from src.models.activity_counter import ActivityMetric
 from src.schemas.reservation import ReservationCreate, ReservationUpdate, ReservationResponse
+from src.services.availability_service import AvailabilityEstimateService
+from src.services.notification_service import NotificationService
+from src.services.timeseries_service import TimeSeriesService
+from src.utils.counters import apply_deltas
+from src.utils.locks import try_advisory_xact_lock
 
 logger = logging.getLogger(__name__)
 
@@ -57,7 +64,7 @@ class ReservationService:
         
         # 予約日順でソート
         reservations = query.order_by(Reservation.reservation_date).offset(skip).limit(limit).all()
-        return [ReservationResponse.model_validate(reservation) for reservation in reservations]
+        return self._to_responses(reservations)
     
     def get_reservation_by_id(self, reservation_id: int) -> Optional[ReservationResponse]:
         """IDで予約を取得"""
@@ -66,7 +73,7 @@ class ReservationService:
             joinedload(Reservation.book)
         ).filter(Reservation.id == reservation_id).first()
         if reservation:
-            return ReservationResponse.model_validate(reservation)
+            return self._to_responses([reservation])[0]
         return None
     
     def get_user_reservations(self, user_id: int, active_only: bool = False) -> List[ReservationResponse]:
@@ -82,10 +89,10 @@ class ReservationService:
             )
         
         reservations = query.order_by(Reservation.reservation_date.desc()).all()
-        return [ReservationResponse.model_validate(reservation) for reservation in reservations]
+        return self._to_responses(reservations)
     
     def get_book_reservation_queue(self, book_id: int) -> List[ReservationResponse]:
-        """書籍の予約キューを取得"""
+        """書籍の予約キューを取得（待ち順ごとの貸出可能予定日付き）"""
         reservations = self.db.query(Reservation).options(
             joinedload(Reservation.user),
             joinedload(Reservation.book)
@@ -94,9 +101,16 @@ class ReservationService:
                 Reservation.book_id == book_id,
                 Reservation.status == ReservationStatus.PENDING
             )
-        ).order_by(Reservation.priority, Reservation.reservation_date).all()
-        
-        return [ReservationResponse.model_validate(reservation) for reservation in reservations]
+        ).order_by(*RESERVATION_QUEUE_ORDER).all()
+        
+        responses = self._to_responses(reservations)
+        if responses:
+            # 見込みがない・古い場合はその場で計算する（保存は返却・予約作成時と定期ジョブで行う）
+            estimate = AvailabilityEstimateService(self.db).current_estimate(book_id)
+            if estimate:
+                for response in responses:
+                    response.estimated_available_date = estimate.eta_for_position(response.priority)
+        return responses
     
     def create_reservation(self, reservation_data: ReservationCreate) -> ReservationResponse:
         """新しい予約を作成"""
@@ -115,7 +129,7 @@ class ReservationService:
             and_(
                 Loan.user_id == reservation_data.user_id,
                 Loan.book_id == reservation_data.book_id,
-                Loan.status == LoanStatus.ACTIVE
+                Loan.status.in_(OPEN_LOAN_STATUSES)
             )
         ).first()
         
@@ -146,15 +160,6 @@ class ReservationService:
         if active_reservations_count >= max_reservations:
             raise ValueError(f"予約上限（{max_reservations}冊）に達しています")
         
-        # 予約順位を決定
-        next_priority = self.db.query(func.max(Reservation.priority)).filter(
-            and_(
-                Reservation.book_id == reservation_data.book_id,
-                Reservation.status == ReservationStatus.PENDING
-            )
-        ).scalar() or 0
-        next_priority += 1
-        
         # 予約期限を設定（デフォルト7日後）
         expiry_days = reservation_data.expiry_days or 7
         expiry_date = date.today() + timedelta(days=expiry_days)
@@ -169,16 +174,22 @@ class ReservationService:
             reservation_date=date.today(),
             expiry_date=expiry_date,
             status=initial_status,
-            priority=next_priority,
             notes=reservation_data.notes
         )
         
         self.db.add(reservation)
+        if initial_status == ReservationStatus.PENDING:
+            book.pending_reservation_count = Book.pending_reservation_count + 1
+            AvailabilityEstimateService(self.db).ensure(book.id)
+        timeseries = TimeSeriesService(self.db)
+        timeseries.record(ActivityMetric.RESERVATIONS_CREATED)
+        if initial_status == ReservationStatus.READY:
+            timeseries.record(ActivityMetric.RESERVATIONS_READY)
         self.db.commit()
         self.db.refresh(reservation)
         
         logger.info(f"新規予約作成: ユーザー{reservation_data.user_id}, 書籍{reservation_data.book_id}")
-        return ReservationResponse.model_validate(reservation)
+        return self._to_responses([reservation])[0]
     
     def cancel_reservation(self, reservation_id: int, user_id: Optional[int] = None) -> ReservationResponse:
         """予約をキャンセル"""
@@ -194,16 +205,16 @@ class ReservationService:
             raise ValueError("この予約はキャンセルできません")
         
         # 予約をキャンセル
+        if reservation.status == ReservationStatus.PENDING:
+            apply_deltas(self.db, Book.pending_reservation_count, {reservation.book_id: -1})
         reservation.status = ReservationStatus.CANCELLED
         
-        # 後続の予約の順位を繰り上げ
-        self._update_reservation_priorities(reservation.book_id)
-        
+        TimeSeriesService(self.db).record(ActivityMetric.RESERVATIONS_CANCELLED)
         self.db.commit()
         self.db.refresh(reservation)
         
         logger.info(f"予約キャンセル: 予約ID{reservation_id}")
-        return ReservationResponse.model_validate(reservation)
+        return self._to_responses([reservation])[0]
     
     def complete_reservation(self, reservation_id: int) -> ReservationResponse:
         """予約を完了（貸出実行時）"""
@@ -217,17 +228,18 @@ class ReservationService:
         # 予約を完了
         reservation.status = ReservationStatus.COMPLETED
         
-        # 後続の予約の順位を繰り上げ
-        self._update_reservation_priorities(reservation.book_id)
-        
+        TimeSeriesService(self.db).record(ActivityMetric.RESERVATIONS_COMPLETED)
         self.db.commit()
         self.db.refresh(reservation)
         
         logger.info(f"予約完了: 予約ID{reservation_id}")
-        return ReservationResponse.model_validate(reservation)
+        return self._to_responses([reservation])[0]
     
     def process_book_return(self, book_id: int) -> Optional[ReservationResponse]:
-        """書籍返却時の予約処理"""
+        """書籍返却時の予約処理（コミットは呼び出し側で行う）
+
+        返却した貸出・書籍の更新と同じトランザクションで待ち行列の先頭を準備完了にする。
+        """
         # 最優先の予約を取得
         next_reservation = self.db.query(Reservation).options(
             joinedload(Reservation.user),
@@ -237,96 +249,222 @@ class ReservationService:
                 Reservation.book_id == book_id,
                 Reservation.status == ReservationStatus.PENDING
             )
-        ).order_by(Reservation.priority, Reservation.reservation_date).first()
+        ).order_by(*RESERVATION_QUEUE_ORDER).first()
         
         if next_reservation:
             # 予約をREADY状態にする
             next_reservation.status = ReservationStatus.READY
             # 新しい期限を設定（3日後）
             next_reservation.expiry_date = date.today() + timedelta(days=3)
+            next_reservation.book.pending_reservation_count = Book.pending_reservation_count - 1
             
-            # 後続の予約の順位を繰り上げ
-            self._update_reservation_priorities(book_id)
-            
-            self.db.commit()
-            self.db.refresh(next_reservation)
+            TimeSeriesService(self.db).record(ActivityMetric.RESERVATIONS_READY)
+            # 予約者への通知は同じコミットでアウトボックスに積む
+            NotificationService(self.db).enqueue_reservation_ready([next_reservation.id])
+            self.db.flush()
             
             logger.info(f"予約準備完了: 予約ID{next_reservation.id}, ユーザーID{next_reservation.user_id}")
-            return ReservationResponse.model_validate(next_reservation)
+            return self._to_responses([next_reservation])[0]
         
         return None
     
-    def expire_reservations(self) -> List[ReservationResponse]:
-        """期限切れ予約を処理"""
-        expired_reservations = self.db.query(Reservation).filter(
-            and_(
-                Reservation.status.in_([ReservationStatus.PENDING, ReservationStatus.READY]),
-                Reservation.expiry_date < date.today()
+    def get_reservations_by_ids(self, reservation_ids: List[int]) -> List[ReservationResponse]:
+        """指定IDの予約をまとめて取得"""
+        if not reservation_ids:
+            return []
+        reservations = self.db.query(Reservation).options(
+            joinedload(Reservation.user),
+            joinedload(Reservation.book)
+        ).filter(Reservation.id.in_(reservation_ids)).order_by(Reservation.id).all()
+        return self._to_responses(reservations)
+    
+    def expire_reservations(self) -> Dict[str, List[int]]:
+        """期限切れ予約を一括 UPDATE で EXPIRED に更新（スケジューラーから実行）
+
+        準備完了のまま期限切れになった予約が確保していた書籍は、書籍ごとに1回だけ
+        後続の待機中予約へ引き当て、引き当て先がなければ予約確保を解除する。
+        期限切れにした予約IDと引き当てた予約IDを返す。
+        """
+        if not try_advisory_xact_lock(self.db, "reservation_expiry"):
+            logger.info("期限切れ予約処理は他のワーカーで実行中のためスキップしました")
+            self.db.rollback()
+            return {"expired": [], "handed_off": []}
+        
+        try:
+            expired_ready = self._expire_where(Reservation.status == ReservationStatus.READY)
+            expired_pending = self._expire_where(Reservation.status == ReservationStatus.PENDING)
+            apply_deltas(
+                self.db, Book.pending_reservation_count,
+                {book_id: -count for book_id, count in Counter(row.book_id for row in expired_pending).items()}
             )
-        ).all()
-        
-        expired_list = []
-        for reservation in expired_reservations:
-            reservation.status = ReservationStatus.EXPIRED
-            expired_list.append(ReservationResponse.model_validate(reservation))
+            handed_off = [
+                reservation.id
+                for reservation in self.hand_off_copies(
+                    self._still_held_copies(Counter(row.book_id for row in expired_ready))
+                )
+            ]
             
-            # 後続の予約の順位を繰り上げ
-            self._update_reservation_priorities(reservation.book_id)
-        
-        if expired_reservations:
+            timeseries = TimeSeriesService(self.db)
+            timeseries.record(ActivityMetric.RESERVATIONS_EXPIRED, count=len(expired_ready) + len(expired_pending))
+            timeseries.record(ActivityMetric.RESERVATIONS_READY, count=len(handed_off))
+            NotificationService(self.db).enqueue_reservation_ready(handed_off)
             self.db.commit()
-            logger.info(f"期限切れ予約処理: {len(expired_reservations)}件")
-        
-        return expired_list
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error expiring reservations: {str(e)}")
+            raise e
+        
+        expired = sorted(row.id for row in expired_ready + expired_pending)
+        if expired:
+            logger.info(f"期限切れ予約処理: {len(expired)}件, 後続予約への引き当て{len(handed_off)}件")
+        return {"expired": expired, "handed_off": handed_off}
     
-    def _update_reservation_priorities(self, book_id: int):
-        """予約順位を更新"""
-        pending_reservations = self.db.query(Reservation).filter(
-            and_(
-                Reservation.book_id == book_id,
-                Reservation.status == ReservationStatus.PENDING
+    def _expire_where(self, status_condition) -> list:
+        """条件に合う期限切れ予約を1文で EXPIRED に更新し、(id, book_id) を返す"""
+        condition = and_(status_condition, Reservation.expiry_date < date.today())
+        stmt = update(Reservation).values(
+            status=ReservationStatus.EXPIRED,
+            updated_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+        
+        if self.db.get_bind().dialect.update_returning:
+            return self.db.execute(stmt.where(condition).returning(Reservation.id, Reservation.book_id)).all()
+        
+        rows = self.db.execute(
+            select(Reservation.id, Reservation.book_id).where(condition).with_for_update()
+        ).all()
+        if rows:
+            self.db.execute(stmt.where(Reservation.id.in_([row.id for row in rows])))
+        return rows
+    
+    def _still_held_copies(self, expired_per_book: Counter) -> Counter:
+        """期限切れの準備完了予約のうち、実際に確保中の冊が残っている分だけを書籍ごとに返す
+
+        確保中の冊があるのは RESERVED かつ在庫が残っている書籍のみ（貸出済みの冊は引き当てない）。
+        """
+        if not expired_per_book:
+            return Counter()
+        rows = self.db.query(Book.id, Book.available_copies).filter(
+            Book.id.in_(list(expired_per_book)),
+            Book.status == BookStatus.RESERVED,
+            Book.available_copies > 0
+        ).all()
+        return Counter({row.id: min(expired_per_book[row.id], row.available_copies) for row in rows})
+    
+    def hand_off_copies(self, released_per_book: Counter) -> list:
+        """空いた冊数だけ書籍ごとに先頭の待機中予約を準備完了にし、その予約の (id, book_id) を返す
+
+        予約の期限切れ・一括返却で共通に使う。待機中予約数カウンターも更新し、
+        コミットは呼び出し側で行う。
+        """
+        if not released_per_book:
+            return []
+        
+        remaining = dict(released_per_book)
+        handoffs = []
+        handoffs_per_book = Counter()
+        pending = self.db.query(Reservation.id, Reservation.book_id).filter(
+            Reservation.book_id.in_(list(released_per_book)),
+            Reservation.status == ReservationStatus.PENDING
+        ).order_by(Reservation.book_id, *RESERVATION_QUEUE_ORDER).all()
+        for reservation in pending:
+            if remaining[reservation.book_id] > 0:
+                remaining[reservation.book_id] -= 1
+                handoffs.append(reservation)
+                handoffs_per_book[reservation.book_id] += 1
+        
+        if handoffs:
+            self.db.execute(
+                update(Reservation).where(
+                    Reservation.id.in_([reservation.id for reservation in handoffs])
+                ).values(
+                    status=ReservationStatus.READY,
+                    expiry_date=date.today() + timedelta(days=3),
+                    updated_at=datetime.utcnow()
+                ).execution_options(synchronize_session=False)
+            )
+            apply_deltas(
+                self.db, Book.pending_reservation_count,
+                {book_id: -count for book_id, count in handoffs_per_book.items()}
             )
-        ).order_by(Reservation.priority, Reservation.reservation_date).all()
         
-        for i, reservation in enumerate(pending_reservations, 1):
-            reservation.priority = i
+        # 引き当て先がなく、準備完了の予約も残っていない書籍は予約確保を解除
+        released_books = [book_id for book_id, count in remaining.items() if count > 0]
+        if released_books:
+            holds_ready_reservation = select(Reservation.id).where(
+                Reservation.book_id == Book.id,
+                Reservation.status == ReservationStatus.READY
+            ).exists()
+            self.db.execute(
+                update(Book).where(
+                    Book.id.in_(released_books),
+                    Book.status == BookStatus.RESERVED,
+                    Book.available_copies > 0,
+                    ~holds_ready_reservation
+                ).values(
+                    status=BookStatus.AVAILABLE,
+                    updated_at=datetime.utcnow()
+                ).execution_options(synchronize_session=False)
+            )
+        return handoffs
     
-    def get_reservation_statistics(self) -> Dict[str, Any]:
-        """予約統計情報を取得"""
-        total_reservations = self.db.query(Reservation).count()
-        pending_reservations = self.db.query(Reservation).filter(
+    def get_queue_positions(self, book_ids: List[int]) -> Dict[int, int]:
+        """待機中予約の順位（予約ID -> 書籍ごとに1からの連番）をウィンドウ関数で算出"""
+        if not book_ids:
+            return {}
+        position = func.row_number().over(
+            partition_by=Reservation.book_id,
+            order_by=RESERVATION_QUEUE_ORDER
+        ).label("position")
+        rows = self.db.query(Reservation.id, position).filter(
+            Reservation.book_id.in_(book_ids),
             Reservation.status == ReservationStatus.PENDING
-        ).count()
-        ready_reservations = self.db.query(Reservation).filter(
-            Reservation.status == ReservationStatus.READY
-        ).count()
-        completed_reservations = self.db.query(Reservation).filter(
-            Reservation.status == ReservationStatus.COMPLETED
-        ).count()
-        cancelled_reservations = self.db.query(Reservation).filter(
-            Reservation.status == ReservationStatus.CANCELLED
-        ).count()
-        expired_reservations = self.db.query(Reservation).filter(
-            Reservation.status == ReservationStatus.EXPIRED
-        ).count()
+        ).all()
+        return {row.id: row.position for row in rows}
+    
+    def _to_responses(self, reservations: List[Reservation]) -> List[ReservationResponse]:
+        """レスポンスに変換し、予約順位（priority）を読み取り時の値で埋める
+
+        待機中は書籍ごとの待ち順、準備完了は先頭（1）とする。
+        """
+        positions = self.get_queue_positions(list({
+            reservation.book_id for reservation in reservations
+            if reservation.status == ReservationStatus.PENDING
+        }))
+        
+        responses = []
+        for reservation in reservations:
+            response = ReservationResponse.model_validate(reservation)
+            if reservation.status == ReservationStatus.PENDING:
+                response.priority = positions.get(reservation.id, response.priority)
+            elif reservation.status == ReservationStatus.READY:
+                response.priority = 1
+            responses.append(response)
+        return responses
+    
+    def get_reservation_statistics(self) -> Dict[str, Any]:
+        """予約統計情報を取得（条件付き集計で1クエリ）"""
+        def count_status(status: ReservationStatus):
+            return func.sum(case((Reservation.status == status, 1), else_=0))
+        
+        row = self.db.query(
+            func.count(Reservation.id).label("total_reservations"),
+            count_status(ReservationStatus.PENDING).label("pending_reservations"),
+            count_status(ReservationStatus.READY).label("ready_reservations"),
+            count_status(ReservationStatus.COMPLETED).label("completed_reservations"),
+            count_status(ReservationStatus.CANCELLED).label("cancelled_reservations"),
+            count_status(ReservationStatus.EXPIRED).label("expired_reservations"),
+        ).one()
+        
+        total_reservations = row.total_reservations or 0
+        completed_reservations = int(row.completed_reservations or 0)
         
         return {
             "total_reservations": total_reservations,
-            "pending_reservations": pending_reservations,
-            "ready_reservations": ready_reservations,
+            "pending_reservations": int(row.pending_reservations or 0),
+            "ready_reservations": int(row.ready_reservations or 0),
             "completed_reservations": completed_reservations,
-            "cancelled_reservations": cancelled_reservations,
-            "expired_reservations": expired_reservations,
+            "cancelled_reservations": int(row.cancelled_reservations or 0),
+            "expired_reservations": int(row.expired_reservations or 0),
             "completion_rate": round((completed_reservations / total_reservations * 100) if total_reservations > 0 else 0, 2)
         }
-    
-    def create_notification(self, user_id: int, message: str, notification_type: str = "reservation"):
-        """通知を作成（基本版）"""
-        # 現在はログ出力のみ。将来的にデータベースに保存
-        logger.info(f"通知作成: ユーザーID{user_id}, タイプ{notification_type}, メッセージ: {message}")
-        
-        # TODO: 将来的に以下を実装
-        # - 通知テーブルへの保存
-        # - メール送信
-        # - プッシュ通知
-        # - システム内通知バッジ 
\ No newline at end of file
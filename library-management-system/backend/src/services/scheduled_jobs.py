@@ -0,0 +1,122 @@
+"""
+定期実行ジョブ定義
+"""
+import logging
+
+from src.config.settings import Settings
+from src.database.connection import get_db_session
+from src.services.availability_service import AvailabilityEstimateService
+from src.services.loan_service import LoanService
+from src.services.loan_archive_service import LoanArchiveService
+from src.services.notification_service import NotificationService
+from src.services.reservation_service import ReservationService
+from src.services.stats_snapshot_service import StatsSnapshotService
+from src.utils.scheduler import IntervalScheduler
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+def snapshot_stats_job() -> None:
+    """貸出・予約・購入申請の統計スナップショットを保存"""
+    db = get_db_session()
+    try:
+        StatsSnapshotService(db).capture_all()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def overdue_sweep_job() -> None:
+    """期限切れの貸出を延滞ステータスに一括更新し、延滞通知を積む"""
+    db = get_db_session()
+    try:
+        LoanService(db).sweep_overdue_loans()
+    finally:
+        db.close()
+
+
+def reservation_expiry_job() -> None:
+    """期限切れ予約を一括で期限切れにし、確保していた書籍を後続の予約へ引き当て"""
+    db = get_db_session()
+    try:
+        ReservationService(db).expire_reservations()
+    finally:
+        db.close()
+
+
+def loan_archive_job() -> None:
+    """完了済みの古い貸出を loans_archive へ移動"""
+    db = get_db_session()
+    try:
+        LoanArchiveService(db).archive_loans()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def notification_dispatch_job() -> None:
+    """アウトボックスの配信待ち通知を配信"""
+    db = get_db_session()
+    try:
+        NotificationService(db).dispatch_pending()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def due_soon_reminder_job() -> None:
+    """返却期限が近い貸出の通知を積み、古い配信済み通知を削除"""
+    db = get_db_session()
+    try:
+        notification_service = NotificationService(db)
+        notification_service.enqueue_due_soon_reminders()
+        notification_service.purge_sent()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def auto_renew_job() -> None:
+    """返却期限が近く予約のない貸出を一括で自動延長し、利用者ごとに通知を積む"""
+    db = get_db_session()
+    try:
+        LoanService(db).auto_renew_loans()
+    finally:
+        db.close()
+
+
+def availability_refresh_job() -> None:
+    """前日以前に作成された予約待ちの貸出可能予定日を再計算"""
+    db = get_db_session()
+    try:
+        AvailabilityEstimateService(db).refresh_stale()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def build_scheduler() -> IntervalScheduler:
+    """ワーカーで実行する定期ジョブを登録したスケジューラーを作成"""
+    scheduler = IntervalScheduler()
+    scheduler.add_job("overdue_sweep", settings.OVERDUE_SWEEP_INTERVAL_SECONDS, overdue_sweep_job)
+    scheduler.add_job("reservation_expiry", settings.RESERVATION_EXPIRY_INTERVAL_SECONDS, reservation_expiry_job)
+    scheduler.add_job("stats_snapshot", settings.STATS_SNAPSHOT_INTERVAL_SECONDS, snapshot_stats_job)
+    scheduler.add_job("loan_archive", settings.LOAN_ARCHIVE_INTERVAL_SECONDS, loan_archive_job)
+    scheduler.add_job("availability_refresh", settings.AVAILABILITY_REFRESH_INTERVAL_SECONDS, availability_refresh_job)
+    if settings.AUTO_RENEW_ENABLED:
+        # 返却期限通知より先に延長し、延長済みの貸出には期限通知を出さない
+        scheduler.add_job("auto_renew", settings.AUTO_RENEW_INTERVAL_SECONDS, auto_renew_job)
+    scheduler.add_job("due_soon_reminder", settings.DUE_SOON_REMINDER_INTERVAL_SECONDS, due_soon_reminder_job)
+    scheduler.add_job("notification_dispatch", settings.NOTIFICATION_DISPATCH_INTERVAL_SECONDS, notification_dispatch_job)
+    return scheduler
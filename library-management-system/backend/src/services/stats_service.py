@@ -0,0 +1,150 @@
+"""
+統計サービス - ビジネスロジック層
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, case, and_
+from typing import Dict, Any, List
+from datetime import date
+import logging
+
+from src.config.settings import Settings
+from src.models.loan import Loan, OPEN_LOAN_STATUSES
+from src.models.loan_archive import LoanArchive, loan_history
+from src.models.purchase_request import PurchaseRequest, PurchaseRequestStatus
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.user import User
+from src.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# ダッシュボード統計スナップショット
+dashboard_cache = TTLCache(name="dashboard_stats", ttl_seconds=settings.STATS_CACHE_TTL_SECONDS, max_size=1)
+
+
+class StatsService:
+    """統計サービスクラス"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_dashboard_stats(self, use_cache: bool = True) -> Dict[str, Any]:
+        """ダッシュボード統計を取得（キャッシュ未ヒット時も1往復）"""
+        if use_cache:
+            return dashboard_cache.get_or_set("dashboard", self._compute_dashboard_stats)
+        return self._compute_dashboard_stats()
+
+    def _compute_dashboard_stats(self) -> Dict[str, Any]:
+        """テーブルごとの条件付き集計をスカラーサブクエリとしてまとめて実行"""
+        users_total = select(func.count(User.id)).scalar_subquery()
+        users_active = select(
+            func.sum(case((User.is_active.is_(True), 1), else_=0))
+        ).scalar_subquery()
+        loans_total = select(func.count(Loan.id)).scalar_subquery()
+        loans_archived = select(func.count(LoanArchive.id)).scalar_subquery()
+        loans_active = select(
+            func.sum(case((Loan.status.in_(OPEN_LOAN_STATUSES), 1), else_=0))
+        ).scalar_subquery()
+        reservations_total = select(func.count(Reservation.id)).scalar_subquery()
+        requests_pending = select(
+            func.sum(case((PurchaseRequest.status == PurchaseRequestStatus.PENDING, 1), else_=0))
+        ).scalar_subquery()
+
+        row = self.db.execute(select(
+            users_total.label("users_total"),
+            users_active.label("users_active"),
+            (loans_total + loans_archived).label("loans_total"),
+            loans_active.label("loans_active"),
+            reservations_total.label("reservations_total"),
+            requests_pending.label("requests_pending"),
+        )).one()
+
+        return {
+            "users": {
+                "total": row.users_total or 0,
+                "active": int(row.users_active or 0)
+            },
+            "loans": {
+                "total": row.loans_total or 0,
+                "active": int(row.loans_active or 0)
+            },
+            "reservations": {
+                "total": row.reservations_total or 0
+            },
+            "purchase_requests": {
+                "pending": int(row.requests_pending or 0)
+            }
+        }
+
+    def get_users_stats(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """複数ユーザーの統計をまとめて取得（テーブルごとに GROUP BY user_id の1クエリ）
+
+        存在しないユーザーIDは結果に含めない。
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+
+        existing_ids = [
+            row.id for row in self.db.query(User.id).filter(User.id.in_(user_ids)).all()
+        ]
+        result = {user_id: self._empty_user_stats(user_id) for user_id in existing_ids}
+        if not result:
+            return result
+
+        today = date.today()
+        history = loan_history()
+        loan_rows = self.db.query(
+            history.c.user_id,
+            func.count(history.c.id).label("total"),
+            func.sum(case((history.c.status.in_(OPEN_LOAN_STATUSES), 1), else_=0)).label("active"),
+            func.sum(case(
+                (and_(history.c.status.in_(OPEN_LOAN_STATUSES), history.c.due_date < today), 1),
+                else_=0
+            )).label("overdue"),
+        ).filter(history.c.user_id.in_(existing_ids)).group_by(history.c.user_id).all()
+
+        for row in loan_rows:
+            result[row.user_id]["loans"] = {
+                "total": row.total or 0,
+                "active": int(row.active or 0),
+                "overdue": int(row.overdue or 0)
+            }
+
+        reservation_rows = self.db.query(
+            Reservation.user_id,
+            func.count(Reservation.id).label("total"),
+            func.sum(case((Reservation.status == ReservationStatus.PENDING, 1), else_=0)).label("active"),
+        ).filter(Reservation.user_id.in_(existing_ids)).group_by(Reservation.user_id).all()
+
+        for row in reservation_rows:
+            result[row.user_id]["reservations"] = {
+                "total": row.total or 0,
+                "active": int(row.active or 0)
+            }
+
+        request_rows = self.db.query(
+            PurchaseRequest.user_id,
+            func.count(PurchaseRequest.id).label("total"),
+            func.sum(case((PurchaseRequest.status == PurchaseRequestStatus.PENDING, 1), else_=0)).label("pending"),
+            func.sum(case((PurchaseRequest.status == PurchaseRequestStatus.APPROVED, 1), else_=0)).label("approved"),
+        ).filter(PurchaseRequest.user_id.in_(existing_ids)).group_by(PurchaseRequest.user_id).all()
+
+        for row in request_rows:
+            result[row.user_id]["purchase_requests"] = {
+                "total": row.total or 0,
+                "pending": int(row.pending or 0),
+                "approved": int(row.approved or 0)
+            }
+
+        return result
+
+    @staticmethod
+    def _empty_user_stats(user_id: int) -> Dict[str, Any]:
+        """集計対象がないユーザーの統計"""
+        return {
+            "user_id": user_id,
+            "loans": {"total": 0, "active": 0, "overdue": 0},
+            "reservations": {"total": 0, "active": 0},
+            "purchase_requests": {"total": 0, "pending": 0, "approved": 0}
+        }
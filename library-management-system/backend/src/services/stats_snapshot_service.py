@@ -0,0 +1,73 @@
+"""
+統計スナップショットサービス - ビジネスロジック層
+"""
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Callable
+from datetime import datetime, timedelta
+import logging
+
+from src.config.settings import Settings
+from src.models.stats_snapshot import StatsSnapshot
+from src.services.loan_service import LoanService
+from src.services.reservation_service import ReservationService
+from src.services.purchase_request_service import PurchaseRequestService
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# スナップショット種別 -> 集計処理
+SNAPSHOT_SOURCES: Dict[str, Callable[[Session], Dict[str, Any]]] = {
+    "loans": lambda db: LoanService(db).get_loan_statistics(),
+    "reservations": lambda db: ReservationService(db).get_reservation_statistics(),
+    "purchase_requests": lambda db: PurchaseRequestService(db).get_purchase_request_statistics(),
+}
+
+
+class StatsSnapshotService:
+    """統計スナップショットサービスクラス
+
+    貸出・予約・購入申請の統計をスケジューラーで定期保存し、
+    エンドポイントは最新スナップショットとその経過時間を返す。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def capture(self, kind: str) -> StatsSnapshot:
+        """指定種別の統計を集計して保存"""
+        if kind not in SNAPSHOT_SOURCES:
+            raise ValueError(f"未対応の統計種別です: {kind}")
+        snapshot = StatsSnapshot(kind=kind, data=SNAPSHOT_SOURCES[kind](self.db), captured_at=datetime.utcnow())
+        self.db.add(snapshot)
+        self.db.commit()
+        return snapshot
+
+    def capture_all(self) -> int:
+        """全種別のスナップショットを保存し、保持期間を過ぎたものを削除"""
+        for kind in SNAPSHOT_SOURCES:
+            self.capture(kind)
+
+        cutoff = datetime.utcnow() - timedelta(days=settings.STATS_SNAPSHOT_RETENTION_DAYS)
+        deleted = self.db.query(StatsSnapshot).filter(
+            StatsSnapshot.captured_at < cutoff
+        ).delete(synchronize_session=False)
+        self.db.commit()
+
+        logger.info(f"統計スナップショット保存: {len(SNAPSHOT_SOURCES)}件, 古いスナップショット削除: {deleted}件")
+        return len(SNAPSHOT_SOURCES)
+
+    def get_latest(self, kind: str, fresh: bool = False) -> Dict[str, Any]:
+        """最新スナップショットを取得（fresh 指定時・未作成時はその場で集計して保存）"""
+        snapshot = None
+        if not fresh:
+            snapshot = self.db.query(StatsSnapshot).filter(
+                StatsSnapshot.kind == kind
+            ).order_by(StatsSnapshot.captured_at.desc()).first()
+        if snapshot is None:
+            snapshot = self.capture(kind)
+
+        return {
+            **snapshot.data,
+            "snapshot_at": snapshot.captured_at,
+            "snapshot_age_seconds": round((datetime.utcnow() - snapshot.captured_at).total_seconds(), 1)
+        }
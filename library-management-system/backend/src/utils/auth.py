@@ -2,7 +2,7 @@
 JWT認証ユーティリティ
 """
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -10,16 +10,54 @@ from src.config.settings import Settings
 
 settings = Settings()
 
+def build_crypt_context(scheme: Optional[str] = None, rounds: Optional[int] = None) -> CryptContext:
+    """パスワードハッシュポリシーを生成
+
+    指定コスト以外で作成されたハッシュや旧方式（bcrypt）のハッシュは
+    needs_update 扱いとなり、ログイン時に再ハッシュされる。
+    """
+    scheme = scheme or settings.PASSWORD_HASH_SCHEME
+    rounds = rounds or settings.PASSWORD_HASH_ROUNDS
+    schemes = [scheme] if scheme == "bcrypt" else [scheme, "bcrypt"]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        **{
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        }
+    )
+
+
+def _build_profile_contexts() -> Dict[str, CryptContext]:
+    """プロファイル別のハッシュポリシーを生成"""
+    return {
+        "default": build_crypt_context(),
+        "fast": build_crypt_context(rounds=settings.PASSWORD_HASH_FAST_ROUNDS),
+    }
+
+
 # パスワードハッシュ化設定
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_profile_contexts = _build_profile_contexts()
+pwd_context = _profile_contexts.get(settings.PASSWORD_HASH_PROFILE, _profile_contexts["default"])
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """パスワードを検証"""
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    """パスワードをハッシュ化"""
-    return pwd_context.hash(password)
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """パスワードを検証し、ハッシュが古いポリシーの場合は新しいハッシュも返す"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def get_password_hash(password: str, profile: Optional[str] = None) -> str:
+    """パスワードをハッシュ化
+
+    profile="fast" は低コストのハッシュを生成する（テスト・一括投入用）。
+    低コストのハッシュは通常プロファイルでのログイン時に自動で再ハッシュされる。
+    """
+    context = _profile_contexts[profile] if profile else pwd_context
+    return context.hash(password)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """アクセストークンを生成"""
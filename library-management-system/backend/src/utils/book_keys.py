@@ -0,0 +1,71 @@
+"""
+書籍の重複検出用キー（ISBN-13・タイトル＋著者の正規化）
+"""
+import re
+import unicodedata
+from typing import Optional, Type
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+TITLE_KEY_MAX_LENGTH = 500
+
+
+def normalize_isbn13(isbn: Optional[str]) -> Optional[str]:
+    """ISBN をハイフン等を除いた ISBN-13 に正規化（ISBN-10 は変換、形式不正は None）"""
+    if not isbn:
+        return None
+    value = re.sub(r"[^0-9X]", "", unicodedata.normalize("NFKC", isbn).upper())
+    if len(value) == 13 and value.isdigit():
+        return value
+    if len(value) == 10 and value[:9].isdigit():
+        body = "978" + value[:9]
+        check = (10 - sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(body)) % 10) % 10
+        return body + str(check)
+    return None
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    """全角・半角、大文字・小文字、空白・記号の違いを無視した文字列"""
+    value = unicodedata.normalize("NFKC", value or "").casefold()
+    return "".join(ch for ch in value if ch.isalnum())
+
+
+def title_author_key(title: Optional[str], author: Optional[str]) -> Optional[str]:
+    """タイトルと著者の正規化キー（タイトルが空なら None）"""
+    title = _normalize_text(title)
+    if not title:
+        return None
+    return f"{title}|{_normalize_text(author)}"[:TITLE_KEY_MAX_LENGTH]
+
+
+def backfill_duplicate_keys(db: Session, model: Type, batch_size: int = 1000) -> int:
+    """isbn13 / title_key が未設定の行をバッチ単位で埋め、件数を返す（バッチごとにコミット）
+
+    model は title / author / isbn / isbn13 / title_key を持つモデル（Book, PurchaseRequest）。
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(model.id, model.title, model.author, model.isbn).filter(
+            model.id > last_id,
+            model.title_key.is_(None)
+        ).order_by(model.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        db.execute(update(model), [
+            {
+                "id": row.id,
+                "isbn13": normalize_isbn13(row.isbn),
+                "title_key": title_author_key(row.title, row.author)
+            }
+            for row in rows
+        ])
+        db.commit()
+
+        updated += len(rows)
+        if len(rows) < batch_size:
+            break
+    return updated
@@ -0,0 +1,115 @@
+"""
+インプロセスTTLキャッシュ
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+# キャッシュ共通メトリクス（cache ラベルでキャッシュごとに区別）
+CACHE_HITS = Counter("library_cache_hits_total", "キャッシュヒット数", ["cache"])
+CACHE_MISSES = Counter("library_cache_misses_total", "キャッシュミス数", ["cache"])
+CACHE_INVALIDATIONS = Counter("library_cache_invalidations_total", "キャッシュ無効化数", ["cache"])
+CACHE_SIZE = Gauge("library_cache_entries", "キャッシュエントリ数", ["cache"])
+
+_MISSING = object()
+
+# 登録済みキャッシュ（統計取得用）
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """有効期限付きのスレッドセーフなキャッシュ
+
+    プロセス内でのみ共有されるため、複数ワーカー構成では
+    他ワーカーの無効化は TTL 経過まで反映されない点に注意。
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_size: int = 10000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """キャッシュから値を取得（期限切れ・未登録の場合は default）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                CACHE_HITS.labels(cache=self.name).inc()
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self._misses += 1
+        CACHE_MISSES.labels(cache=self.name).inc()
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """値をキャッシュに登録"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.max_size and key not in self._data:
+                self._evict_locked()
+            self._data[key] = (time.monotonic() + ttl, value)
+            size = len(self._data)
+        CACHE_SIZE.labels(cache=self.name).set(size)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """キャッシュにない場合は loader で取得して登録"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """指定キーを無効化"""
+        with self._lock:
+            removed = self._data.pop(key, None) is not None
+            size = len(self._data)
+        if removed:
+            CACHE_INVALIDATIONS.labels(cache=self.name).inc()
+        CACHE_SIZE.labels(cache=self.name).set(size)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._data.clear()
+        CACHE_SIZE.labels(cache=self.name).set(0)
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計情報を取得"""
+        with self._lock:
+            hits, misses, size = self._hits, self._misses, len(self._data)
+        total = hits + misses
+        return {
+            "cache": self.name,
+            "entries": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total * 100, 2) if total > 0 else 0.0,
+        }
+
+    def _evict_locked(self) -> None:
+        """期限切れエントリを削除し、それでも満杯なら最も古いエントリを削除"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.max_size:
+            oldest_key = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest_key]
+
+
+def get_all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """登録済みの全キャッシュの統計情報を取得"""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,73 @@
+"""
+集計テーブル用のカウンター加算ユーティリティ
+"""
+from typing import Any, Dict, Optional, Type
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def increment_counter(
+    db: Session,
+    model: Type[Any],
+    keys: Dict[str, Any],
+    increments: Dict[str, Any],
+    updates: Optional[Dict[str, Any]] = None,
+) -> None:
+    """キー行のカウンターを加算（行がなければ作成）
+
+    updates に指定した列は加算ではなく最新値で上書きする。
+
+    PostgreSQL / SQLite では INSERT ... ON CONFLICT DO UPDATE の1文で実行し、
+    同時更新でも加算が失われない。コミットは呼び出し側で行う。
+    """
+    dialect = db.get_bind().dialect.name
+    updates = updates or {}
+    values = {**keys, **increments, **updates}
+    table = model.__table__
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys.keys()),
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in increments},
+                **{column: stmt.excluded[column] for column in updates},
+            },
+        )
+        db.execute(stmt)
+        return
+
+    # その他のDBでは UPDATE → 0件なら INSERT（競合時は UPDATE を再試行）
+    criteria = [table.c[column] == value for column, value in keys.items()]
+    update_values = {column: table.c[column] + value for column, value in increments.items()}
+    update_values.update(updates)
+    result = db.execute(table.update().where(*criteria).values(**update_values))
+    if result.rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(table.insert().values(**values))
+    except IntegrityError:
+        db.execute(table.update().where(*criteria).values(**update_values))
+
+
+def apply_deltas(db: Session, column: Any, deltas: Dict[int, int]) -> None:
+    """行ID -> 増減値 をカラムに加算（1文の UPDATE。増減0の行は対象外）
+
+    column にはモデルの属性（例: Book.active_loan_count）を渡す。
+    他の更新と同一トランザクションで使い、コミットは呼び出し側で行う。
+    """
+    deltas = {row_id: delta for row_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    model = column.class_
+    db.execute(
+        update(model).where(
+            model.id.in_(list(deltas))
+        ).values({
+            column.key: column + case(deltas, value=model.id, else_=0)
+        }).execution_options(synchronize_session=False)
+    )
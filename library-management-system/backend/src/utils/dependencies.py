@@ -4,22 +4,29 @@ FastAPI依存関数
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, Dict, Any
+from dataclasses import dataclass
 from src.utils.auth import verify_token
 from src.database.connection import get_db
-from src.models.database import User
+from src.models.database import User, UserRole
+from src.utils.principal_cache import load_principal
+from src.utils.token_version import get_token_version
 
 # HTTPBearer認証スキーム
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """現在のユーザーを取得"""
-    token = credentials.credentials
-    payload = verify_token(token)
-    
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """検証済みトークンのクレームから構築した認証主体"""
+    id: int
+    email: Optional[str]
+    role: UserRole
+    is_active: bool = True
+
+
+def _get_user_id(payload: Dict[str, Any]) -> int:
+    """ペイロードからユーザーIDを取得"""
     user_id_str = payload.get("sub")
     if user_id_str is None:
         raise HTTPException(
@@ -28,15 +35,39 @@ def get_current_user(
         )
     
     try:
-        user_id = int(user_id_str)
+        return int(user_id_str)
     except (ValueError, TypeError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="無効なユーザーIDです",
         )
+
+
+def _check_token_version(payload: Dict[str, Any], user_id: int, db: Session) -> None:
+    """トークンバージョンが失効していないかチェック"""
+    token_version = payload.get("tv")
+    if token_version is None:
+        return
+    if token_version != get_token_version(db, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="トークンは失効しています。再度ログインしてください",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """現在のユーザーを取得"""
+    token = credentials.credentials
+    payload = verify_token(token)
+    user_id = _get_user_id(payload)
+    _check_token_version(payload, user_id, db)
     
-    # データベースからユーザーを取得
-    user = db.query(User).filter(User.id == user_id).first()
+    # ユーザーを取得（短時間キャッシュ経由）
+    user = load_principal(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,7 +88,36 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     # get_current_user で既にアクティブ状態をチェック済み
     return current_user
 
-def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
+def get_token_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> TokenPrincipal:
+    """トークンのクレームから認証主体を取得（ユーザーテーブルを参照しない）
+
+    ロールとトークンバージョンを含まない旧形式のトークンは
+    従来どおりユーザーを読み込んで判定する。
+    """
+    payload = verify_token(credentials.credentials)
+    user_id = _get_user_id(payload)
+    
+    role_value = payload.get("role")
+    if role_value is None or payload.get("tv") is None:
+        user = get_current_user(credentials, db)
+        return TokenPrincipal(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+    
+    _check_token_version(payload, user_id, db)
+    
+    try:
+        role = UserRole(role_value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なトークンです",
+        )
+    
+    return TokenPrincipal(id=user_id, email=payload.get("email"), role=role)
+
+def require_admin(current_user: TokenPrincipal = Depends(get_token_principal)) -> TokenPrincipal:
     """管理者権限が必要"""
     if current_user.role.value != "admin":
         raise HTTPException(
@@ -66,7 +126,7 @@ def require_admin(current_user: User = Depends(get_current_active_user)) -> User
         )
     return current_user
 
-def require_approver_or_admin(current_user: User = Depends(get_current_active_user)) -> User:
+def require_approver_or_admin(current_user: TokenPrincipal = Depends(get_token_principal)) -> TokenPrincipal:
     """承認者または管理者権限が必要"""
     if current_user.role.value not in ["approver", "admin"]:
         raise HTTPException(
@@ -92,17 +152,10 @@ def get_optional_current_user(
     try:
         token = authorization.replace("Bearer ", "")
         payload = verify_token(token)
-        user_id_str = payload.get("sub")
-        
-        if user_id_str is None:
-            return None
-        
-        try:
-            user_id = int(user_id_str)
-        except (ValueError, TypeError):
-            return None
+        user_id = _get_user_id(payload)
+        _check_token_version(payload, user_id, db)
         
-        user = db.query(User).filter(User.id == user_id).first()
+        user = load_principal(db, user_id)
         return user
     except:
         return None 
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+DBアドバイザリロック（複数ワーカーでの定期ジョブ重複実行防止）
+"""
+import zlib
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def try_advisory_xact_lock(db: Session, name: str) -> bool:
+    """名前付きのトランザクションスコープロックを取得（取得できなければ False）
+
+    PostgreSQL では pg_try_advisory_xact_lock を使い、コミット／ロールバックで解放される。
+    アドバイザリロックのないDB（SQLite等）は単一ワーカー前提として常に取得成功とする。
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    key = zlib.crc32(name.encode())
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}).scalar())
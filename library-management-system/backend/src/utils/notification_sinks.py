@@ -0,0 +1,101 @@
+"""
+通知の配信先（シンク）
+
+NOTIFICATION_SINK 設定で log / smtp / webhook を切り替える。
+"""
+import logging
+import smtplib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Optional
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingNotification:
+    """配信する通知1件"""
+    id: int
+    kind: str
+    user_id: int
+    email: Optional[str]
+    subject: str
+    message: str
+
+
+class NotificationSink(ABC):
+    """通知シンクの基底クラス（配信失敗時は例外を送出する）"""
+
+    @abstractmethod
+    def send(self, notification: OutgoingNotification) -> None:
+        """通知1件を配信"""
+
+
+class LogSink(NotificationSink):
+    """ログ出力のみ行うシンク（開発用）"""
+
+    def send(self, notification: OutgoingNotification) -> None:
+        logger.info(
+            f"通知: ユーザーID{notification.user_id}, タイプ{notification.kind}, "
+            f"件名: {notification.subject}, メッセージ: {notification.message}"
+        )
+
+
+class SmtpSink(NotificationSink):
+    """SMTP でメール送信するシンク（ローカルのSMTPサーバー等）"""
+
+    def __init__(self, host: str, port: int, sender: str, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, notification: OutgoingNotification) -> None:
+        if not notification.email:
+            raise ValueError(f"ユーザーID{notification.user_id}のメールアドレスがありません")
+        mail = EmailMessage()
+        mail["From"] = self.sender
+        mail["To"] = notification.email
+        mail["Subject"] = notification.subject
+        mail.set_content(notification.message)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(mail)
+
+
+class WebhookSink(NotificationSink):
+    """Webhook に JSON を POST するシンク"""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notification: OutgoingNotification) -> None:
+        import requests
+        
+        response = requests.post(
+            self.url,
+            json={
+                "id": notification.id,
+                "kind": notification.kind,
+                "user_id": notification.user_id,
+                "email": notification.email,
+                "subject": notification.subject,
+                "message": notification.message,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+
+def build_sink(settings: Settings) -> NotificationSink:
+    """設定に応じたシンクを作成"""
+    if settings.NOTIFICATION_SINK == "smtp":
+        return SmtpSink(settings.SMTP_HOST, settings.SMTP_PORT, settings.NOTIFICATION_SENDER)
+    if settings.NOTIFICATION_SINK == "webhook":
+        if not settings.NOTIFICATION_WEBHOOK_URL:
+            raise ValueError("NOTIFICATION_WEBHOOK_URL が設定されていません")
+        return WebhookSink(settings.NOTIFICATION_WEBHOOK_URL)
+    return LogSink()
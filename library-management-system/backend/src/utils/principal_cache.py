@@ -0,0 +1,47 @@
+"""
+認証ユーザー（プリンシパル）キャッシュ
+"""
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from src.config.settings import Settings
+from src.models.user import User
+from src.utils.cache import TTLCache
+
+settings = Settings()
+
+# ユーザーID -> デタッチ済みUserスナップショット
+principal_cache = TTLCache(
+    name="principal",
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+def _snapshot(user: User) -> User:
+    """セッションから切り離したUserのコピーを作成"""
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def load_principal(db: Session, user_id: int) -> Optional[User]:
+    """ユーザーを取得（キャッシュにあればDBアクセスなし）
+
+    キャッシュヒット時は ``merge(load=False)`` でセッションに結び付けるため、
+    呼び出し側はクエリで取得した場合と同様に更新・コミットできる。
+    """
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        principal_cache.set(user_id, _snapshot(user))
+    return user
+
+
+def invalidate_principal(user_id: int) -> None:
+    """ユーザー情報の変更時にキャッシュを無効化"""
+    principal_cache.invalidate(user_id)
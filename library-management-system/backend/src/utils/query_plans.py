@@ -0,0 +1,100 @@
+"""
+頻出クエリの実行計画チェック
+
+貸出・予約・購入申請・書籍の頻出クエリを発行するサービスメソッドと、それぞれが使うべきインデックスの一覧。
+サービスメソッドの実行中に発行された SQL をそのまま EXPLAIN するため、サービス側のクエリが変わっても
+チェック対象がずれない。tests/unit/test_query_plans.py（SQLite）と scripts/check_query_plans.py（設定中のDB）から使う。
+"""
+from typing import Any, Callable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.schemas.purchase_request import DuplicateCheckItem
+from src.services.book_service import BookService
+from src.services.loan_service import LoanService
+from src.services.purchase_request_service import PurchaseRequestService
+from src.services.reservation_service import ReservationService
+
+# 実行計画を確認する文の種類（INSERT やロック取得などは対象外）
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+_DUPLICATE_CHECK_ITEM = DuplicateCheckItem(title="Python入門", author="山田太郎", isbn="9784873115658")
+
+# (説明, 期待するインデックス名, 頻出クエリを発行するサービスメソッドの呼び出し)
+QUERY_PLAN_CASES: List[Tuple[str, str, Callable[[Session], Any]]] = [
+    (
+        "延滞スイープ対象の貸出",
+        "ix_loans_status_due_date",
+        lambda db: LoanService(db).sweep_overdue_loans(),
+    ),
+    (
+        "利用者の貸出中一覧",
+        "ix_loans_user_id_status",
+        lambda db: LoanService(db).get_user_active_loans(1),
+    ),
+    (
+        "書籍一覧の現在の貸出",
+        "ix_loans_open_book_id",
+        lambda db: BookService(db).get_books(),
+    ),
+    (
+        "新着順の書籍一覧",
+        "ix_books_created_at",
+        lambda db: BookService(db).get_books(),
+    ),
+    (
+        "書籍の予約待ち順位",
+        "ix_reservations_queue_order",
+        lambda db: ReservationService(db).get_queue_positions([1]),
+    ),
+    (
+        "承認待ちの購入申請",
+        "ix_purchase_requests_status_priority_created_at",
+        lambda db: PurchaseRequestService(db).get_pending_requests(),
+    ),
+    (
+        "所蔵済み判定（ISBN-13）",
+        "ix_books_isbn13",
+        lambda db: PurchaseRequestService(db).find_duplicates([_DUPLICATE_CHECK_ITEM]),
+    ),
+    (
+        "重複申請判定（タイトル＋著者）",
+        "ix_purchase_requests_title_key",
+        lambda db: PurchaseRequestService(db).find_duplicates([_DUPLICATE_CHECK_ITEM]),
+    ),
+]
+
+
+def capture_statements(db: Session, run: Callable[[Session], Any]) -> List[Tuple[str, Any]]:
+    """run(db) の実行中に発行された SELECT / UPDATE / DELETE 文を (SQL, パラメーター) で取得"""
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in EXPLAINED_STATEMENTS:
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    return statements
+
+
+def explain_statement(db: Session, statement: str, parameters: Any) -> str:
+    """発行された SQL の実行計画を文字列で取得"""
+    if db.get_bind().dialect.name == "sqlite":
+        rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        return "\n".join(str(row[-1]) for row in rows)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def statement_plans(db: Session, run: Callable[[Session], Any]) -> List[Tuple[str, str]]:
+    """run(db) が発行した文ごとの (SQL, 実行計画)"""
+    return [
+        (statement, explain_statement(db, statement, parameters))
+        for statement, parameters in capture_statements(db, run)
+    ]
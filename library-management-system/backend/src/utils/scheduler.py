@@ -0,0 +1,60 @@
+"""
+定期実行ジョブのスケジューラー
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledJob:
+    """一定間隔で実行するジョブ"""
+    name: str
+    interval_seconds: float
+    func: Callable[[], None]
+    next_run: float = 0.0
+
+
+class IntervalScheduler:
+    """単一スレッドで登録ジョブを順に実行するスケジューラー
+
+    ジョブの例外はログに記録して次回実行に持ち越し、他のジョブは止めない。
+    """
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.tick_seconds = tick_seconds
+        self.jobs: List[ScheduledJob] = []
+        self._stop = threading.Event()
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable[[], None], run_immediately: bool = True) -> None:
+        """ジョブを登録"""
+        next_run = time.monotonic() if run_immediately else time.monotonic() + interval_seconds
+        self.jobs.append(ScheduledJob(name=name, interval_seconds=interval_seconds, func=func, next_run=next_run))
+
+    def run_pending(self) -> None:
+        """実行時刻を過ぎたジョブを実行"""
+        for job in self.jobs:
+            if time.monotonic() < job.next_run:
+                continue
+            started = time.monotonic()
+            try:
+                job.func()
+            except Exception as e:
+                logger.error(f"定期ジョブ失敗: {job.name}: {str(e)}")
+            job.next_run = started + job.interval_seconds
+
+    def run_forever(self) -> None:
+        """停止されるまでジョブを実行し続ける"""
+        logger.info(f"スケジューラー開始: {[job.name for job in self.jobs]}")
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.tick_seconds)
+        logger.info("スケジューラー停止")
+
+    def stop(self) -> None:
+        """スケジューラーを停止"""
+        self._stop.set()
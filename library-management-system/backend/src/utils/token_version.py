@@ -0,0 +1,44 @@
+"""
+トークンバージョン管理（アクセストークン失効用）
+"""
+from sqlalchemy.orm import Session
+
+from src.config.settings import Settings
+from src.models.user_token_version import UserTokenVersion
+from src.utils.cache import TTLCache
+
+settings = Settings()
+
+# ユーザーID -> 現在のトークンバージョン
+token_version_cache = TTLCache(
+    name="token_version",
+    ttl_seconds=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+def get_token_version(db: Session, user_id: int) -> int:
+    """ユーザーの現在のトークンバージョンを取得（未登録は0）"""
+    def _load() -> int:
+        version = db.query(UserTokenVersion.version).filter(
+            UserTokenVersion.user_id == user_id
+        ).scalar()
+        return version or 0
+
+    return token_version_cache.get_or_set(user_id, _load)
+
+
+def bump_token_version(db: Session, user_id: int) -> int:
+    """トークンバージョンを上げる（コミットは呼び出し側で行う）"""
+    record = db.query(UserTokenVersion).filter(UserTokenVersion.user_id == user_id).first()
+    if record is None:
+        record = UserTokenVersion(user_id=user_id, version=1)
+        db.add(record)
+    else:
+        record.version = record.version + 1
+    return record.version
+
+
+def invalidate_token_version(user_id: int) -> None:
+    """コミット後にキャッシュを無効化"""
+    token_version_cache.invalidate(user_id)
@@ -1,6 +1,11 @@
 """
 pytest設定とフィクスチャ
 """
+import os
+
+# テストでは低コストのパスワードハッシュを使用
+os.environ.setdefault("PASSWORD_HASH_PROFILE", "fast")
+
 import pytest
 import asyncio
 from typing import AsyncGenerator, Generator
@@ -10,7 +15,7 @@ from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
-from src.main import app
+import src.models  # noqa: F401  全モデルをメタデータに登録
 from src.models.base import Base
 from src.database.connection import get_db
 from src.models.user import User, UserRole
@@ -55,6 +60,8 @@ def db_session() -> Generator[Session, None, None]:
 @pytest.fixture
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     """テスト用FastAPIクライアント"""
+    from src.main import app
+    
     def override_get_db():
         try:
             yield db_session
@@ -72,6 +79,8 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
 @pytest.fixture
 async def async_client(db_session: Session) -> AsyncGenerator[AsyncClient, None]:
     """テスト用非同期クライアント"""
+    from src.main import app
+    
     def override_get_db():
         try:
             yield db_session
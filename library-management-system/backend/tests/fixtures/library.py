@@ -0,0 +1,82 @@
+"""
+サービス層テスト用のデータ作成ヘルパー
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from src.models.book import Book, BookStatus
+from src.models.loan import Loan, LoanStatus
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.user import User, UserRole
+
+
+def make_user(
+    db: Session,
+    username: str,
+    role: UserRole = UserRole.USER,
+    department: Optional[str] = None
+) -> User:
+    """利用者を作成"""
+    user = User(
+        username=username,
+        email=f"{username}@example.com",
+        hashed_password="not-used",
+        full_name=username,
+        department=department,
+        role=role,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def make_book(db: Session, title: str, copies: int = 1, isbn: Optional[str] = None) -> Book:
+    """貸出可能な書籍を作成"""
+    book = Book(
+        title=title,
+        author="著者",
+        isbn=isbn,
+        status=BookStatus.AVAILABLE,
+        total_copies=copies,
+        available_copies=copies,
+    )
+    db.add(book)
+    db.commit()
+    return book
+
+
+def make_loan(db: Session, user: User, book: Book, due_in_days: int = 14, renewal_count: int = 0) -> Loan:
+    """貸出中の貸出を作成（書籍の在庫・カウンターも合わせる）"""
+    loan = Loan(
+        user_id=user.id,
+        book_id=book.id,
+        loan_date=date.today() - timedelta(days=7),
+        due_date=date.today() + timedelta(days=due_in_days),
+        status=LoanStatus.ACTIVE,
+        renewal_count=renewal_count,
+    )
+    db.add(loan)
+    book.available_copies -= 1
+    book.active_loan_count += 1
+    if book.available_copies == 0:
+        book.status = BookStatus.BORROWED
+    db.commit()
+    return loan
+
+
+def make_reservation(db: Session, user: User, book: Book, priority: int = 1) -> Reservation:
+    """待機中の予約を作成（書籍の予約待ち数も合わせる）"""
+    reservation = Reservation(
+        user_id=user.id,
+        book_id=book.id,
+        reservation_date=date.today(),
+        expiry_date=date.today() + timedelta(days=7),
+        status=ReservationStatus.PENDING,
+        priority=priority,
+    )
+    db.add(reservation)
+    book.pending_reservation_count += 1
+    db.commit()
+    return reservation
@@ -0,0 +1,140 @@
+"""
+貸出サービスのテスト
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from src.models.book import Book, BookStatus
+from src.models.loan import Loan, LoanStatus
+from src.models.notification_outbox import NotificationOutbox
+from src.models.reservation import Reservation, ReservationStatus
+from src.services.book_service import BookService
+from src.services.loan_service import LoanService
+from src.services.notification_service import NotificationService, KIND_LOAN_AUTO_RENEWED
+from tests.fixtures.library import make_book, make_loan, make_reservation, make_user
+
+
+def _counts(db, book):
+    """(在庫数, 貸出中数, 予約待ち数, 状態)"""
+    db.expire_all()
+    book = db.get(Book, book.id)
+    return book.available_copies, book.active_loan_count, book.pending_reservation_count, book.status
+
+
+def test_return_book_restores_copy_with_counters(db_session):
+    a, b = make_user(db_session, "a"), make_user(db_session, "b")
+    book = make_book(db_session, "複本のある本", copies=2)
+    first, second = make_loan(db_session, a, book), make_loan(db_session, b, book)
+
+    service = LoanService(db_session)
+    service.return_book(first.id)
+    db_session.expire_all()
+    book = db_session.get(Book, book.id)
+    assert (book.available_copies, book.active_loan_count, book.status) == (1, 1, BookStatus.AVAILABLE)
+
+    service.return_book(second.id)
+    db_session.expire_all()
+    book = db_session.get(Book, book.id)
+    assert (book.available_copies, book.active_loan_count) == (2, 0)
+    assert db_session.get(Loan, second.id).status == LoanStatus.RETURNED
+    assert BookService(db_session).reconcile_circulation_counts() == 0
+
+
+def test_bulk_checkout_reports_each_request_and_keeps_counters(db_session):
+    user, other = make_user(db_session, "borrower"), make_user(db_session, "other")
+    free = make_book(db_session, "貸出可能な本", copies=2)
+    by_isbn = make_book(db_session, "ISBNで指定する本", isbn="9784873115658")
+    lent = make_book(db_session, "貸出中の本")
+    make_loan(db_session, other, lent)
+
+    results = LoanService(db_session).bulk_checkout(
+        user.id, [free.id, 9999, lent.id, free.id], ["9784873115658", "9780000000000"]
+    )
+
+    assert [(r["requested_book_id"], r["book_id"], r["isbn"], r["success"]) for r in results] == [
+        (free.id, free.id, None, True),
+        (9999, None, None, False),
+        (lent.id, lent.id, None, False),
+        (free.id, free.id, None, False),
+        (None, by_isbn.id, "9784873115658", True),
+        (None, None, "9780000000000", False),
+    ]
+    assert results[1]["message"] == "指定された書籍が見つかりません"
+    assert results[3]["message"] == "同じ書籍が重複して指定されています"
+    assert db_session.query(Loan).filter(Loan.user_id == user.id).count() == 2
+    assert _counts(db_session, free) == (1, 1, 0, BookStatus.AVAILABLE)
+    assert _counts(db_session, by_isbn) == (0, 1, 0, BookStatus.BORROWED)
+    assert _counts(db_session, lent) == (0, 1, 0, BookStatus.BORROWED)
+    assert BookService(db_session).reconcile_circulation_counts() == 0
+
+
+def test_bulk_return_hands_off_reserved_copies_and_keeps_counters(db_session):
+    user, waiting = make_user(db_session, "borrower"), make_user(db_session, "waiting")
+    reserved = make_book(db_session, "予約のある本")
+    plain = make_book(db_session, "予約のない本")
+    idle = make_book(db_session, "貸出のない本")
+    reserved_loan, plain_loan = make_loan(db_session, user, reserved), make_loan(db_session, user, plain)
+    reservation = make_reservation(db_session, waiting, reserved)
+
+    results = LoanService(db_session).bulk_return([reserved.id, plain.id, plain.id, idle.id, 9999], [])
+
+    assert [(r["requested_book_id"], r["success"], r["loan_id"]) for r in results] == [
+        (reserved.id, True, reserved_loan.id),
+        (plain.id, True, plain_loan.id),
+        (plain.id, False, None),
+        (idle.id, False, None),
+        (9999, False, None),
+    ]
+    assert results[2]["message"] == "この書籍の未返却の貸出が見つかりません"
+    assert results[4]["book_id"] is None
+    assert db_session.get(Reservation, reservation.id).status == ReservationStatus.READY
+    assert db_session.query(NotificationOutbox).filter(NotificationOutbox.user_id == waiting.id).count() == 1
+    assert _counts(db_session, reserved) == (1, 0, 0, BookStatus.RESERVED)
+    assert _counts(db_session, plain) == (1, 0, 0, BookStatus.AVAILABLE)
+    assert _counts(db_session, idle) == (1, 0, 0, BookStatus.AVAILABLE)
+    assert BookService(db_session).reconcile_circulation_counts() == 0
+
+
+def _auto_renewal_notices(db):
+    return db.query(NotificationOutbox).filter(NotificationOutbox.kind == KIND_LOAN_AUTO_RENEWED).all()
+
+
+def test_auto_renew_rejects_window_not_shorter_than_extension(db_session):
+    with pytest.raises(ValueError):
+        LoanService(db_session).auto_renew_loans(due_within_days=7, extension_days=7)
+
+
+def test_auto_renew_skips_books_with_pending_reservations(db_session):
+    user, waiting = make_user(db_session, "borrower"), make_user(db_session, "waiting")
+    free, reserved = make_book(db_session, "予約のない本"), make_book(db_session, "予約のある本")
+    free_loan = make_loan(db_session, user, free, due_in_days=1)
+    reserved_loan = make_loan(db_session, user, reserved, due_in_days=1)
+    make_reservation(db_session, waiting, reserved)
+
+    renewed = LoanService(db_session).auto_renew_loans(due_within_days=2, extension_days=7)
+
+    db_session.expire_all()
+    assert [loan["loan_id"] for loan in renewed] == [free_loan.id]
+    assert db_session.get(Loan, free_loan.id).due_date == date.today() + timedelta(days=8)
+    assert db_session.get(Loan, free_loan.id).renewal_count == 1
+    assert db_session.get(Loan, reserved_loan.id).due_date == date.today() + timedelta(days=1)
+    assert db_session.get(Loan, reserved_loan.id).renewal_count == 0
+
+
+def test_auto_renew_queues_one_notice_across_repeated_runs(db_session):
+    user = make_user(db_session, "borrower")
+    loans = [make_loan(db_session, user, make_book(db_session, f"本{n}"), due_in_days=n) for n in (0, 2)]
+
+    service = LoanService(db_session)
+    renewed = service.auto_renew_loans(due_within_days=2, extension_days=7)
+    assert sorted(loan["loan_id"] for loan in renewed) == sorted(loan.id for loan in loans)
+    # 延長後の期限は対象期間外のため、同じ日に再実行しても再延長・再通知しない
+    assert service.auto_renew_loans(due_within_days=2, extension_days=7) == []
+    # 同じ延長結果の通知を積み直しても（コミット後の再試行など）重複しない
+    assert NotificationService(db_session).enqueue_auto_renewal_summaries(renewed) == 0
+    db_session.commit()
+
+    notices = _auto_renewal_notices(db_session)
+    assert [notice.user_id for notice in notices] == [user.id]
+    assert "本0" in notices[0].message and "本2" in notices[0].message
@@ -0,0 +1,35 @@
+"""
+購入予算集計サービスのテスト
+"""
+from decimal import Decimal
+
+from src.models.purchase_budget_rollup import PurchaseBudgetRollup
+from src.schemas.purchase_request import PurchaseRequestCreate
+from src.services.purchase_budget_service import PurchaseBudgetService
+from src.services.purchase_request_service import PurchaseRequestService
+from tests.fixtures.library import make_user
+
+
+def _rollup_rows(db):
+    return sorted(
+        (row.department, row.status, row.request_count, row.total_amount)
+        for row in db.query(PurchaseBudgetRollup).filter(PurchaseBudgetRollup.request_count != 0)
+    )
+
+
+def test_department_change_after_request_keeps_rollup_consistent(db_session):
+    user = make_user(db_session, "requester", department="開発部")
+    service = PurchaseRequestService(db_session)
+    created = service.create_purchase_request(PurchaseRequestCreate(
+        user_id=user.id, title="新しい本", author="著者", estimated_price=Decimal("1200"), reason="業務で使用"
+    ))
+
+    # 申請後に異動しても、承認の移し替えは申請時点の部署の行に対して行われる
+    user.department = "営業部"
+    db_session.commit()
+    service.approve_request(created.id)
+
+    expected = [("開発部", "approved", 1, Decimal("1200"))]
+    assert _rollup_rows(db_session) == expected
+    PurchaseBudgetService(db_session).rebuild()
+    assert _rollup_rows(db_session) == expected
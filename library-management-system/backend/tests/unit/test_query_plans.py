@@ -0,0 +1,59 @@
+"""
+頻出クエリの実行計画テスト（SQLite の EXPLAIN QUERY PLAN で想定インデックスの使用を確認）
+
+スキーマはモデルの create_all ではなくマイグレーション（alembic upgrade head）で作成し、
+本番と同じくインデックスがマイグレーションで作られていることも合わせて確認する。
+"""
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+import src.models  # noqa: F401  全モデルをメタデータに登録
+from src.models.base import Base
+from src.utils.query_plans import QUERY_PLAN_CASES, statement_plans
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# create_tables.sql で作成済みの前提でマイグレーションが起点とするテーブル
+BASELINE_TABLES = ("users", "books", "loans", "reservations", "purchase_requests")
+
+
+@pytest.fixture(scope="module")
+def plan_session(tmp_path_factory):
+    """ベースのテーブル（インデックスなし）に alembic upgrade head を適用した SQLite のセッション"""
+    url = f"sqlite:///{tmp_path_factory.mktemp('query_plans') / 'plans.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for name in BASELINE_TABLES:
+            conn.execute(CreateTable(Base.metadata.tables[name]))
+
+    config = Config()
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "label, index_name, run",
+    QUERY_PLAN_CASES,
+    ids=[index_name for _, index_name, _ in QUERY_PLAN_CASES],
+)
+def test_service_query_uses_expected_index(plan_session, label, index_name, run):
+    plans = statement_plans(plan_session, run)
+    assert plans, f"{label}: 実行計画を確認する SQL が発行されていません"
+    assert any(index_name in plan for _, plan in plans), (
+        f"{label}: {index_name} が使われていません\n"
+        + "\n\n".join(f"{statement}\n{plan}" for statement, plan in plans)
+    )
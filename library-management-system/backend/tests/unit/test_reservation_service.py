@@ -0,0 +1,77 @@
+"""
+予約サービスのテスト（期限切れ予約の後続予約への引き当て）
+"""
+from datetime import date, timedelta
+
+from src.models.book import Book, BookStatus
+from src.models.notification_outbox import NotificationOutbox
+from src.models.reservation import Reservation, ReservationStatus
+from src.schemas.loan import LoanCreate
+from src.services.loan_service import LoanService
+from src.services.reservation_service import ReservationService
+from tests.fixtures.library import make_book, make_loan, make_reservation, make_user
+
+
+def _expire(db, reservation):
+    reservation.expiry_date = date.today() - timedelta(days=1)
+    db.commit()
+
+
+def _queue_after_return(db):
+    """1冊の書籍を X が借り、A・B が予約待ちの状態から X が返却する"""
+    x, a, b = make_user(db, "x"), make_user(db, "a"), make_user(db, "b")
+    book = make_book(db, "人気の本")
+    loan = make_loan(db, x, book)
+    first = make_reservation(db, a, book)
+    second = make_reservation(db, b, book)
+    LoanService(db).return_book(loan.id)
+    return book, a, first, second
+
+
+def test_pickup_completes_ready_reservation_and_expiry_does_not_hand_off(db_session):
+    book, a, first, second = _queue_after_return(db_session)
+    assert db_session.get(Reservation, first.id).status == ReservationStatus.READY
+
+    LoanService(db_session).create_loan(LoanCreate(user_id=a.id, book_id=book.id))
+    assert db_session.get(Reservation, first.id).status == ReservationStatus.COMPLETED
+
+    _expire(db_session, db_session.get(Reservation, first.id))
+    result = ReservationService(db_session).expire_reservations()
+
+    db_session.expire_all()
+    assert result["handed_off"] == []
+    assert db_session.get(Reservation, second.id).status == ReservationStatus.PENDING
+    assert db_session.get(Book, book.id).status == BookStatus.BORROWED
+
+
+def test_expired_ready_reservation_on_borrowed_book_is_not_handed_off(db_session):
+    """受け取り時に完了にならなかった既存の READY 予約が期限切れになっても、貸出中の冊は引き当てない"""
+    book, a, first, second = _queue_after_return(db_session)
+    LoanService(db_session).create_loan(LoanCreate(user_id=a.id, book_id=book.id))
+    reservation = db_session.get(Reservation, first.id)
+    reservation.status = ReservationStatus.READY
+    _expire(db_session, reservation)
+
+    result = ReservationService(db_session).expire_reservations()
+
+    db_session.expire_all()
+    assert result == {"expired": [first.id], "handed_off": []}
+    assert db_session.get(Reservation, second.id).status == ReservationStatus.PENDING
+    assert db_session.query(NotificationOutbox).filter(
+        NotificationOutbox.user_id == second.user_id
+    ).count() == 0
+
+
+def test_unclaimed_ready_reservation_hands_off_held_copy(db_session):
+    book, a, first, second = _queue_after_return(db_session)
+    _expire(db_session, db_session.get(Reservation, first.id))
+
+    result = ReservationService(db_session).expire_reservations()
+
+    db_session.expire_all()
+    assert result == {"expired": [first.id], "handed_off": [second.id]}
+    assert db_session.get(Reservation, second.id).status == ReservationStatus.READY
+    book = db_session.get(Book, book.id)
+    assert book.status == BookStatus.RESERVED
+    assert book.available_copies == 1
+    assert book.pending_reservation_count == 0
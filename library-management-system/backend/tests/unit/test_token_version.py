@@ -0,0 +1,108 @@
+"""
+トークンバージョンによる発行済みトークン失効のテスト
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.api.auth import TokenRefresh, refresh_token
+from src.api.users import UserUpdate, delete_user, update_user
+from src.models.user import UserRole
+from src.utils.auth import create_access_token, create_refresh_token
+from src.utils.dependencies import get_token_principal
+from src.utils.principal_cache import principal_cache
+from src.utils.token_version import (
+    bump_token_version, get_token_version, invalidate_token_version, token_version_cache
+)
+from tests.fixtures.library import make_user
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """テストごとにユーザーIDが重複するため、プロセス内キャッシュを空にする"""
+    token_version_cache.clear()
+    principal_cache.clear()
+    yield
+    token_version_cache.clear()
+    principal_cache.clear()
+
+
+def _issue_tokens(db, user):
+    """ログイン時と同じクレームでアクセストークン・リフレッシュトークンを発行"""
+    tv = get_token_version(db, user.id)
+    access = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role.value, "tv": tv})
+    refresh = create_refresh_token({"sub": str(user.id), "email": user.email, "tv": tv})
+    return access, refresh
+
+
+def _principal(db, access):
+    return get_token_principal(HTTPAuthorizationCredentials(scheme="Bearer", credentials=access), db)
+
+
+def _assert_rejected(call):
+    with pytest.raises(HTTPException) as exc_info:
+        call()
+    assert exc_info.value.status_code == 401
+
+
+@pytest.fixture
+def admin(db_session):
+    return make_user(db_session, "admin", role=UserRole.ADMIN)
+
+
+def test_role_change_invalidates_issued_tokens(db_session, admin):
+    user = make_user(db_session, "member")
+    access, refresh = _issue_tokens(db_session, user)
+    assert _principal(db_session, access).role == UserRole.USER
+
+    asyncio.run(update_user(user.id, UserUpdate(role="admin"), db=db_session, current_user=admin))
+
+    _assert_rejected(lambda: _principal(db_session, access))
+    _assert_rejected(lambda: asyncio.run(refresh_token(TokenRefresh(refresh_token=refresh), db=db_session)))
+    reissued, _ = _issue_tokens(db_session, user)
+    assert _principal(db_session, reissued).role == UserRole.ADMIN
+
+
+def test_deactivation_invalidates_issued_tokens(db_session, admin):
+    user = make_user(db_session, "member")
+    access, _ = _issue_tokens(db_session, user)
+    _principal(db_session, access)
+
+    asyncio.run(update_user(user.id, UserUpdate(is_active=False), db=db_session, current_user=admin))
+
+    _assert_rejected(lambda: _principal(db_session, access))
+
+
+def test_profile_change_keeps_issued_tokens(db_session, admin):
+    user = make_user(db_session, "member")
+    access, _ = _issue_tokens(db_session, user)
+
+    asyncio.run(update_user(user.id, UserUpdate(full_name="新しい名前"), db=db_session, current_user=admin))
+
+    assert _principal(db_session, access).id == user.id
+
+
+def test_deletion_invalidates_issued_tokens(db_session, admin):
+    user = make_user(db_session, "member")
+    access, refresh = _issue_tokens(db_session, user)
+    _principal(db_session, access)
+
+    asyncio.run(delete_user(user.id, db=db_session, current_user=admin))
+
+    _assert_rejected(lambda: _principal(db_session, access))
+    _assert_rejected(lambda: asyncio.run(refresh_token(TokenRefresh(refresh_token=refresh), db=db_session)))
+
+
+def test_refresh_rejects_stale_token_version(db_session):
+    user = make_user(db_session, "member")
+    _, stale = _issue_tokens(db_session, user)
+    bump_token_version(db_session, user.id)
+    db_session.commit()
+    invalidate_token_version(user.id)
+
+    _assert_rejected(lambda: asyncio.run(refresh_token(TokenRefresh(refresh_token=stale), db=db_session)))
+    _, current = _issue_tokens(db_session, user)
+    tokens = asyncio.run(refresh_token(TokenRefresh(refresh_token=current), db=db_session))
+    assert _principal(db_session, tokens["access_token"]).id == user.id
@@ -64,14 +64,8 @@ export default function BookDetailPage() {
         setLoading(true)
         const bookData = await booksApi.getBookById(Number(params.id))
         setBook(bookData)
-        
-        // 書籍の予約数も取得
-        try {
-          const count = await booksApi.getBookReservationCount(Number(params.id))
-          setReservationCount(count)
-        } catch (error) {
-          console.error('予約数の取得に失敗しました:', error)
-        }
+        // 予約待ち数は書籍データに含まれる
+        setReservationCount(bookData.pending_reservation_count ?? 0)
         
         // ユーザーの予約状況を取得
         try {
@@ -81,6 +81,11 @@ function ReservationItem({
           <div className="text-sm text-gray-500 mt-1">
             予約日: {formatDate(reservation.reserved_at)}
           </div>
+          {reservation.estimated_available_date && (
+            <div className="text-sm text-gray-500">
+              貸出可能予定日: {formatDate(reservation.estimated_available_date)}頃
+            </div>
+          )}
         </div>
         
         <div className="text-center">
@@ -238,19 +238,6 @@ export const booksApi = {
     }
   },
 
-  // 書籍の予約数を取得する
-  async getBookReservationCount(bookId: number): Promise<number> {
-    try {
-      // 予約専用APIを使用
-      const response = await fetch(`${API_BASE_URL}/api/books/${bookId}/reservations/count`);
-      const data = await response.json();
-      return data.reservation_count || 0;
-    } catch (error) {
-      console.error('予約数取得エラー:', error);
-      return 0;
-    }
-  },
-
   // 書籍をインポート（寄贈登録）
   importBook: async (bookData: {
     title: string;
@@ -537,7 +524,7 @@ export const reservationsApi = {
   getBookReservationQueue: async (bookId: number): Promise<Reservation[]> => {
     try {
       const response = await apiClient.get(`/reservations/book/${bookId}/queue`)
-      return response.data
+      return response.data.queue
     } catch (error) {
       console.error('予約キューAPIエラー:', error);
       throw error;
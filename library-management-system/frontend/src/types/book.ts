@@ -26,6 +26,8 @@ export interface Book {
   is_available?: boolean; // バックエンドのis_availableフィールド
   total_copies?: number;
   available_copies?: number;
+  active_loan_count?: number; // 未返却の貸出数
+  pending_reservation_count?: number; // 待機中の予約数
   image_url?: string;
   price?: number;
   current_borrower_id?: number;
@@ -184,6 +186,7 @@ export interface Reservation {
   expiry_date: string;
   status: 'pending' | 'ready' | 'completed' | 'cancelled' | 'expired';
   priority: number;
+  estimated_available_date?: string; // 貸出可能予定日（予約キュー取得時のみ）
   notes?: string;
   created_at: string;
   updated_at: string;